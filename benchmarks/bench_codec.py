@@ -0,0 +1,91 @@
+"""Benchmark the JSON codecs on real template bundle responses.
+
+Initializes a repository from the packaged defaults, builds the spec, impact
+and TDR bundles, and times the server's tools/call response paths for every
+codec available here: JSON-in-text content (bundle encoded, then the JSON-RPC
+envelope, as sent to older clients), structuredContent (one encode), and
+decoding of each. ``--context-kb`` pads agent_context.md to
+model a project with a large context document.
+
+Usage:
+    python benchmarks/bench_codec.py [--iterations 2000] [--context-kb 0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from directive import codec, package_data  # noqa: E402
+from directive.bundles import build_template_bundle  # noqa: E402
+
+
+TEMPLATES = ("spec_template.md", "impact_template.md", "tdr_template.md")
+
+
+def _init_repo(repo: Path, context_kb: int) -> None:
+    for rel, resource in package_data.packaged_files().items():
+        dst = repo / "directive" / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_bytes(resource.read_bytes())
+    if context_kb:
+        ctx = repo / "directive" / "reference" / "agent_context.md"
+        paragraph = "Context — décisions, conventions and constraints for agents.\n"
+        ctx.write_text(ctx.read_text(encoding="utf-8") + paragraph * (context_kb * 1024 // len(paragraph)), encoding="utf-8")
+
+
+def _time(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations * 1e6)
+    return {"best_us": round(min(samples), 2), "median_us": round(statistics.median(samples), 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--context-kb", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        _init_repo(repo, args.context_kb)
+        bundles = {name: build_template_bundle(name, repo) for name in TEMPLATES}
+
+    results: Dict[str, Any] = {"codecs": codec.available_codecs(), "bundles": {}}
+    for name, bundle in bundles.items():
+        per_codec: Dict[str, Any] = {}
+        for codec_name in codec.available_codecs():
+            c = codec.get_codec(codec_name)
+
+            def _encode() -> bytes:
+                text = c.dumps(bundle, False).decode("utf-8")
+                return c.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": text}]}}, False)
+
+            def _encode_structured() -> bytes:
+                return c.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": [], "structuredContent": bundle}}, False)
+
+            frame, structured_frame = _encode(), _encode_structured()
+            per_codec[codec_name] = {
+                "encode_text": _time(_encode, args.iterations),
+                "decode_text": _time(lambda: c.loads(c.loads(frame)["result"]["content"][0]["text"]), args.iterations),
+                "encode_structured": _time(_encode_structured, args.iterations),
+                "decode_structured": _time(lambda: c.loads(structured_frame), args.iterations),
+            }
+        results["bundles"][name] = {"text_bytes": len(frame), "structured_bytes": len(structured_frame), **per_codec}
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""Measure memory of concurrent server processes with and without the shared cache.
+
+Creates a repository whose reference docs total ``--doc-mb`` MiB, starts
+``--processes`` Python processes that each read every doc through the
+Directive caches (as a server answering requests would) and then idle, and
+sums their proportional set size (PSS, which splits shared pages between the
+processes mapping them) from /proc. Linux only.
+
+Usage:
+    python benchmarks/bench_shared_cache.py [--processes 8] [--doc-mb 8]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+_WORKER = """
+import sys
+from pathlib import Path
+from directive import bundles
+repo = Path.cwd()
+if sys.argv[1] == "shared":
+    bundles.enable_shared_cache(repo)
+for path in bundles.list_directive_files(repo):
+    bundles.read_directive_file(repo, path)
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def _pss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _run(repo: Path, mode: str, processes: int) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    procs = []
+    started = time.perf_counter()
+    for _ in range(processes):
+        proc = subprocess.Popen(
+            [sys.executable, "-c", _WORKER, mode], cwd=str(repo), env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        # Start one at a time so later processes find the segment populated
+        assert proc.stdout.readline().strip() == "ready"
+        procs.append(proc)
+    elapsed = time.perf_counter() - started
+    total = sum(_pss_kib(p.pid) for p in procs)
+    for proc in procs:
+        proc.communicate("")
+    return {"total_pss_mib": round(total / 1024, 1), "per_process_pss_mib": round(total / 1024 / processes, 1), "startup_s": round(elapsed, 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--doc-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        ref = repo / "directive" / "reference"
+        ref.mkdir(parents=True)
+        line = "Context for agents: conventions, decisions and constraints.\n"
+        for i in range(4):
+            ref.joinpath(f"doc-{i}.md").write_text(line * (args.doc_mb * 1024 * 1024 // 4 // len(line)))
+        results = {
+            "processes": args.processes,
+            "doc_mb": args.doc_mb,
+            "per_process_caches": _run(repo, "local", args.processes),
+            "shared_cache": _run(repo, "shared", args.processes),
+        }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Benchmark directive/ tree walks on a synthetic tree.
+
+Builds a tree of roughly ``--entries`` files (spec folders with markdown plus
+bulky attachment and editor swap files) and compares the original os.walk
+listing against ``list_directive_files`` with and without a .directiveignore.
+
+Usage:
+    python benchmarks/bench_walk.py [--entries 100000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from directive import bundles  # noqa: E402
+
+
+def _build_tree(repo: Path, entries: int) -> None:
+    root = repo / "directive"
+    per_spec = 100
+    for i in range(max(1, entries // per_spec)):
+        spec = root / "specs" / f"20250101-feature-{i:05d}"
+        attachments = spec / "attachments"
+        attachments.mkdir(parents=True)
+        for name in ("spec.md", "impact.md", "tdr.md", "implementation_summary.md"):
+            spec.joinpath(name).write_text(name)
+        spec.joinpath(".spec.md.swp").write_text("swap")
+        for j in range(per_spec - 5):
+            attachments.joinpath(f"screenshot-{j:03d}.png").write_bytes(b"")
+
+
+def _legacy_walk(repo: Path) -> List[str]:
+    # The original implementation: os.walk plus Path.relative_to per file
+    root = repo / "directive"
+    results: List[str] = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            rel = str(Path(dirpath).joinpath(name).relative_to(root).as_posix())
+            results.append(f"directive/{rel}")
+    results.sort()
+    return results
+
+
+def _uncached(repo: Path) -> Callable[[], List[str]]:
+    def _run() -> List[str]:
+        bundles.clear_caches()
+        return bundles.list_directive_files(repo)
+
+    return _run
+
+
+def _time(fn: Callable[[], List[str]], repeat: int) -> Dict[str, float]:
+    samples = []
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(fn())
+        samples.append(time.perf_counter() - started)
+    return {"files": count, "best_s": round(min(samples), 4), "median_s": round(statistics.median(samples), 4)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        _build_tree(repo, args.entries)
+        ignore_file = repo / "directive" / ".directiveignore"
+        results = {
+            "entries": args.entries,
+            "os_walk_relative_to": _time(lambda: _legacy_walk(repo), args.repeat),
+            "scandir": _time(_uncached(repo), args.repeat),
+        }
+        ignore_file.write_text("attachments/\n*.swp\n")
+        results["scandir_with_directiveignore"] = _time(_uncached(repo), args.repeat)
+        results["cached_revalidation"] = _time(lambda: bundles.list_directive_files(repo), args.repeat)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
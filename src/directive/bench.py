@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import codec
+
+
+# Load generator for the MCP server: one server process, many requests. The
+# legacy runtime speaks Content-Length framed JSON-RPC; FastMCP's stdio
+# transport uses newline-delimited JSON.
+
+RUNTIMES = ("legacy", "fastmcp")
+PROTOCOL_VERSION = "2025-06-18"
+DEFAULT_MIX: Dict[str, int] = {
+    "tools/list": 1,
+    "directive/files.list": 1,
+    "directive/files.get": 2,
+    "directive/templates.spec": 1,
+    "directive/templates.impact": 1,
+    "directive/templates.tdr": 1,
+}
+DEFAULT_FILE = "directive/reference/agent_context.md"
+
+_LAUNCH = {
+    "legacy": "from pathlib import Path; from directive.server import serve_stdio; serve_stdio(Path.cwd().joinpath('directive'))",
+    "fastmcp": "from directive.server import _build_fastmcp_app; _build_fastmcp_app().run('stdio')",
+}
+# Keep only the tail of the server's stderr (FastMCP logs every request)
+_STDERR_TAIL_LINES = 200
+
+
+class _Pending:
+    __slots__ = ("done", "response", "size", "sent", "received")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: Optional[Dict[str, Any]] = None
+        self.size = 0
+        self.sent = 0.0
+        self.received = 0.0
+
+    @property
+    def latency(self) -> float:
+        return self.received - self.sent
+
+
+class ServerClient:
+    """Drive one server subprocess from many threads, matching responses to requests by id.
+
+    By default the server is this package's ``runtime`` started with the current
+    interpreter; ``command`` launches any other server (e.g. another build)
+    that speaks the runtime's wire format.
+    """
+
+    def __init__(self, repo_root: Path, runtime: str = "legacy", command: Optional[Sequence[str]] = None) -> None:
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown runtime: {runtime} (choose from: {', '.join(RUNTIMES)})")
+        self.runtime = runtime
+        env = os.environ.copy()
+        if command is None:
+            package_parent = str(Path(__file__).resolve().parents[1])
+            existing = env.get("PYTHONPATH", "")
+            env["PYTHONPATH"] = package_parent + (os.pathsep + existing if existing else "")
+            command = [sys.executable, "-c", _LAUNCH[runtime]]
+        self.proc = subprocess.Popen(
+            list(command),
+            cwd=str(repo_root),
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stderr: Deque[bytes] = deque(maxlen=_STDERR_TAIL_LINES)
+        self._reader = threading.Thread(target=self._read_loop, name="directive-bench-reader", daemon=True)
+        self._reader.start()
+        self._stderr_reader = threading.Thread(target=self._drain_stderr, name="directive-bench-stderr", daemon=True)
+        self._stderr_reader.start()
+
+    # ---- framing ----
+    def _send(self, message: Dict[str, Any]) -> None:
+        body = codec.dumps({"jsonrpc": "2.0", **message})
+        if self.runtime == "legacy":
+            frame = f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+        else:
+            frame = body + b"\n"
+        with self._write_lock:
+            self.proc.stdin.write(frame)  # type: ignore[union-attr]
+            self.proc.stdin.flush()  # type: ignore[union-attr]
+
+    def _read_frame(self) -> Optional[bytes]:
+        stdout = self.proc.stdout
+        assert stdout is not None
+        if self.runtime != "legacy":
+            while True:
+                line = stdout.readline()
+                if not line:
+                    return None
+                if line.strip():
+                    return line
+        length = None
+        while True:
+            line = stdout.readline()
+            if not line:
+                return None
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        return stdout.read(length) if length is not None else b"{}"
+
+    def _read_loop(self) -> None:
+        while True:
+            frame = self._read_frame()
+            if frame is None:
+                break
+            received = time.perf_counter()
+            message = codec.loads(frame)
+            with self._lock:
+                pending = self._pending.pop(message.get("id"), None) if "id" in message else None
+            if pending is not None:
+                pending.response = message
+                pending.size = len(frame)
+                pending.received = received
+                pending.done.set()
+        # Server exited: release everyone still waiting
+        with self._lock:
+            stranded, self._pending = list(self._pending.values()), {}
+        for pending in stranded:
+            pending.done.set()
+
+    def _drain_stderr(self) -> None:
+        assert self.proc.stderr is not None
+        for line in self.proc.stderr:
+            self._stderr.append(line)
+
+    # ---- requests ----
+    def send_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, _Pending]:
+        """Send a request without waiting; the returned handle completes when the response arrives."""
+        request_id = next(self._ids)
+        pending = _Pending()
+        with self._lock:
+            self._pending[request_id] = pending
+        pending.sent = time.perf_counter()
+        self._send({"id": request_id, "method": method, "params": params or {}})
+        return request_id, pending
+
+    def wait(self, request_id: int, pending: _Pending, timeout: float = 30.0) -> Dict[str, Any]:
+        if not pending.done.wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError(f"No response to request {request_id} within {timeout}s")
+        if pending.response is None:
+            raise ConnectionError("Server exited before responding")
+        return pending.response
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        return self.wait(*self.send_request(method, params), timeout=timeout)
+
+    def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        message: Dict[str, Any] = {"method": method}
+        if params is not None:
+            message["params"] = params
+        self._send(message)
+
+    def initialize(self) -> Dict[str, Any]:
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            client_version = version("directive")
+        except PackageNotFoundError:  # pragma: no cover - running from a source tree
+            client_version = "0.0.0"
+        response = self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "directive-bench", "version": client_version},
+            },
+        )
+        self.notify("notifications/initialized")
+        return response
+
+    def close(self, timeout: float = 10.0) -> str:
+        """Close stdin, wait for the server to exit and return the tail of its stderr."""
+        try:
+            self.proc.stdin.close()  # type: ignore[union-attr]
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self._reader.join(timeout=timeout)
+        self._stderr_reader.join(timeout=timeout)
+        return b"".join(self._stderr).decode("utf-8", errors="replace")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse ``name=weight,...``; tool names may omit the ``directive/`` prefix.
+
+    Raises: ValueError for malformed entries or non-positive weights
+    """
+    mix: Dict[str, int] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, weight = item.partition("=")
+        name = name.strip()
+        if name != "tools/list" and not name.startswith("directive/"):
+            name = f"directive/{name}"
+        try:
+            count = int(weight) if sep else 1
+        except ValueError:
+            raise ValueError(f"invalid weight for {name}: {weight!r}") from None
+        if count < 1:
+            raise ValueError(f"weight for {name} must be at least 1")
+        mix[name] = count
+    if not mix:
+        raise ValueError("mix must name at least one operation")
+    return mix
+
+
+def _request_for(op: str, path: str) -> Tuple[str, Dict[str, Any]]:
+    if op == "tools/list":
+        return "tools/list", {}
+    arguments: Dict[str, Any] = {"path": path} if op == "directive/files.get" else {}
+    return "tools/call", {"name": op, "arguments": arguments}
+
+
+def _schedule(mix: Dict[str, int]) -> Iterator[str]:
+    # Deterministic weighted round robin
+    return itertools.cycle([op for op, weight in mix.items() for _ in range(weight)])
+
+
+def _is_error(response: Dict[str, Any]) -> bool:
+    return "error" in response or bool((response.get("result") or {}).get("isError"))
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize_latencies(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    ms = lambda seconds: round(seconds * 1000.0, 3)  # noqa: E731
+    return {
+        "count": len(ordered),
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+def run_server_bench(
+    repo_root: Path,
+    runtime: str = "legacy",
+    requests: int = 1000,
+    concurrency: int = 8,
+    mix: Optional[Dict[str, int]] = None,
+    warmup: int = 20,
+    path: str = DEFAULT_FILE,
+) -> Dict[str, Any]:
+    """Start one server, replay ``requests`` calls from ``concurrency`` closed-loop workers and report latency.
+
+    Returns: throughput and per-operation p50/p95/p99 latency (milliseconds)
+    """
+    if requests < 1 or concurrency < 1:
+        raise ValueError("requests and concurrency must be at least 1")
+    mix = mix or dict(DEFAULT_MIX)
+    client = ServerClient(repo_root, runtime)
+    try:
+        client.initialize()
+        warm = _schedule(mix)
+        for _ in range(warmup):
+            client.request(*_request_for(next(warm), path))
+
+        schedule = _schedule(mix)
+        schedule_lock = threading.Lock()
+        remaining = [requests]
+        samples: Dict[str, List[float]] = {op: [] for op in mix}
+        errors: Dict[str, int] = {op: 0 for op in mix}
+        failures: List[BaseException] = []
+
+        def _worker() -> None:
+            while True:
+                with schedule_lock:
+                    if remaining[0] <= 0 or failures:
+                        return
+                    remaining[0] -= 1
+                    op = next(schedule)
+                started = time.perf_counter()
+                try:
+                    response = client.request(*_request_for(op, path))
+                except Exception as exc:
+                    failures.append(exc)
+                    return
+                elapsed = time.perf_counter() - started
+                # list.append is atomic under the GIL
+                samples[op].append(elapsed)
+                if _is_error(response):
+                    with schedule_lock:
+                        errors[op] += 1
+
+        workers = [threading.Thread(target=_worker, name=f"directive-bench-{i}") for i in range(concurrency)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duration = time.perf_counter() - started
+    finally:
+        client.close()
+    if failures:
+        raise failures[0]
+
+    all_samples = [s for op_samples in samples.values() for s in op_samples]
+    return {
+        "runtime": runtime,
+        "codec": codec.codec_name(),
+        "concurrency": concurrency,
+        "requests": len(all_samples),
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(len(all_samples) / duration, 1) if duration else 0.0,
+        "errors": sum(errors.values()),
+        "overall": summarize_latencies(all_samples),
+        "operations": {op: {**summarize_latencies(samples[op]), "errors": errors[op]} for op in mix},
+    }
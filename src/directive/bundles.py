@@ -1,12 +1,81 @@
 from __future__ import annotations
 
+import bisect
 import os
+import posixpath
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .cancellation import DeadlineExceeded, checkpoint
+from .progress import operation
+from .cache import DerivedCache, FileCache, ListingCache, Signature, stat_signature
+from .ignore import IGNORE_FILENAME, IgnoreRules
+from .markdown import Heading, build_heading_index, match_headings
+from .package_data import read_packaged_text
+from .paging import note_version
 
 
 DIRECTIVE_DIRNAME = "directive"
 
+# Process-wide, stat-validated caches shared by the CLI and both server runtimes.
+_CONTENT_CACHE = FileCache()
+_LISTING_CACHE = ListingCache()
+_HEADING_CACHE: DerivedCache[List[Heading]] = DerivedCache()
+
+
+def clear_caches() -> None:
+    """Empty the process caches and detach any shared cache."""
+    release_caches()
+    _CONTENT_CACHE.detach_shared()
+    _LISTING_CACHE.detach_shared()
+
+
+def release_caches() -> None:
+    """Drop every in-process cache entry and stop git reader subprocesses.
+
+    Any attached shared cache stays attached; everything else is rebuilt
+    lazily on the next read.
+    """
+    from .gitrev import close_git_objects
+    from .specs import clear_spec_indexes
+
+    _CONTENT_CACHE.clear()
+    _LISTING_CACHE.clear()
+    _HEADING_CACHE.clear()
+    clear_spec_indexes()
+    close_git_objects()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Entry counts of the process caches."""
+    from .gitrev import git_objects_count
+    from .specs import spec_index_count
+
+    return {
+        "files": len(_CONTENT_CACHE),
+        "listings": len(_LISTING_CACHE),
+        "headingIndexes": len(_HEADING_CACHE),
+        "specIndexes": spec_index_count(),
+        "gitReaders": git_objects_count(),
+    }
+
+
+def enable_shared_cache(repo_root: Path | None = None) -> bool:
+    """Serve file contents and the directive/ listing of ``repo_root`` from the cross-process cache.
+
+    The segment lives under ``.directive/cache/`` and is mapped by every
+    process that enables it for the same repository. Returns False (keeping
+    the per-process caches) where the platform lacks flock/mmap.
+    """
+    from .shared_cache import SharedFiles, shared_cache_available
+
+    if not shared_cache_available():
+        return False
+    shared = SharedFiles(repo_root or Path.cwd())
+    _CONTENT_CACHE.attach_shared(shared)
+    _LISTING_CACHE.attach_shared(shared)
+    return True
+
 
 def _normalize_and_validate_path(root: Path, path: str) -> Path:
     candidate = Path(path)
@@ -26,19 +95,156 @@ def get_directive_root(repo_root: Path | None = None) -> Path:
     return root
 
 
-def list_directive_files(repo_root: Path | None = None) -> List[str]:
+def _walk_entries(
+    root: Path, dir_sigs: Optional[Dict[str, Signature]] = None, after: Optional[str] = None
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield ``(relative_path, entry)`` for files under ``root`` in sorted path order.
+
+    Uses ``os.scandir`` so directory/file type comes from the dirent, builds
+    relative paths as plain strings, and prunes subtrees matched by
+    ``.directiveignore`` before descending into them. Symlinked directories are
+    not followed. When ``dir_sigs`` is given, the stat signature of every
+    scanned directory (and of the ignore file) is recorded for cache validation.
+    With ``after``, only paths sorting after it are yielded, and subtrees that
+    sort entirely before it are not scanned.
+    """
+    rules = IgnoreRules.from_file(root / IGNORE_FILENAME)
+    if dir_sigs is not None:
+        # Recorded even without active rules, so adding one to the file invalidates the listing
+        ignore_path = os.path.join(root, IGNORE_FILENAME)
+        try:
+            dir_sigs[ignore_path] = stat_signature(os.stat(ignore_path))
+        except FileNotFoundError:
+            pass  # creating it changes directive/'s own signature
+
+    scanned = [0]
+
+    def _scan(dirpath: str, prefix: str) -> Iterator[Tuple[str, os.DirEntry]]:
+        checkpoint()
+        scanned[0] += 1
+        op.advance(scanned[0])
+        if dir_sigs is not None:
+            dir_sigs[dirpath] = stat_signature(os.stat(dirpath))
+        with os.scandir(dirpath) as it:
+            entries = []
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                # Sorting directories as "name/" makes the depth-first walk emit globally sorted paths
+                entries.append((entry.name + "/" if is_dir else entry.name, is_dir, entry))
+        entries.sort(key=lambda e: e[0])
+        for _, is_dir, entry in entries:
+            rel = prefix + entry.name
+            if rules and rules.is_ignored(rel, is_dir):
+                continue
+            if after is not None and (rel + "/" if is_dir else rel) <= after and not after.startswith(rel + "/"):
+                continue
+            if is_dir:
+                if not entry.is_symlink():
+                    yield from _scan(entry.path, rel + "/")
+            else:
+                yield rel, entry
+
+    with operation("Listing directive/ (directories scanned)") as op:
+        yield from _scan(os.fspath(root), "")
+
+
+def iter_directive_entries(repo_root: Path | None = None) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield ``("directive/<rel>", entry)`` for every listed file, in sorted order."""
+    root = get_directive_root(repo_root)
+    for rel, entry in _walk_entries(root):
+        yield "directive/" + rel, entry
+
+
+def iter_directive_files(repo_root: Path | None = None) -> Iterator[str]:
+    """Yield paths under directive/ in sorted order as they are discovered."""
+    for path, _ in iter_directive_entries(repo_root):
+        yield path
+
+
+def _git_objects(repo_root: Path | None):
+    from .gitrev import get_git_objects
+
+    return get_git_objects(Path.cwd() if repo_root is None else repo_root)
+
+
+def _rev_relative_path(path: str) -> str:
+    # Same rules as working-tree reads: optional "directive/" prefix, no escaping the root
+    rel = path[len("directive/"):] if path.startswith("directive/") else path
+    rel = posixpath.normpath(rel.lstrip("/"))
+    if rel == ".." or rel.startswith("../"):
+        raise ValueError("Path escape detected; refusing to read outside directive root")
+    return rel
+
+
+def _resolve_blob_at_rev(repo_root: Path | None, path: str, rev: str) -> str:
+    found = _git_objects(repo_root).resolve(rev, f"{DIRECTIVE_DIRNAME}/{_rev_relative_path(path)}")
+    if found is None or found[1] != "blob":
+        raise FileNotFoundError(f"File not found under directive/ at {rev}: {path}")
+    return found[0]
+
+
+def list_directive_files(repo_root: Path | None = None, rev: Optional[str] = None) -> List[str]:
+    """List files under directive/ in sorted order, from the working tree or at git revision ``rev``."""
+    if rev is not None:
+        objects = _git_objects(repo_root)
+        found = objects.resolve(rev, DIRECTIVE_DIRNAME)
+        if found is None or found[1] != "tree":
+            raise FileNotFoundError(f"directive/ directory not found at {rev}")
+        return ["directive/" + rel for rel in objects.list_tree(found[0])]
     root = get_directive_root(repo_root)
-    results: List[str] = []
-    for dirpath, _, filenames in os.walk(root):
-        for name in filenames:
-            rel = str(Path(dirpath).joinpath(name).relative_to(root).as_posix())
-            results.append(f"directive/{rel}")
-    results.sort()
-    return results
 
+    def _build() -> Tuple[Dict[str, Signature], List[str]]:
+        dir_sigs: Dict[str, Signature] = {}
+        results = ["directive/" + rel for rel, _ in _walk_entries(root, dir_sigs)]
+        return dir_sigs, results
 
-def read_directive_file(repo_root: Path | None, path: str) -> str:
+    return _LISTING_CACHE.get(root, _build)
+
+
+def list_directive_files_page(
+    repo_root: Path | None = None, rev: Optional[str] = None, cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """``list_directive_files`` as a files.list payload, resuming after path ``cursor`` when given.
+
+    When the request's deadline passes part-way through a working-tree walk,
+    the files found so far are returned with ``truncated: true`` and a
+    ``cursor`` to continue from; a deadline hit before any file was found is
+    raised. A continuation is served from the cached listing when it is still
+    valid, and otherwise walks only the part of the tree after ``cursor``.
+    """
+    if cursor is not None and not cursor.startswith("directive/"):
+        raise ValueError("cursor must be a path returned by a previous files.list call")
+    if rev is not None:
+        files = list_directive_files(repo_root, rev=rev)
+        return {"files": files if cursor is None else [f for f in files if f > cursor]}
     root = get_directive_root(repo_root)
+    found: List[str] = []
+
+    def _build() -> Tuple[Dict[str, Signature], List[str]]:
+        dir_sigs: Dict[str, Signature] = {}
+        for rel, _ in _walk_entries(root, dir_sigs):
+            found.append("directive/" + rel)
+        return dir_sigs, list(found)
+
+    try:
+        if cursor is None:
+            return {"files": _LISTING_CACHE.get(root, _build)}
+        cached = _LISTING_CACHE.lookup(root)
+        if cached is not None:
+            return {"files": cached[bisect.bisect_right(cached, cursor) :]}
+        for rel, _ in _walk_entries(root, after=cursor[len("directive/") :]):
+            found.append("directive/" + rel)
+    except DeadlineExceeded:
+        if not found:
+            raise
+        return {"files": found, "truncated": True, "cursor": found[-1]}
+    return {"files": found}
+
+
+def _resolve_directive_file(root: Path, path: str) -> Path:
     # Normalize provided path to a path relative to directive/ root
     if path.startswith("directive/"):
         normalized_path = Path(path).relative_to("directive").as_posix()
@@ -47,10 +253,109 @@ def read_directive_file(repo_root: Path | None, path: str) -> str:
     full = _normalize_and_validate_path(root, normalized_path)
     if not full.exists() or not full.is_file():
         raise FileNotFoundError(f"File not found under directive/: {path}")
-    return full.read_text(encoding="utf-8")
+    return full
 
 
-def build_template_bundle(template_name: str, repo_root: Path | None = None) -> Dict:
+def read_directive_file(repo_root: Path | None, path: str, rev: Optional[str] = None) -> str:
+    if rev is not None:
+        oid = _resolve_blob_at_rev(repo_root, path, rev)
+        text = _git_objects(repo_root).read_object(oid).decode("utf-8")
+        note_version(text, oid)
+        return text
+    root = get_directive_root(repo_root)
+    full = _resolve_directive_file(root, path)
+    return _CONTENT_CACHE.read_text(full)
+
+
+def read_template(repo_root: Path | None, template_name: str) -> str:
+    """Read a template from directive/reference/templates/, falling back to the packaged default."""
+    root = get_directive_root(repo_root)
+    try:
+        return _CONTENT_CACHE.read_text(root / "reference" / "templates" / template_name)
+    except FileNotFoundError:
+        return read_packaged_text(f"reference/templates/{template_name}")
+
+
+def _index_headings(path: str) -> List[Heading]:
+    with open(path, "rb") as fh:
+        return build_heading_index(fh.read())
+
+
+def _select_sections(index: List[Heading], headings: Sequence[str], read: Any) -> Tuple[List[Dict[str, Any]], List[str]]:
+    sections: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    seen = set()
+    for query in headings:
+        matches = match_headings(index, query)
+        if not matches:
+            missing.append(query)
+        for h in matches:
+            if h.start in seen:
+                continue
+            seen.add(h.start)
+            sections.append({"title": h.title, "level": h.level, "content": read(h).decode("utf-8")})
+    return sections, missing
+
+
+def read_directive_sections(
+    repo_root: Path | None, path: str, headings: Sequence[str], rev: Optional[str] = None
+) -> Dict[str, Any]:
+    """Return only the requested markdown sections of a directive/ file.
+
+    Sections are located through a cached heading offset index and read with a
+    seek, so the cost scales with the section rather than the document. A
+    section spans its heading line through its last subsection. Unmatched
+    queries are reported under ``missing`` along with the available headings.
+    With ``rev``, the file is read at that git revision and its index is
+    cached by blob ID.
+    """
+    if rev is not None:
+        objects = _git_objects(repo_root)
+        oid = _resolve_blob_at_rev(repo_root, path, rev)
+        data = objects.read_object(oid)
+        index = objects.derived.get(f"headings:{oid}", lambda: _sized(build_heading_index(data)))
+        sections, missing = _select_sections(index, headings, lambda h: data[h.start:h.end])
+        note_version(sections, (oid, tuple(headings)))
+        return _sections_result(path, index, sections, missing)
+    root = get_directive_root(repo_root)
+    full = _resolve_directive_file(root, path)
+    sections: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    index: List[Heading] = []
+    for _ in range(3):
+        sig, index = _HEADING_CACHE.get(full, _index_headings)
+        with open(full, "rb") as fh:
+
+            def _read(h: Heading) -> bytes:
+                fh.seek(h.start)
+                return fh.read(h.end - h.start)
+
+            sections, missing = _select_sections(index, headings, _read)
+            # Retry if the file changed while the index was being used
+            if stat_signature(os.fstat(fh.fileno())) == sig:
+                note_version(sections, (sig, tuple(headings)))
+                break
+    return _sections_result(path, index, sections, missing)
+
+
+def _sized(index: List[Heading]) -> Tuple[int, List[Heading]]:
+    return 64 * len(index), index
+
+
+def _sections_result(path: str, index: List[Heading], sections: List[Dict[str, Any]], missing: List[str]) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"path": path, "sections": sections}
+    if missing:
+        result["missing"] = missing
+        result["headings"] = [h.title for h in index]
+    return result
+
+
+def iter_template_bundle(template_name: str, repo_root: Path | None = None) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(section, value)`` pairs of a template bundle, reading each file only when its section is reached.
+
+    All required files are checked before the first section is yielded, so a
+    missing file fails before any output is produced.
+    """
     root = get_directive_root(repo_root)
     aop_path = root / "reference" / "agent_operating_procedure.md"
     ctx_path = root / "reference" / "agent_context.md"
@@ -65,19 +370,77 @@ def build_template_bundle(template_name: str, repo_root: Path | None = None) ->
             f"Missing template: directive/reference/templates/{template_name}. Run 'directive update' or choose an existing template."
         )
 
-    aop = aop_path.read_text(encoding="utf-8")
-    ctx = ctx_path.read_text(encoding="utf-8")
-    tmpl = tmpl_path.read_text(encoding="utf-8")
-
-    return {
-        "agentOperatingProcedure": {"path": "directive/reference/agent_operating_procedure.md", "content": aop},
-        "agentContext": {"path": "directive/reference/agent_context.md", "content": ctx},
-        "template": {"path": f"directive/reference/templates/{template_name}", "content": tmpl},
-        "resources": [
-            {"path": "directive/reference/agent_operating_procedure.md"},
-            {"path": "directive/reference/agent_context.md"},
-            {"path": f"directive/reference/templates/{template_name}"},
-        ],
+    yield "agentOperatingProcedure", {
+        "path": "directive/reference/agent_operating_procedure.md",
+        "content": _CONTENT_CACHE.read_text(aop_path),
     }
+    yield "agentContext", {"path": "directive/reference/agent_context.md", "content": _CONTENT_CACHE.read_text(ctx_path)}
+    yield "template", {"path": f"directive/reference/templates/{template_name}", "content": _CONTENT_CACHE.read_text(tmpl_path)}
+    yield "resources", [
+        {"path": "directive/reference/agent_operating_procedure.md"},
+        {"path": "directive/reference/agent_context.md"},
+        {"path": f"directive/reference/templates/{template_name}"},
+    ]
+
+
+def build_template_bundle(template_name: str, repo_root: Path | None = None) -> Dict:
+    bundle: Dict[str, Any] = {}
+    with operation(f"Building {template_name} bundle", total=4) as op:
+        for section, value in iter_template_bundle(template_name, repo_root):
+            bundle[section] = value
+            op.advance(len(bundle))
+    return bundle
+
+
+PREWARM_TARGETS = ("reference", "templates", "listing", "specs")
+
+
+def prewarm_caches(repo_root: Path | None = None, targets: Iterable[str] = PREWARM_TARGETS) -> Dict[str, int]:
+    """Populate the process caches ahead of the first request.
+
+    Targets: ``reference`` (AOP and agent context), ``templates``, ``listing``
+    (the directive/ file list) and ``specs`` (every ``specs/*/spec.md`` plus
+    the specs digest index).
+    Unreadable files are skipped; warming is best effort.
+
+    Returns: number of entries warmed per target
+    """
+    from .shared_cache import batch_publishes
+
+    with batch_publishes():
+        return _prewarm(repo_root, targets)
+
+
+def _prewarm(repo_root: Path | None, targets: Iterable[str]) -> Dict[str, int]:
+    root = get_directive_root(repo_root)
+    warmed: Dict[str, int] = {}
+
+    def _warm_files(paths: Iterable[Path]) -> int:
+        count = 0
+        for p in paths:
+            try:
+                _CONTENT_CACHE.read_text(p)
+                count += 1
+            except (OSError, UnicodeDecodeError):
+                continue
+        return count
 
+    for target in targets:
+        if target == "reference":
+            warmed[target] = _warm_files(
+                [root / "reference" / "agent_operating_procedure.md", root / "reference" / "agent_context.md"]
+            )
+        elif target == "templates":
+            templates_dir = root / "reference" / "templates"
+            warmed[target] = _warm_files(sorted(templates_dir.glob("*.md")) if templates_dir.is_dir() else [])
+        elif target == "listing":
+            warmed[target] = len(list_directive_files(repo_root))
+        elif target == "specs":
+            from .specs import get_spec_index
 
+            specs_dir = root / "specs"
+            warmed[target] = _warm_files(sorted(specs_dir.glob("*/spec.md")) if specs_dir.is_dir() else [])
+            get_spec_index(repo_root).refresh()
+        else:
+            raise ValueError(f"Unknown prewarm target: {target}")
+    return warmed
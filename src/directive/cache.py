@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Generic, List, Optional, TextIO, Tuple, TypeVar
+
+from .cancellation import checkpoint
+from .paging import note_version
+from .progress import operation
+from .requestlog import note_cache_lookup
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .shared_cache import SharedFiles
+
+
+# Process-wide caches for directive/ content. Entries are validated against a
+# cheap stat signature on every lookup, so edits made outside the server are
+# always observed; nothing is ever served stale.
+
+Signature = Tuple[int, int, int]
+T = TypeVar("T")
+# Large files are read in chunks so a cancelled request stops between them
+_READ_CHUNK_CHARS = 1 << 20
+
+
+def stat_signature(st: os.stat_result) -> Signature:
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+
+
+def _load_text(path: str, size: int) -> str:
+    with open(path, "r", encoding="utf-8") as fh:
+        return _read_all(fh, size)
+
+
+def _read_all(fh: TextIO, size: int) -> str:
+    chunks: List[str] = []
+    with operation(f"Reading {os.path.basename(fh.name)} (bytes)", total=size) as op:
+        while True:
+            chunk = fh.read(_READ_CHUNK_CHARS)
+            if not chunk:
+                return "".join(chunks)
+            chunks.append(chunk)
+            checkpoint()
+            op.advance(fh.buffer.tell())
+
+
+def _shared_for(shared: List["SharedFiles"], key: str) -> Optional["SharedFiles"]:
+    for backend in shared:
+        if backend.covers(key):
+            return backend
+    return None
+
+
+class FileCache:
+    """Stat-validated cache of decoded file contents keyed by absolute path.
+
+    Paths under a repository attached with ``attach_shared`` are served from
+    the cross-process segment instead of being held in this process. The
+    text returned is versioned (for paging) by the signature it was read at.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Signature, str]] = {}
+        self._lock = threading.Lock()
+        self._shared: List["SharedFiles"] = []
+        self.hits = 0
+        self.misses = 0
+
+    def attach_shared(self, shared: "SharedFiles") -> None:
+        with self._lock:
+            self._shared.append(shared)
+
+    def detach_shared(self) -> None:
+        with self._lock:
+            self._shared = []
+
+    def read_text(self, path: Path) -> str:
+        key = os.fspath(path)
+        sig = stat_signature(os.stat(key))
+        shared = _shared_for(self._shared, key)
+        if shared is not None:
+            text = shared.read_text(key, sig, lambda path: _load_text(path, sig[2]))
+            note_version(text, sig)
+            return text
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self.hits += 1
+                note_cache_lookup(True)
+                note_version(entry[1], sig)
+                return entry[1]
+            self.misses += 1
+            note_cache_lookup(False)
+        text = _load_text(key, sig[2])
+        with self._lock:
+            self._entries[key] = (sig, text)
+        note_version(text, sig)
+        return text
+
+    def __contains__(self, path: object) -> bool:
+        key = os.fspath(path)  # type: ignore[call-overload]
+        shared = _shared_for(self._shared, key)
+        if shared is not None:
+            return shared.segment.get(shared._key("file", key)) is not None
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DerivedCache(Generic[T]):
+    """Stat-validated cache of values derived from a file (e.g. an index), keyed by absolute path."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Signature, T]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, build: Callable[[str], T]) -> Tuple[Signature, T]:
+        """Return ``(signature, value)`` for ``path``, rebuilding with ``build(path)`` when the file changed."""
+        key = os.fspath(path)
+        sig = stat_signature(os.stat(key))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self.hits += 1
+                note_cache_lookup(True)
+                return entry
+            self.misses += 1
+            note_cache_lookup(False)
+        value = build(key)
+        with self._lock:
+            self._entries[key] = (sig, value)
+        return sig, value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ListingCache:
+    """Cache a directory listing, revalidated by stat-ing the directories it walked.
+
+    Adding, removing or renaming an entry updates its parent directory's mtime,
+    so revalidation costs one stat per directory instead of a full walk.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Dict[str, Signature], List[str]]] = {}
+        self._lock = threading.Lock()
+        self._shared: List["SharedFiles"] = []
+        self.hits = 0
+        self.misses = 0
+
+    def attach_shared(self, shared: "SharedFiles") -> None:
+        with self._lock:
+            self._shared.append(shared)
+
+    def detach_shared(self) -> None:
+        with self._lock:
+            self._shared = []
+
+    @staticmethod
+    def _still_valid(dir_sigs: Dict[str, Signature]) -> bool:
+        for path, sig in dir_sigs.items():
+            try:
+                if stat_signature(os.stat(path)) != sig:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get(self, root: Path, build: Callable[[], Tuple[Dict[str, Signature], List[str]]]) -> List[str]:
+        """Return the cached listing for ``root`` or rebuild it with ``build``.
+
+        ``build`` returns ``(directory_signatures, listing)``.
+        """
+        key = os.fspath(root)
+        shared = _shared_for(self._shared, key)
+        if shared is not None:
+            entry = shared.get_listing(key)
+            if entry is not None and self._still_valid(entry[0]):
+                with self._lock:
+                    self.hits += 1
+                    note_cache_lookup(True)
+                return entry[1]
+            dir_sigs, listing = build()
+            with self._lock:
+                self.misses += 1
+                note_cache_lookup(False)
+            shared.put_listing(key, dir_sigs, listing)
+            return list(listing)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._still_valid(entry[0]):
+            with self._lock:
+                self.hits += 1
+                note_cache_lookup(True)
+            return list(entry[1])
+        dir_sigs, listing = build()
+        with self._lock:
+            self.misses += 1
+            note_cache_lookup(False)
+            self._entries[key] = (dir_sigs, listing)
+        return list(listing)
+
+    def lookup(self, root: Path) -> Optional[List[str]]:
+        """Return the cached listing for ``root`` if it is still valid, without building one."""
+        key = os.fspath(root)
+        shared = _shared_for(self._shared, key)
+        if shared is not None:
+            entry = shared.get_listing(key)
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+        if entry is None or not self._still_valid(entry[0]):
+            return None
+        with self._lock:
+            self.hits += 1
+            note_cache_lookup(True)
+        return list(entry[1])
+
+    def peek(self, root: Path) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(os.fspath(root))
+        return None if entry is None else list(entry[1])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
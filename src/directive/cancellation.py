@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+# Cooperative cancellation for tool executions. A worker runs a tool inside
+# ``cancel_scope(token)``; long-running code calls ``checkpoint()`` at safe
+# points (per directory walked, per chunk read, per spec parsed), which raises
+# ``Cancelled`` once the token has been cancelled, or ``DeadlineExceeded``
+# once its deadline has passed. Outside a scope (the CLI) a checkpoint is a
+# single context-variable lookup.
+
+# How often a cancellable wait re-checks its token
+_WAIT_POLL_SECONDS = 0.05
+
+
+class Interrupted(Exception):
+    """Base for the ways a checkpoint stops a request."""
+
+
+class Cancelled(Interrupted):
+    """Raised at a checkpoint when the request being served was cancelled."""
+
+
+class DeadlineExceeded(Interrupted):
+    """Raised at a checkpoint when the request being served ran past its deadline."""
+
+
+class CancelToken:
+    """Cancellation state of one request, with an optional deadline (``time.monotonic()`` seconds)."""
+
+    __slots__ = ("_event", "deadline")
+
+    def __init__(self, deadline: Optional[float] = None) -> None:
+        self._event = threading.Event()
+        self.deadline = deadline
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+_CURRENT: ContextVar[Optional[CancelToken]] = ContextVar("directive_cancel_token", default=None)
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Make ``token`` the one checked by ``checkpoint()`` in this thread (or task) for the block."""
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+def checkpoint() -> None:
+    """Raise ``Cancelled`` or ``DeadlineExceeded`` if the current request must stop."""
+    token = _CURRENT.get()
+    if token is None:
+        return
+    if token._event.is_set():
+        raise Cancelled()
+    if token.deadline is not None and time.monotonic() >= token.deadline:
+        raise DeadlineExceeded()
+
+
+def deadline_passed() -> bool:
+    """Whether the current request has run past its deadline (False outside a scope)."""
+    token = _CURRENT.get()
+    return token is not None and token.expired
+
+
+def wait_event(event: threading.Event) -> None:
+    """Wait for ``event``, giving up (as ``checkpoint()`` does) if the current request must stop first."""
+    token = _CURRENT.get()
+    if token is None:
+        event.wait()
+        return
+    while not event.wait(_WAIT_POLL_SECONDS):
+        checkpoint()
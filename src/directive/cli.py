@@ -1,12 +1,25 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import filecmp
 import json
 import os
 from pathlib import Path
 import shutil
 import sys
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
 
-from .bundles import build_template_bundle, list_directive_files, read_directive_file
+from . import codec, package_data
+from .bundles import iter_directive_files, iter_template_bundle, list_directive_files
+from .paging import DEFAULT_MAX_RESPONSE_BYTES
+from .requestlog import DEFAULT_CAPACITY as DEFAULT_LOG_BUFFER
+
+if TYPE_CHECKING:  # pragma: no cover
+    from importlib.resources.abc import Traversable
+
+
+# Upper bound on copy threads; copies are I/O bound so this exceeds the CPU count.
+_COPY_WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 def _print(msg: str) -> None:
@@ -47,37 +60,117 @@ def _ask_yes_no(question: str, default_yes: bool = True) -> bool:
         _print("Please answer 'y' or 'n'.")
 
 
-def _package_data_root() -> Path:
+def _kernel_copy_strategies() -> List[Callable[[int, int, int], int]]:
+    strategies: List[Callable[[int, int, int], int]] = []
+    if hasattr(os, "copy_file_range"):
+        strategies.append(lambda infd, outfd, count: os.copy_file_range(infd, outfd, count))  # type: ignore[attr-defined]
+    if hasattr(os, "sendfile"):
+        strategies.append(lambda infd, outfd, count: os.sendfile(outfd, infd, None, count))  # type: ignore[attr-defined]
+    return strategies
+
+
+def _copy_file_contents(src: Path, dst: Path) -> int:
+    """Copy file bytes using the fastest kernel path available.
+
+    Tries ``os.copy_file_range`` then ``os.sendfile`` and finally falls back to
+    a userspace copy. Metadata is copied afterwards to match ``shutil.copy2``.
+
+    Returns: number of bytes copied
+    """
+    size = os.stat(src).st_size
+    copied = 0
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        for kernel_copy in _kernel_copy_strategies():
+            try:
+                while copied < size:
+                    n = kernel_copy(infd, outfd, size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError:
+                # Unsupported for this filesystem pair; the next strategy resumes at the current offset
+                continue
+            if copied >= size:
+                break
+        if copied < size:
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst)
+            copied = fdst.tell()
+    shutil.copystat(src, dst)
+    return copied
+
+
+def _same_content(src: "Traversable", dst: Path) -> bool:
     try:
-        import importlib.resources as resources
-    except Exception:  # pragma: no cover
-        import importlib_resources as resources  # type: ignore
+        if isinstance(src, Path):
+            if os.stat(src).st_size != os.stat(dst).st_size:
+                return False
+            return filecmp.cmp(src, dst, shallow=False)
+        return dst.read_bytes() == src.read_bytes()
+    except OSError:
+        return False
+
 
-    # Resolve the path to packaged defaults under directive/data/
-    return Path(resources.files("directive")).joinpath("data", "directive")  # type: ignore[attr-defined]
+def _copy_file(src: "Traversable", dst: Path) -> int:
+    """Copy one file; real paths take the kernel fast path, other resources are read as bytes."""
+    if isinstance(src, Path):
+        return _copy_file_contents(src, dst)
+    data = src.read_bytes()
+    dst.write_bytes(data)
+    return len(data)
 
 
-def _copy_tree(src: Path, dst: Path, overwrite: bool = False) -> Tuple[int, int, List[str]]:
+def _copy_entries(entries: Iterable[Tuple[str, "Traversable"]], dst: Path, overwrite: bool = False) -> Tuple[int, int, List[str]]:
+    """Copy ``(relative_path, source)`` entries under ``dst``, in parallel on a thread pool.
+
+    Existing files are skipped unless ``overwrite`` is set; with ``overwrite``,
+    files whose content is already identical are left untouched. The last note
+    reports throughput for ``--verbose`` output.
+
+    Returns: (copied_count, skipped_count, notes)
+    """
+    started = time.perf_counter()
+    pending: List[Tuple["Traversable", Path]] = []
+    for rel, node in entries:
+        target = dst.joinpath(rel)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        pending.append((node, target))
+
+    def _copy_one(pair: Tuple["Traversable", Path]) -> Tuple[str, int]:
+        s, d = pair
+        if d.exists():
+            if not overwrite:
+                return "skip existing", 0
+            if _same_content(s, d):
+                return "skip identical", 0
+        return "wrote", _copy_file(s, d)
+
     copied = 0
     skipped = 0
+    total_bytes = 0
     notes: List[str] = []
-    for root, dirs, files in os.walk(src):
-        rel = Path(root).relative_to(src)
-        target_dir = dst.joinpath(rel)
-        target_dir.mkdir(parents=True, exist_ok=True)
-        for name in files:
-            s = Path(root).joinpath(name)
-            d = target_dir.joinpath(name)
-            if d.exists() and not overwrite:
+    with ThreadPoolExecutor(max_workers=min(_COPY_WORKERS, max(1, len(pending)))) as pool:
+        for (_, d), (action, nbytes) in zip(pending, pool.map(_copy_one, pending)):
+            if action == "wrote":
+                copied += 1
+                total_bytes += nbytes
+            else:
                 skipped += 1
-                notes.append(f"skip existing: {d}")
-                continue
-            shutil.copy2(s, d)
-            copied += 1
-            notes.append(f"wrote: {d}")
+            notes.append(f"{action}: {d}")
+    elapsed = time.perf_counter() - started
+    rate = total_bytes / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+    notes.append(f"throughput: {copied} files, {total_bytes} bytes in {elapsed:.3f}s ({rate:.2f} MiB/s)")
     return copied, skipped, notes
 
 
+def _copy_packaged(prefix: str, dst: Path, overwrite: bool = False) -> Tuple[int, int, List[str]]:
+    """Copy packaged defaults under ``prefix`` using the in-memory package index (no site-packages walk)."""
+    dst.mkdir(parents=True, exist_ok=True)
+    return _copy_entries(package_data.iter_packaged_files(prefix), dst, overwrite=overwrite)
+
+
 def _ensure_cursor_launcher(repo_root: Path, overwrite: bool = False) -> Tuple[int, int, List[str]]:
     """Create a repo-local launcher script and mcp.json for Cursor.
 
@@ -171,9 +264,8 @@ def _copy_cursor_templates(repo_root: Path, overwrite: bool = False) -> Tuple[in
     DEPRECATED: This function is kept for reference but no longer used by init/update.
     Use _copy_cursor_rules_only() instead.
     """
-    src = _package_data_root().joinpath("cursor")
     dst = repo_root.joinpath(".cursor")
-    return _copy_tree(src, dst, overwrite=overwrite)
+    return _copy_packaged("cursor", dst, overwrite=overwrite)
 
 
 def _copy_cursor_rules_only(repo_root: Path, overwrite: bool = False) -> Tuple[int, int, List[str]]:
@@ -184,9 +276,8 @@ def _copy_cursor_rules_only(repo_root: Path, overwrite: bool = False) -> Tuple[i
     
     Returns: (copied_count, skipped_count, notes)
     """
-    src = _package_data_root().joinpath("cursor", "rules")
     dst = repo_root.joinpath(".cursor", "rules")
-    return _copy_tree(src, dst, overwrite=overwrite)
+    return _copy_packaged("cursor/rules", dst, overwrite=overwrite)
 
 
 def cmd_init(args: argparse.Namespace) -> int:
@@ -194,8 +285,7 @@ def cmd_init(args: argparse.Namespace) -> int:
     target = repo_root.joinpath("directive")
     if not target.exists():
         target.mkdir(parents=True, exist_ok=True)
-    defaults = _package_data_root()
-    copied, skipped, notes = _copy_tree(defaults, target, overwrite=False)
+    copied, skipped, notes = _copy_packaged("", target, overwrite=False)
     _print(f"Initialized directive/ (copied {copied}, skipped {skipped})")
     if args.verbose:
         for n in notes:
@@ -277,80 +367,307 @@ def cmd_update(args: argparse.Namespace) -> int:
         _print("Update cancelled.")
         return 0
     
-    # Update directive/ maintained files
-    package_root = _package_data_root()
-    updated_count = 0
+    # Update directive/ maintained files and cursor rules; files already
+    # identical to the packaged version are left untouched
+    packaged = package_data.packaged_files()
     updated_files: List[str] = []
+    unchanged_count = 0
     
-    for rel_path in maintained_files['directive']:
-        src = package_root.joinpath(rel_path)
-        dst = target.joinpath(rel_path)
-        if src.exists():
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
-            updated_count += 1
-            updated_files.append(f"directive/{rel_path}")
-            if args.verbose:
-                _print(f"  ✓ directive/{rel_path}")
-    
-    # Update cursor rules
-    cursor_src = package_root.joinpath("cursor")
-    cursor_dst = repo_root.joinpath(".cursor")
-    
-    for rel_path in maintained_files['cursor_rules']:
-        src = cursor_src.joinpath(rel_path)
-        dst = cursor_dst.joinpath(rel_path)
-        if src.exists():
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
-            updated_count += 1
-            updated_files.append(f".cursor/{rel_path}")
-            if args.verbose:
-                _print(f"  ✓ .cursor/{rel_path}")
+    for prefix, dst_root, rel_paths in (
+        ("", target, maintained_files['directive']),
+        ("cursor/", repo_root.joinpath(".cursor"), maintained_files['cursor_rules']),
+    ):
+        entries = [(rel_path, packaged[prefix + rel_path]) for rel_path in rel_paths if prefix + rel_path in packaged]
+        _, skipped, notes = _copy_entries(entries, dst_root, overwrite=True)
+        unchanged_count += skipped
+        for note in notes[:-1]:  # the last note is throughput
+            action, _, path = note.partition(": ")
+            if action == "wrote":
+                updated_files.append(Path(path).relative_to(repo_root).as_posix())
+                if args.verbose:
+                    _print(f"  ✓ {updated_files[-1]}")
     
     # Show summary
+    updated_count = len(updated_files)
     _print(f"\nUpdated {updated_count} file{'s' if updated_count != 1 else ''}:")
     for file_path in updated_files:
         _print(f"  ✓ {file_path}")
+    if unchanged_count:
+        _print(f"{unchanged_count} file{'s' if unchanged_count != 1 else ''} already up to date.")
     
     return 0
 
 
+def _parse_prewarm(value: str) -> List[str]:
+    """Parse ``--prewarm``: ``all``, ``none``, or a comma-separated list of targets."""
+    from .bundles import PREWARM_TARGETS
+
+    value = value.strip().lower()
+    if value == "all":
+        return list(PREWARM_TARGETS)
+    if value in ("none", ""):
+        return []
+    targets = [t.strip() for t in value.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in PREWARM_TARGETS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown prewarm target(s): {', '.join(unknown)} (choose from all, none, {', '.join(PREWARM_TARGETS)})"
+        )
+    return targets
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    """Parse ``--mix`` for ``bench server`` (``name=weight,...``)."""
+    from .bench import parse_mix
+
+    try:
+        return parse_mix(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _parse_seconds(value: str) -> float:
+    """Parse a non-negative number of seconds (``0`` disables the feature)."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number of seconds: {value!r}") from None
+    if seconds < 0:
+        raise argparse.ArgumentTypeError("seconds must be >= 0")
+    return seconds
+
+
+def _parse_count(value: str) -> int:
+    """Parse a non-negative integer (``0`` disables the feature)."""
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}") from None
+    if count < 0:
+        raise argparse.ArgumentTypeError("value must be >= 0")
+    return count
+
+
+def _parse_fraction(value: str) -> float:
+    try:
+        fraction = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {value!r}") from None
+    if not 0 <= fraction <= 1:
+        raise argparse.ArgumentTypeError("rate must be between 0 and 1")
+    return fraction
+
+
+def _parse_deadlines(value: str) -> Dict[str, float]:
+    from .server import parse_deadlines
+
+    try:
+        return parse_deadlines(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+# Default idle period after which `mcp serve` drops its caches
+DEFAULT_IDLE_RELEASE = 900.0
+
+
 def cmd_mcp_serve(args: argparse.Namespace) -> int:
+    recorder = None
+    request_log = None
     try:
         # Prefer FastMCP app when available
-        from .server import _build_fastmcp_app, serve_stdio  # type: ignore
-        app = _build_fastmcp_app()
-        if app is not None:
-            app.run("stdio")
-            return 0
-        # Fallback to legacy stdio server
-        return serve_stdio(root=Path.cwd().joinpath("directive"))
+        from .bundles import enable_shared_cache
+        from .replay import TrafficRecorder
+        from .idle import IdleMonitor
+        from .requestlog import RequestLog
+        from .server import (  # type: ignore
+            DEFAULT_TOOL_DEADLINES,
+            DirectiveService,
+            _build_fastmcp_app,
+            idle_exit_handler,
+            run_fastmcp_stdio,
+            serve_stdio,
+        )
+
+        record = getattr(args, "record", None)
+        if record:
+            recorder = TrafficRecorder(Path(record))
+        if getattr(args, "shared_cache", False) and not enable_shared_cache(Path.cwd()):
+            _err("Shared cache unavailable on this platform; using per-process caches.")
+        # One service per process: both runtimes run tools through it and share the process caches
+        service = DirectiveService(
+            Path.cwd(),
+            deadlines={**DEFAULT_TOOL_DEADLINES, **(getattr(args, "deadline", None) or {})},
+            max_response_bytes=getattr(args, "max_response_bytes", None),
+        )
+        # Warm caches in the background
+        service.prewarm(getattr(args, "prewarm", []))
+        monitor = IdleMonitor(
+            release_after=getattr(args, "idle_release", None),
+            exit_after=getattr(args, "idle_exit", None),
+            on_exit=idle_exit_handler(),
+        ).start()
+        log_buffer = getattr(args, "log_buffer", DEFAULT_LOG_BUFFER)
+        log_file = getattr(args, "log_file", None)
+        if log_buffer or log_file:
+            stream = None
+            if log_file == "-":
+                stream = sys.stderr
+            elif log_file:
+                stream = open(log_file, "a", encoding="utf-8")
+            request_log = RequestLog(log_buffer, stream, getattr(args, "log_sample", 1.0)).start()
+            request_log.install_dump_signal()
+        app = _build_fastmcp_app(service)
+        try:
+            if app is not None:
+                try:
+                    run_fastmcp_stdio(app, recorder, monitor)
+                finally:
+                    service.report_coalescing()
+                return 0
+            # Fallback to legacy stdio server
+            return serve_stdio(recorder=recorder, service=service, monitor=monitor)
+        finally:
+            monitor.stop()
+            if request_log is not None:
+                request_log.stop()
     except Exception as exc:  # pragma: no cover
         _err("Failed to start Directive MCP server.")
         _err(str(exc))
         return 1
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def cmd_mcp_replay(args: argparse.Namespace) -> int:
+    """Replay a recorded MCP session against a fresh server and report per-request latency and sizes."""
+    import shlex
+
+    from .replay import compare_reports, replay_recording
+
+    try:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+        report = replay_recording(
+            Path(args.recording),
+            Path.cwd(),
+            runtime=args.runtime,
+            speed=args.speed,
+            command=shlex.split(args.server_cmd) if args.server_cmd else None,
+        )
+    except (ValueError, OSError, TimeoutError) as e:
+        _err(f"Replay failed: {e}")
+        return 1
+    if args.output:
+        Path(args.output).write_text(codec.dumps_pretty(report) + "\n", encoding="utf-8")
+    summary = {k: v for k, v in report.items() if k != "detail"}
+    if baseline is not None:
+        summary["comparison"] = compare_reports(baseline, report)
+    _print(codec.dumps_pretty(summary))
+    return 0
+
+
+def _write_ndjson(record: Dict) -> None:
+    # One compact JSON document per line; flushing is left to the stream's buffering
+    sys.stdout.write(codec.dumps_str(record) + "\n")
+
+
+def _print_available_templates() -> None:
+    # Helpful list of available templates
+    try:
+        files = list_directive_files(Path.cwd())
+        available = [f for f in files if "templates" in Path(f).parts]
+    except Exception:
+        available = []
+    _err("Available templates:")
+    for p in available:
+        _err(f" - {p}")
+    _err("Suggestion: run 'directive update' to restore defaults.")
 
 
 def cmd_bundle(args: argparse.Namespace) -> int:
     template_name = args.template
+    fmt = getattr(args, "format", "json")
+    sections = iter_template_bundle(template_name=template_name, repo_root=Path.cwd())
     try:
-        bundle = build_template_bundle(template_name=template_name, repo_root=Path.cwd())
+        if fmt == "ndjson":
+            # Stream one record per section as soon as it has been read
+            for section, value in sections:
+                if isinstance(value, dict):
+                    _write_ndjson({"section": section, **value})
+                else:
+                    _write_ndjson({"section": section, section: value})
+                sys.stdout.flush()
+            return 0
+        bundle = dict(sections)
     except FileNotFoundError as e:
         _err(str(e))
-        # Helpful list of available templates
-        try:
-            files = list_directive_files(Path.cwd())
-            available = [f for f in files if "templates" in Path(f).parts]
-        except Exception:
-            available = []
-        _err("Available templates:")
-        for p in available:
-            _err(f" - {p}")
-        _err("Suggestion: run 'directive update' to restore defaults.")
+        _print_available_templates()
         return 1
+    except BrokenPipeError:  # pragma: no cover - downstream consumer closed early
+        return 0
 
-    _print(json.dumps(bundle, indent=2))
+    _print(codec.dumps_pretty(bundle))
+    return 0
+
+
+def cmd_ls(args: argparse.Namespace) -> int:
+    """Stream the directive/ listing, one path (or NDJSON record) per line."""
+    fmt = getattr(args, "format", "text")
+    rev = getattr(args, "rev", None)
+    try:
+        paths = list_directive_files(Path.cwd(), rev=rev) if rev else iter_directive_files(Path.cwd())
+        for path in paths:
+            if fmt == "ndjson":
+                _write_ndjson({"path": path})
+            else:
+                sys.stdout.write(path + "\n")
+        sys.stdout.flush()
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        _err(str(e))
+        return 1
+    except BrokenPipeError:  # pragma: no cover - downstream consumer closed early
+        return 0
+    return 0
+
+
+def cmd_bench_server(args: argparse.Namespace) -> int:
+    """Start one MCP server in the current repo, drive it with a request mix and print latency stats as JSON."""
+    from .bench import run_server_bench
+
+    try:
+        report = run_server_bench(
+            Path.cwd(),
+            runtime=args.runtime,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            mix=args.mix,
+            warmup=args.warmup,
+            path=args.path,
+        )
+    except (ValueError, OSError, TimeoutError) as e:
+        _err(f"Benchmark failed: {e}")
+        return 1
+    _print(codec.dumps_pretty(report))
+    return 0
+
+
+def cmd_new(args: argparse.Namespace) -> int:
+    """Scaffold directive/specs/YYYYMMDD-<name>/ with spec, impact and TDR documents."""
+    from .specs import create_spec
+
+    name = " ".join(args.name)
+    try:
+        created = create_spec(Path.cwd(), name)
+    except FileNotFoundError as e:
+        _err(str(e))
+        return 1
+    except ValueError as e:
+        _err(f"Invalid spec name: {e}")
+        return 1
+    _print(f"Created {created['path']}/ (Spec ID {created['specId']})")
+    for path in created["files"]:
+        _print(f"  ✓ {path}")
     return 0
 
 
@@ -369,12 +686,106 @@ def build_parser() -> argparse.ArgumentParser:
     p_serve = sub.add_parser("mcp", help="MCP related commands")
     sub_mcp = p_serve.add_subparsers(dest="mcp_command", required=True)
     p_serve_stdio = sub_mcp.add_parser("serve", help="Start MCP server over stdio in current repo")
+    p_serve_stdio.add_argument(
+        "--prewarm",
+        type=_parse_prewarm,
+        default="all",
+        metavar="TARGETS",
+        help="Caches to warm in the background at startup: all (default), none, or a comma list of reference,templates,listing,specs",
+    )
+    p_serve_stdio.add_argument(
+        "--shared-cache",
+        action="store_true",
+        help="Share cached file contents and listings with other servers on this host via a memory-mapped segment under .directive/cache/",
+    )
+    p_serve_stdio.add_argument("--record", metavar="FILE", help="Record incoming requests with timestamps to FILE (NDJSON) for 'directive mcp replay'")
+    p_serve_stdio.add_argument(
+        "--idle-release",
+        type=_parse_seconds,
+        default=DEFAULT_IDLE_RELEASE,
+        metavar="SECONDS",
+        help="Drop cached state after this long without requests; it is rebuilt on the next request (default: 900, 0 disables)",
+    )
+    p_serve_stdio.add_argument(
+        "--idle-exit",
+        type=_parse_seconds,
+        default=0.0,
+        metavar="SECONDS",
+        help="Exit after this long without requests (default: 0, never)",
+    )
+    p_serve_stdio.add_argument(
+        "--deadline",
+        type=_parse_deadlines,
+        metavar="TOOL=SECONDS,...",
+        help="Per-tool time budgets, e.g. files.list=5,*=60 ('*' covers other tools, 0 disables; default: *=30)",
+    )
+    p_serve_stdio.add_argument(
+        "--max-response-bytes",
+        type=_parse_count,
+        default=DEFAULT_MAX_RESPONSE_BYTES,
+        metavar="BYTES",
+        help="Largest tool result to send; bigger ones are returned in pages with a continuation cursor (default: 1048576, 0 disables)",
+    )
+    p_serve_stdio.add_argument(
+        "--log-buffer",
+        type=_parse_count,
+        default=DEFAULT_LOG_BUFFER,
+        metavar="N",
+        help="Keep the last N tool calls in memory for the directive/server.log tool and SIGUSR1 dumps to stderr (default: 1000, 0 disables)",
+    )
+    p_serve_stdio.add_argument(
+        "--log-file",
+        metavar="FILE",
+        help="Also append each tool call record to FILE as a JSON line ('-' for stderr)",
+    )
+    p_serve_stdio.add_argument(
+        "--log-sample",
+        type=_parse_fraction,
+        default=1.0,
+        metavar="RATE",
+        help="Fraction of tool calls written to --log-file (default: 1)",
+    )
     p_serve_stdio.set_defaults(func=cmd_mcp_serve)
+    p_replay = sub_mcp.add_parser("replay", help="Replay a recorded session against a fresh server and report latency and response sizes")
+    p_replay.add_argument("recording", help="Recording written by 'directive mcp serve --record'")
+    p_replay.add_argument("--speed", type=float, default=1.0, help="Pace multiplier (2 = twice as fast; 0 = back to back). Default: 1")
+    p_replay.add_argument("--runtime", choices=["legacy", "fastmcp"], default="legacy", help="Server runtime / wire format (default: legacy)")
+    p_replay.add_argument("--server-cmd", metavar="CMD", help="Command that starts the server to replay against (e.g. another build); must speak the --runtime wire format")
+    p_replay.add_argument("--output", metavar="FILE", help="Write the full report, including per-request detail, to FILE")
+    p_replay.add_argument("--compare", metavar="FILE", help="Baseline report (from --output) to diff latency and response sizes against")
+    p_replay.set_defaults(func=cmd_mcp_replay)
 
     p_bundle = sub.add_parser("bundle", help="Print a template bundle (for testing)")
     p_bundle.add_argument("template", choices=["spec_template.md", "impact_template.md", "tdr_template.md"], help="Template file name")
+    p_bundle.add_argument("--format", choices=["json", "ndjson"], default="json", help="Output format (ndjson streams one record per section)")
     p_bundle.set_defaults(func=cmd_bundle)
 
+    p_new = sub.add_parser("new", help="Create directive/specs/YYYYMMDD-<name>/ with spec, impact and TDR from templates")
+    p_new.add_argument("name", nargs="+", help="Feature name (e.g., selective update)")
+    p_new.set_defaults(func=cmd_new)
+
+    p_ls = sub.add_parser("ls", help="List files under directive/ (streamed)")
+    p_ls.add_argument("--format", choices=["text", "ndjson"], default="text", help="Output format")
+    p_ls.add_argument("--rev", help="List directive/ as of a git revision instead of the working tree")
+    p_ls.set_defaults(func=cmd_ls)
+
+    p_bench = sub.add_parser("bench", help="Benchmark Directive components")
+    sub_bench = p_bench.add_subparsers(dest="bench_command", required=True)
+    p_bench_server = sub_bench.add_parser("server", help="Load-test the MCP server in the current repo and report req/s and latency percentiles")
+    p_bench_server.add_argument("--runtime", choices=["legacy", "fastmcp"], default="legacy", help="Server runtime to start (default: legacy)")
+    p_bench_server.add_argument("--requests", type=int, default=1000, help="Measured requests (default: 1000)")
+    p_bench_server.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests (default: 8)")
+    p_bench_server.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first (default: 20)")
+    p_bench_server.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=None,
+        metavar="MIX",
+        help="Weighted request mix, e.g. tools/list=1,files.get=2,templates.spec=1 (default: tools/list, files.list, files.get x2, templates.*)",
+    )
+    p_bench_server.add_argument("--path", default="directive/reference/agent_context.md", help="File requested by files.get")
+    p_bench_server.set_defaults(func=cmd_bench_server)
+
     return parser
 
 
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# JSON encoding for the server and CLI. orjson or msgspec are used when
+# installed (neither is a dependency); the stdlib is always available. All
+# codecs emit compact UTF-8 JSON without ASCII escaping, so the bytes on the
+# wire do not depend on which one is active. Set DIRECTIVE_JSON_CODEC to
+# "stdlib", "orjson" or "msgspec" to force a choice.
+
+CODEC_ENV = "DIRECTIVE_JSON_CODEC"
+CODEC_PREFERENCE = ("orjson", "msgspec", "stdlib")
+
+# Raised by the fast encoders for values they do not support (e.g. integers
+# wider than 64 bits); such payloads fall back to the stdlib encoder.
+_UNSUPPORTED = (TypeError, ValueError, OverflowError)
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    dumps: Callable[[Any, bool], bytes]
+    loads: Callable[[Union[bytes, str]], Any]
+    dumps_pretty: Callable[[Any], str]
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+def _stdlib_pretty(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def _stdlib_codec() -> Codec:
+    return Codec("stdlib", _stdlib_dumps, json.loads, _stdlib_pretty)
+
+
+def _orjson_codec() -> Codec:
+    import orjson  # type: ignore
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except _UNSUPPORTED:
+            return _stdlib_dumps(obj, sort_keys)
+
+    def dumps_pretty(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except _UNSUPPORTED:
+            return _stdlib_pretty(obj)
+
+    # orjson.JSONDecodeError subclasses ValueError, like the stdlib's
+    return Codec("orjson", dumps, orjson.loads, dumps_pretty)
+
+
+def _msgspec_codec() -> Codec:
+    import msgspec  # type: ignore
+
+    encoder = msgspec.json.Encoder()
+    sorted_encoder = msgspec.json.Encoder(order="sorted")
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        try:
+            return (sorted_encoder if sort_keys else encoder).encode(obj)
+        except _UNSUPPORTED:
+            return _stdlib_dumps(obj, sort_keys)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumps_pretty(obj: Any) -> str:
+        return msgspec.json.format(dumps(obj), indent=2).decode("utf-8")
+
+    return Codec("msgspec", dumps, loads, dumps_pretty)
+
+
+_FACTORIES: Dict[str, Callable[[], Codec]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "stdlib": _stdlib_codec,
+}
+
+
+def available_codecs() -> List[str]:
+    """Return the names of the codecs importable in this environment, fastest first."""
+    names = []
+    for name in CODEC_PREFERENCE:
+        try:
+            _FACTORIES[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """Return the named codec, or the fastest available one when ``name`` is None.
+
+    Raises: ValueError for unknown names, ImportError when the library is missing
+    """
+    if name is not None:
+        if name not in _FACTORIES:
+            raise ValueError(f"Unknown JSON codec: {name} (choose from: {', '.join(CODEC_PREFERENCE)})")
+        return _FACTORIES[name]()
+    for candidate in CODEC_PREFERENCE:
+        try:
+            return _FACTORIES[candidate]()
+        except ImportError:
+            continue
+    return _stdlib_codec()  # pragma: no cover - stdlib is last in the preference list
+
+
+def _select_codec() -> Codec:
+    requested = os.environ.get(CODEC_ENV, "").strip().lower() or None
+    try:
+        return get_codec(requested)
+    except (ValueError, ImportError):
+        return get_codec()
+
+
+_ACTIVE = _select_codec()
+
+
+def codec_name() -> str:
+    return _ACTIVE.name
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode ``obj`` as compact UTF-8 JSON bytes."""
+    return _ACTIVE.dumps(obj, sort_keys)
+
+
+def dumps_str(obj: Any, sort_keys: bool = False) -> str:
+    return _ACTIVE.dumps(obj, sort_keys).decode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> str:
+    """Encode ``obj`` with two-space indentation for human-facing output."""
+    return _ACTIVE.dumps_pretty(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes or text; malformed input raises ValueError."""
+    return _ACTIVE.loads(data)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cancellation import checkpoint
+from .ignore import IGNORE_FILENAME, IgnoreRules
+from .requestlog import note_cache_lookup
+
+
+# Reads of directive/ at a git revision. Objects are fetched through one
+# long-lived `git cat-file --batch-command` process per repository (git >= 2.36),
+# and everything derived from an object is cached by its SHA: object IDs are
+# content hashes, so a cached blob or tree listing can never go stale. Only
+# resolving ``<rev>:<path>`` to an ID is repeated, since branch names move.
+
+_TREE_MODE = b"40000"
+# Blob contents kept per process, by total size
+_BLOB_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class GitError(RuntimeError):
+    pass
+
+
+class _ObjectCache:
+    """LRU of values keyed by object ID, bounded by total size."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, oid: str, build: Callable[[], Tuple[int, Any]]) -> Any:
+        with self._lock:
+            entry = self._entries.get(oid)
+            if entry is not None:
+                self._entries.move_to_end(oid)
+                self.hits += 1
+                note_cache_lookup(True)
+                return entry[1]
+            self.misses += 1
+            note_cache_lookup(False)
+        size, value = build()
+        with self._lock:
+            if oid not in self._entries:
+                self._entries[oid] = (size, value)
+                self._size += size
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    _, (old_size, _) = self._entries.popitem(last=False)
+                    self._size -= old_size
+        return value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def validate_rev(rev: str) -> str:
+    """Reject revisions that could break the batch protocol or be read as options."""
+    if not rev or rev.startswith("-") or any(c.isspace() for c in rev) or ":" in rev:
+        raise ValueError(f"Invalid git revision: {rev!r}")
+    return rev
+
+
+class GitObjects:
+    """Object access for one repository through a persistent ``git cat-file --batch-command``."""
+
+    def __init__(self, repo_root: Path) -> None:
+        self.repo_root = repo_root
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self.blobs = _ObjectCache(_BLOB_CACHE_BYTES)
+        # Values derived from an object (tree listings, heading indexes), keyed "<kind>:<oid>"
+        self.derived = _ObjectCache(_BLOB_CACHE_BYTES)
+        self.commands = 0
+
+    def _process(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            try:
+                self._proc = subprocess.Popen(
+                    ["git", "cat-file", "--batch-command"],
+                    cwd=str(self.repo_root),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            except FileNotFoundError as e:
+                raise GitError("git is not installed") from e
+        return self._proc
+
+    def _command(self, command: str, with_contents: bool) -> Optional[Tuple[str, str, bytes]]:
+        # Called with self._lock held. Returns (oid, type, contents) or None when missing.
+        proc = self._process()
+        assert proc.stdin is not None and proc.stdout is not None
+        self.commands += 1
+        try:
+            proc.stdin.write(command.encode("utf-8") + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline()
+        except (BrokenPipeError, OSError) as e:
+            raise GitError(f"git cat-file failed: {e}") from e
+        if not header:
+            raise GitError(f"Not a git repository (or git < 2.36): {self.repo_root}")
+        parts = header.decode("utf-8", errors="replace").split()
+        if len(parts) != 3 or parts[-1] in ("missing", "ambiguous"):
+            return None
+        oid, kind, size = parts[0], parts[1], int(parts[2])
+        data = b""
+        if with_contents:
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing newline
+        return oid, kind, data
+
+    def resolve(self, rev: str, path: str) -> Optional[Tuple[str, str]]:
+        """Resolve ``<rev>:./<path>`` (relative to the repository root) to ``(oid, type)``."""
+        with self._lock:
+            found = self._command(f"info {validate_rev(rev)}:./{path}", with_contents=False)
+        return None if found is None else (found[0], found[1])
+
+    def resolve_commit(self, rev: str) -> Optional[str]:
+        with self._lock:
+            found = self._command(f"info {validate_rev(rev)}^{{commit}}", with_contents=False)
+        return None if found is None else found[0]
+
+    def read_object(self, oid: str) -> bytes:
+        def _build() -> Tuple[int, bytes]:
+            with self._lock:
+                found = self._command(f"contents {oid}", with_contents=True)
+            if found is None:
+                raise GitError(f"Object disappeared: {oid}")
+            return len(found[2]), found[2]
+
+        return self.blobs.get(oid, _build)
+
+    def list_tree(self, tree_oid: str) -> List[str]:
+        """Return blob paths under a tree in git's sorted order, honouring a .directiveignore in the tree."""
+
+        def _build() -> Tuple[int, List[str]]:
+            entries = self._tree_entries(tree_oid)
+            rules = IgnoreRules([])
+            for name, is_tree, oid in entries:
+                if name == IGNORE_FILENAME and not is_tree:
+                    rules = IgnoreRules(self.read_object(oid).decode("utf-8", errors="replace").splitlines())
+            paths: List[str] = []
+            self._walk(entries, "", rules, paths)
+            return sum(len(p) for p in paths), paths
+
+        return list(self.derived.get(f"listing:{tree_oid}", _build))
+
+    def _tree_entries(self, tree_oid: str) -> List[Tuple[str, bool, str]]:
+        data = self.read_object(tree_oid)
+        oid_len = len(tree_oid) // 2
+        entries: List[Tuple[str, bool, str]] = []
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            mode = data[pos:space]
+            name = data[space + 1:nul].decode("utf-8", errors="surrogateescape")
+            oid = data[nul + 1:nul + 1 + oid_len].hex()
+            pos = nul + 1 + oid_len
+            # Regular and executable files only; symlinks and submodules are skipped
+            if mode == _TREE_MODE:
+                entries.append((name, True, oid))
+            elif mode.startswith(b"100"):
+                entries.append((name, False, oid))
+        return entries
+
+    def _walk(self, entries: List[Tuple[str, bool, str]], prefix: str, rules: IgnoreRules, out: List[str]) -> None:
+        # Git orders tree entries with directories compared as "name/", matching the working-tree walk
+        for name, is_tree, oid in entries:
+            rel = prefix + name
+            if rules and rules.is_ignored(rel, is_tree):
+                continue
+            if is_tree:
+                checkpoint()
+                self._walk(self._tree_entries(oid), rel + "/", rules, out)
+            else:
+                out.append(rel)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc is not None:
+                try:
+                    self._proc.stdin.close()  # type: ignore[union-attr]
+                    self._proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proc.kill()
+                self._proc = None
+
+
+def _run_git(repo_root: Path, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(["git", *args], cwd=str(repo_root), capture_output=True)
+    except FileNotFoundError as e:
+        raise GitError("git is not installed") from e
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode("utf-8", errors="replace").strip() or f"git {args[0]} failed")
+    return proc.stdout
+
+
+def changed_paths(repo_root: Path, since: str, pathspec: str) -> List[Tuple[str, str]]:
+    """Return ``(status, path)`` for files under ``pathspec`` that differ between ``since`` and the working tree.
+
+    Status is git's letter (``A``, ``M``, ``D``, ``T``); untracked files are
+    reported as ``A``. Paths are relative to ``repo_root``. Git compares tree
+    IDs and skips identical subtrees, so the cost follows the size of the
+    change rather than of the tree.
+
+    Raises: ValueError for revisions git cannot resolve, GitError outside a repository
+    """
+    if get_git_objects(repo_root).resolve_commit(since) is None:
+        raise ValueError(f"Unknown git revision: {since}")
+    diff = _run_git(repo_root, "diff", "--name-status", "--no-renames", "--relative", "-z", since, "--", pathspec)
+    fields = diff.decode("utf-8", errors="surrogateescape").split("\0")
+    changes = [(fields[i][:1], fields[i + 1]) for i in range(0, len(fields) - 1, 2)]
+    untracked = _run_git(repo_root, "ls-files", "-z", "--others", "--exclude-standard", "--", pathspec)
+    changes.extend(("A", path) for path in untracked.decode("utf-8", errors="surrogateescape").split("\0") if path)
+    return changes
+
+
+_REPOS: Dict[str, GitObjects] = {}
+_REPOS_LOCK = threading.Lock()
+
+
+def get_git_objects(repo_root: Path) -> GitObjects:
+    """Return the process-wide object reader for a repository."""
+    key = os.fspath(repo_root.resolve())
+    with _REPOS_LOCK:
+        objects = _REPOS.get(key)
+        if objects is None:
+            objects = _REPOS[key] = GitObjects(Path(key))
+        return objects
+
+
+def close_git_objects() -> None:
+    with _REPOS_LOCK:
+        repos = list(_REPOS.values())
+        _REPOS.clear()
+    for objects in repos:
+        objects.close()
+
+
+def git_objects_count() -> int:
+    with _REPOS_LOCK:
+        return len(_REPOS)
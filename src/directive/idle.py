@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# Idle handling for long-running servers. Editor windows that are closed or
+# forgotten leave their server running; once no request has arrived for
+# ``release_after`` seconds the process drops its caches (rebuilt lazily by
+# the next request), and after ``exit_after`` seconds it exits. Time spent
+# with a request in flight never counts as idle.
+
+_PROCESS_STARTED = time.monotonic()
+
+
+def _malloc_trim() -> None:
+    # glibc keeps freed arenas mapped; hand them back to the OS after a release
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def release_memory() -> None:
+    """Drop the process caches and return freed memory to the OS where possible."""
+    from .bundles import release_caches
+
+    release_caches()
+    gc.collect()
+    _malloc_trim()
+
+
+def memory_usage() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size in bytes (None where the platform does not report it)."""
+    rss: Optional[int] = None
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            rss = int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    peak: Optional[int] = None
+    try:
+        import resource
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+    except (ImportError, OSError):
+        pass
+    return {"rssBytes": rss, "peakRssBytes": peak}
+
+
+class IdleMonitor:
+    """Watch request activity and release state, then exit, after configured idle periods.
+
+    Servers call ``begin()``/``end()`` around each request and ``touch()`` for
+    notifications. ``None`` or ``0`` disables a stage.
+    """
+
+    def __init__(
+        self,
+        release_after: Optional[float] = None,
+        exit_after: Optional[float] = None,
+        on_release: Callable[[], None] = release_memory,
+        on_exit: Optional[Callable[[], None]] = None,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if (release_after or 0) < 0 or (exit_after or 0) < 0:
+            raise ValueError("idle timeouts must be >= 0")
+        if exit_after and on_exit is None:
+            raise ValueError("exit_after requires an on_exit callback")
+        self.release_after = release_after or None
+        self.exit_after = exit_after or None
+        self.on_release = on_release
+        self.on_exit = on_exit
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Held while a release or exit is decided and run; begin() waits on it
+        self._gate = threading.Lock()
+        self._in_flight = 0
+        self._last_activity = clock()
+        # Length of the idle period the latest request ended (what a status call reports as "was idle")
+        self._previous_idle = 0.0
+        self.released = False
+        self.releases = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> None:
+        with self._gate, self._lock:
+            now = self._clock()
+            if not self._in_flight:
+                self._previous_idle = max(0.0, now - self._last_activity)
+            self._in_flight += 1
+            self._last_activity = now
+            self.released = False
+
+    def end(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._last_activity = self._clock()
+
+    def touch(self) -> None:
+        with self._lock:
+            self._last_activity = self._clock()
+
+    def idle_seconds(self) -> float:
+        with self._lock:
+            return 0.0 if self._in_flight else max(0.0, self._clock() - self._last_activity)
+
+    def check(self) -> Optional[str]:
+        """Run whichever stage is due; returns ``"release"``, ``"exit"`` or None.
+
+        Requests that begin meanwhile wait until the stage has run, so none is
+        cut off by an exit or has caches released under it.
+        """
+        with self._gate:
+            with self._lock:
+                idle = 0.0 if self._in_flight else max(0.0, self._clock() - self._last_activity)
+                if self.exit_after is not None and idle >= self.exit_after:
+                    stage = "exit"
+                elif self.release_after is not None and idle >= self.release_after and not self.released:
+                    self.released = True
+                    self.releases += 1
+                    stage = "release"
+                else:
+                    return None
+            if stage == "exit":
+                self.on_exit()  # type: ignore[misc]
+            else:
+                self.on_release()
+            return stage
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            if self.check() == "exit":
+                return
+
+    def start(self) -> "IdleMonitor":
+        """Start polling in a daemon thread and register as the process monitor reported by ``server_status``."""
+        global _ACTIVE
+        _ACTIVE = self
+        if self.release_after is not None or self.exit_after is not None:
+            self._thread = threading.Thread(target=self._loop, name="directive-idle", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        global _ACTIVE
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if _ACTIVE is self:
+            _ACTIVE = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self._in_flight
+            idle = 0.0 if in_flight else max(0.0, self._clock() - self._last_activity)
+            return {
+                "idleSeconds": round(idle, 3),
+                "previousIdleSeconds": round(self._previous_idle, 3),
+                "inFlight": in_flight,
+                "released": self.released,
+                "releases": self.releases,
+                "releaseAfter": self.release_after,
+                "exitAfter": self.exit_after,
+            }
+
+
+_ACTIVE: Optional[IdleMonitor] = None
+
+
+def active_monitor() -> Optional[IdleMonitor]:
+    return _ACTIVE
+
+
+def server_status() -> Dict[str, Any]:
+    """Process, idle and memory state of the running server."""
+    from .bundles import cache_stats
+
+    monitor = _ACTIVE
+    return {
+        "pid": os.getpid(),
+        "uptimeSeconds": round(time.monotonic() - _PROCESS_STARTED, 3),
+        "idle": monitor.status() if monitor is not None else None,
+        "memory": memory_usage(),
+        "caches": cache_stats(),
+    }
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+IGNORE_FILENAME = ".directiveignore"
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) to a regex fragment."""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                at_end = i + 2 == n or pattern[i + 2] == "/"
+                if at_start and at_end:
+                    if i + 2 == n:
+                        out.append(".*")  # trailing "/**": everything inside
+                        i += 2
+                    else:
+                        out.append("(?:.*/)?")  # "**/": zero or more directories
+                        i += 3
+                    continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            start = i + 1
+            if start < n and pattern[start] == "!":
+                start += 1
+            if start < n and pattern[start] == "]":
+                start += 1
+            j = pattern.find("]", start)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _compile(line: str) -> Optional[Tuple[Pattern[str], bool, bool]]:
+    """Compile one .directiveignore line to ``(regex, negated, directories_only)``."""
+    if not line.strip() or line.startswith("#"):
+        return None
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip()
+    if stripped.endswith("\\") and len(line) > len(stripped):
+        stripped += " "
+    negated = stripped.startswith("!")
+    if negated:
+        stripped = stripped[1:]
+    elif stripped.startswith("\\!") or stripped.startswith("\\#"):
+        stripped = stripped[1:]
+    dir_only = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    if not stripped:
+        return None
+    # A slash at the start or middle anchors the pattern to the directive/ root
+    anchored = "/" in stripped
+    body = _translate_glob(stripped.lstrip("/"))
+    regex = ("^" if anchored else "^(?:.*/)?") + body + "$"
+    return re.compile(regex), negated, dir_only
+
+
+class IgnoreRules:
+    """Gitignore-style rules matched against POSIX paths relative to directive/.
+
+    The last matching pattern wins, so ``!pattern`` re-includes a path. As in
+    git, a path inside an ignored directory cannot be re-included because the
+    directory is never descended into.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self._rules = [rule for rule in (_compile(p) for p in patterns) if rule is not None]
+
+    @classmethod
+    def from_file(cls, path: Path) -> "IgnoreRules":
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (FileNotFoundError, NotADirectoryError):
+            return cls()
+        return cls(text.splitlines())
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        ignored = False
+        for regex, negated, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negated
+        return ignored
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+
+_ATX_HEADING = re.compile(rb"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*\r?$")
+_FENCE = re.compile(rb"^ {0,3}(`{3,}|~{3,})")
+_NUMBERING = re.compile(r"^\d+(?:\.\d+)*\.?\s+")
+
+
+@dataclass(frozen=True)
+class Heading:
+    """An ATX heading and the byte range of its section (heading line through its last subsection)."""
+
+    level: int
+    title: str
+    start: int
+    end: int
+
+
+def build_heading_index(data: bytes) -> List[Heading]:
+    """Index ATX headings in ``data`` with byte offsets, ignoring fenced code blocks."""
+    found: List[Tuple[int, str, int]] = []
+    fence: bytes = b""
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        stripped = line.rstrip(b"\n")
+        fence_match = _FENCE.match(stripped)
+        if fence:
+            if fence_match and fence_match.group(1)[:1] == fence[:1] and len(fence_match.group(1)) >= len(fence):
+                fence = b""
+        elif fence_match:
+            fence = fence_match.group(1)
+        else:
+            m = _ATX_HEADING.match(stripped)
+            if m:
+                title = (m.group(2) or b"").decode("utf-8", errors="replace").strip()
+                found.append((len(m.group(1)), title, offset))
+        offset += len(line)
+
+    headings: List[Heading] = []
+    for i, (level, title, start) in enumerate(found):
+        end = len(data)
+        for next_level, _, next_start in found[i + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        headings.append(Heading(level=level, title=title, start=start, end=end))
+    return headings
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, collapse whitespace and drop leading numbering such as ``9.``."""
+    return " ".join(_NUMBERING.sub("", title.strip()).lower().split())
+
+
+def match_headings(index: Sequence[Heading], query: str) -> List[Heading]:
+    """Return headings whose title matches ``query``.
+
+    Exact (normalized) matches win; otherwise headings whose title starts with
+    the query as whole words match, so ``Rollout`` finds ``9. Rollout & Migration``.
+    """
+    wanted = normalize_title(query)
+    if not wanted:
+        return []
+    exact = [h for h in index if normalize_title(h.title) == wanted]
+    if exact:
+        return exact
+    return [h for h in index if normalize_title(h.title).startswith(wanted + " ")]
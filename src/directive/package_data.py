@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, Tuple
+
+try:
+    import importlib.resources as resources
+except Exception:  # pragma: no cover
+    import importlib_resources as resources  # type: ignore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from importlib.resources.abc import Traversable
+
+
+# Packaged defaults live under directive/data/directive/ and are read through the
+# Traversable API so they work from zipped wheels and zipapps as well as from
+# regular site-packages installs. The index below is built once per process.
+
+
+def package_data_root() -> "Traversable":
+    return resources.files("directive").joinpath("data", "directive")
+
+
+def walk_files(node: "Traversable", prefix: str = "") -> Iterator[Tuple[str, "Traversable"]]:
+    """Yield ``(relative_path, node)`` for every file under ``node``, in sorted order."""
+    for child in sorted(node.iterdir(), key=lambda c: c.name):
+        rel = f"{prefix}{child.name}"
+        if child.is_dir():
+            yield from walk_files(child, rel + "/")
+        elif child.is_file():
+            yield rel, child
+
+
+@lru_cache(maxsize=None)
+def packaged_files() -> Dict[str, "Traversable"]:
+    """Return an index of packaged default files keyed by POSIX path relative to the data root."""
+    return dict(walk_files(package_data_root()))
+
+
+def iter_packaged_files(prefix: str = "") -> Iterator[Tuple[str, "Traversable"]]:
+    """Yield ``(relative_path, node)`` for packaged files under ``prefix``.
+
+    Paths are relative to ``prefix`` so callers can mirror the subtree elsewhere.
+    """
+    base = prefix.strip("/")
+    head = f"{base}/" if base else ""
+    for rel, node in packaged_files().items():
+        if rel.startswith(head):
+            yield rel[len(head):], node
+
+
+@lru_cache(maxsize=None)
+def read_packaged_bytes(rel_path: str) -> bytes:
+    node = packaged_files().get(rel_path.strip("/"))
+    if node is None:
+        raise FileNotFoundError(f"Packaged default not found: {rel_path}")
+    return node.read_bytes()
+
+
+def read_packaged_text(rel_path: str) -> str:
+    return read_packaged_bytes(rel_path).decode("utf-8")
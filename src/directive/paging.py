@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import re
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import codec
+
+
+# Response size governor for tool payloads. A payload whose JSON encoding is
+# over the limit keeps everything but its one long field — a file's content,
+# a listing, a list of sections or specs — and that field is cut at a natural
+# boundary (a line, an entry) and returned with ``truncated: true`` and a
+# ``cursor``. Calling the tool again with the cursor rebuilds the payload
+# (from the process caches) and returns the next page. Cursors carry a
+# version of the full field, so a page never silently continues a result
+# that changed in between. Sizes are computed from the values rather than by
+# encoding them, and fields served from the caches are versioned by the cache
+# state they came from, so neither costs a pass over the whole result.
+
+# Default limit on the encoded size of one tool payload
+DEFAULT_MAX_RESPONSE_BYTES = 1 << 20
+
+# Room kept for the "truncated" and "cursor" members themselves
+_CURSOR_OVERHEAD = 64
+
+# Characters every codec escapes as \u00XX (\b \t \n \f \r get two-byte escapes)
+_LONG_ESCAPES = re.compile(r"[\x00-\x07\x0b\x0e-\x1f]")
+_SHORT_ESCAPES = ("\b", "\t", "\n", "\f", "\r")
+
+
+def _string_sizes(text: str) -> Tuple[int, int]:
+    # Bytes of the encoded string between its quotes, and how many of them are " or \
+    size = len(text) if text.isascii() else len(text.encode("utf-8"))
+    quotes = text.count('"')
+    backslashes = text.count("\\")
+    short = sum(text.count(c) for c in _SHORT_ESCAPES)
+    long = len(_LONG_ESCAPES.findall(text))
+    return size + quotes + backslashes + short + 5 * long, 2 * quotes + 2 * backslashes + short + long
+
+
+def _sizes(value: Any) -> Tuple[int, int]:
+    # Encoded size of ``value`` and how many of its bytes are " or \
+    if isinstance(value, str):
+        size, special = _string_sizes(value)
+        return size + 2, special + 2
+    if isinstance(value, (list, tuple)):
+        try:
+            # Strings only (a listing): measure them as one
+            size, special = _string_sizes("".join(value))
+            return size + 3 * len(value) + 1 + (not value), special + 2 * len(value)
+        except TypeError:
+            pass
+        size, special = 2 + max(len(value) - 1, 0), 0
+        for item in value:
+            item_size, item_special = _sizes(item)
+            size += item_size
+            special += item_special
+        return size, special
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        size, special = 2 + max(len(value) - 1, 0), 0
+        for key, item in value.items():
+            key_size, key_special = _string_sizes(key)
+            item_size, item_special = _sizes(item)
+            size += key_size + 3 + item_size
+            special += key_special + 2 + item_special
+        return size, special
+    data = codec.dumps(value)  # numbers, booleans, null
+    return len(data), data.count(b'"') + data.count(b"\\")
+
+
+def encoded_sizes(value: Any) -> Tuple[int, int]:
+    """Size of the JSON encoding of ``value``, and of that encoding itself encoded as a JSON string.
+
+    Computed without encoding, so measuring a result costs no codec pass.
+    """
+    size, special = _sizes(value)
+    return size, size + special + 2
+
+
+def encoded_size(value: Any) -> int:
+    return _sizes(value)[0]
+
+
+_VERSIONS: ContextVar[Optional[Dict[int, Tuple[Any, Any]]]] = ContextVar("directive_field_versions", default=None)
+
+
+@contextmanager
+def track_versions() -> Iterator[Dict[int, Tuple[Any, Any]]]:
+    """Collect what ``note_version`` records in this block, for ``field_version``."""
+    versions: Dict[int, Tuple[Any, Any]] = {}
+    reset = _VERSIONS.set(versions)
+    try:
+        yield versions
+    finally:
+        _VERSIONS.reset(reset)
+
+
+def note_version(value: Any, source: Any) -> None:
+    """Record that ``value`` was built from the cached state identified by ``source`` (e.g. a stat signature)."""
+    versions = _VERSIONS.get()
+    if versions is not None:
+        # Holding the value keeps its id from being reused
+        versions[id(value)] = (value, source)
+
+
+def field_version(value: Any, versions: Optional[Dict[int, Tuple[Any, Any]]] = None) -> str:
+    """Checksum identifying one version of a paged field.
+
+    Taken from the source noted for ``value`` in ``versions`` when there is
+    one, and from its encoding otherwise.
+    """
+    entry = versions.get(id(value)) if versions else None
+    data = repr(entry[1]).encode("utf-8") if entry is not None and entry[0] is value else codec.dumps(value)
+    return f"{zlib.crc32(data):08x}"
+
+
+def make_cursor(index: int, offset: int, version: str) -> str:
+    return f"{index}:{offset}:{version}"
+
+
+def parse_cursor(cursor: str, version: str) -> Tuple[int, int]:
+    """``(index, offset)`` of a cursor issued for this ``version`` of the field."""
+    parts = cursor.split(":")
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    if parts[2] != version:
+        raise ValueError("cursor is stale: the result changed since it was issued; call again without cursor")
+    return int(parts[0]), int(parts[1])
+
+
+def fit_text(text: str, start: int, budget: int) -> int:
+    """End of the longest ``text[start:end]`` that encodes within ``budget`` bytes.
+
+    The cut falls after a newline when there is one in range, else between
+    characters; at least one character is always taken.
+    """
+    end = min(len(text), start + max(budget, 1))  # every character encodes to at least one byte
+    while end > start + 1:
+        size = encoded_size(text[start:end])
+        if size <= budget:
+            break
+        end = start + max(1, (end - start) * budget // size)
+    if end < len(text):
+        newline = text.rfind("\n", start, end)
+        if newline >= start:
+            end = newline + 1
+    return max(end, start + 1)
+
+
+def _overhead(payload: Dict[str, Any], field: str, empty: Any) -> int:
+    return encoded_size({**payload, field: empty}) + _CURSOR_OVERHEAD
+
+
+def _page_items(items: List[Any], index: int, offset: int, budget: int) -> Tuple[List[Any], int, int]:
+    """Items from ``(index, offset)`` that fit in ``budget`` and the position after them.
+
+    An item that is a dict with a ``content`` string (a section) can be split
+    within its content when it does not fit on its own.
+    """
+    page: List[Any] = []
+    used = 0
+    while index < len(items):
+        item = items[index]
+        splittable = isinstance(item, dict) and isinstance(item.get("content"), str)
+        if offset and splittable:
+            item = {**item, "content": item["content"][offset:]}
+        size = encoded_size(item) + 1
+        if used + size <= budget or not page and not splittable:
+            page.append(item)
+            used += size
+            index, offset = index + 1, 0
+            continue
+        if not page and splittable:
+            content = items[index]["content"]
+            room = budget - encoded_size({**item, "content": ""})
+            end = fit_text(content, offset, room)
+            page.append({**item, "content": content[offset:end]})
+            if end >= len(content):
+                index, offset = index + 1, 0
+            else:
+                offset = end
+        break
+    return page, index, offset
+
+
+def _fits(payload: Dict[str, Any], max_bytes: Optional[int]) -> bool:
+    return not max_bytes or encoded_size(payload) <= max_bytes
+
+
+def limit_payload(
+    payload: Dict[str, Any],
+    field: str,
+    max_bytes: Optional[int],
+    cursor: Optional[str] = None,
+    versions: Optional[Dict[int, Tuple[Any, Any]]] = None,
+) -> Dict[str, Any]:
+    """The page of ``payload`` that starts at ``cursor`` and encodes within ``max_bytes``.
+
+    ``payload[field]`` is a string or a list. Without a cursor a payload that
+    fits is returned as is; ``max_bytes`` of None or 0 only applies the cursor.
+    ``versions`` (from ``track_versions``) versions the field cheaply.
+    ``payload`` is never modified.
+    """
+    value = payload[field]
+    if cursor is None and _fits(payload, max_bytes):
+        return payload
+    version = field_version(value, versions)
+    index, offset = parse_cursor(cursor, version) if cursor is not None else (0, 0)
+    budget = max_bytes - _overhead(payload, field, "" if isinstance(value, str) else []) if max_bytes else None
+
+    if isinstance(value, str):
+        start = min(index, len(value))
+        end = len(value) if budget is None else fit_text(value, start, budget)
+        page: Any = value[start:end]
+        next_position = (end, 0) if end < len(value) else None
+    else:
+        page, index, offset = _page_items(value, index, offset, budget if budget is not None else float("inf"))  # type: ignore[arg-type]
+        next_position = (index, offset) if index < len(value) else None
+
+    result = {**payload, field: page}
+    if next_position is not None:
+        result["truncated"] = True
+        result["cursor"] = make_cursor(next_position[0], next_position[1], version)
+    return result
+
+
+def limit_keyed_list(payload: Dict[str, Any], field: str, max_bytes: Optional[int]) -> Dict[str, Any]:
+    """Cut a sorted list of unique strings to ``max_bytes``; the cursor is the last entry kept."""
+    if _fits(payload, max_bytes):
+        return payload
+    overhead = encoded_size({**payload, field: [], "truncated": True, "cursor": ""})
+    page, _, _ = _page_items(payload[field], 0, 0, max_bytes - overhead)
+    # The cursor repeats the last entry, which can be long (a path): drop entries until it fits too
+    used = sum(encoded_size(item) + 1 for item in page)
+    while len(page) > 1 and overhead + used + encoded_size(page[-1]) > max_bytes:
+        used -= encoded_size(page.pop()) + 1
+    return {**payload, field: page, "truncated": True, "cursor": page[-1]}
+
+
+def limit_files(
+    payload: Dict[str, Any],
+    keys: List[str],
+    max_bytes: Optional[int],
+    versions: Optional[Dict[int, Tuple[Any, Any]]] = None,
+) -> Dict[str, Any]:
+    """Cut the ``content`` of the file objects under ``keys`` (a template bundle) to ``max_bytes``.
+
+    Smaller files are kept whole and the remaining budget is shared by the
+    larger ones; each cut file gets ``truncated: true`` and a ``cursor`` that
+    files.get accepts to continue it.
+    """
+    if _fits(payload, max_bytes):
+        return payload
+    result = dict(payload)
+    budget = max_bytes - encoded_size({**payload, **{key: {**payload[key], "content": ""} for key in keys}})
+    pending = sorted(keys, key=lambda key: len(payload[key]["content"]))
+    while pending:
+        key = pending.pop(0)
+        content = payload[key]["content"]
+        share = budget // (len(pending) + 1)
+        content_size = encoded_size(content)
+        if content_size <= share:
+            budget -= content_size
+            continue
+        end = fit_text(content, 0, max(share - _CURSOR_OVERHEAD, 1))
+        result[key] = {
+            **payload[key],
+            "content": content[:end],
+            "truncated": True,
+            "cursor": make_cursor(end, 0, field_version(content, versions)),
+        }
+        budget -= share
+    return result
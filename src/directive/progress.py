@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+
+# Progress reporting for long tool calls. A server runs a tool inside
+# ``progress_scope(reporter)`` when the request carried a progress token;
+# long operations (tree walks, large reads, bundle builds) wrap themselves in
+# ``operation()`` and call ``advance()`` as they go. Only the outermost
+# operation of a request reports, so nested ones (a bundle reading its files)
+# cannot mix units, and nothing is sent for calls that finish within
+# ``min_interval``. Outside a scope every call is a no-op. A computation
+# shared by several requests (see ``SingleFlight``) reports through a
+# ``ProgressFanout`` to each of their reporters.
+
+# (progress, total, message) -> None
+SendProgress = Callable[[float, Optional[float], Optional[str]], None]
+
+# Minimum spacing between notifications for one request
+DEFAULT_MIN_INTERVAL = 0.1
+
+
+class ProgressReporter:
+    """Throttled progress notifications for one request."""
+
+    def __init__(
+        self,
+        send: SendProgress,
+        min_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._send: Optional[SendProgress] = send
+        self.min_interval = DEFAULT_MIN_INTERVAL if min_interval is None else min_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._depth = 0
+        # Quiet for the first interval, so quick calls send nothing
+        self._last_sent = clock()
+        self._last_progress = -1.0
+        self.sent = 0
+
+    def report(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._send is None or progress <= self._last_progress or now - self._last_sent < self.min_interval:
+                return
+            self._last_sent, self._last_progress = now, progress
+            send = self._send
+        try:
+            send(progress, total, message)
+            self.sent += 1
+        except Exception:
+            # The client went away; stop reporting rather than fail the call
+            self._send = None
+
+
+class ProgressFanout:
+    """Forward the progress of one computation to the reporters of every request sharing it.
+
+    Each reporter throttles on its own, so a request that joins late gets
+    notifications from then on, on its own schedule.
+    """
+
+    def __init__(self, reporter: Optional[ProgressReporter] = None) -> None:
+        self._lock = threading.Lock()
+        self._reporters: List[ProgressReporter] = [reporter] if reporter is not None else []
+        self.reporter = ProgressReporter(self._send, min_interval=0)
+
+    def add(self, reporter: ProgressReporter) -> None:
+        with self._lock:
+            self._reporters.append(reporter)
+
+    def remove(self, reporter: ProgressReporter) -> None:
+        with self._lock:
+            self._reporters.remove(reporter)
+
+    def _send(self, progress: float, total: Optional[float], message: Optional[str]) -> None:
+        with self._lock:
+            reporters = list(self._reporters)
+        for reporter in reporters:
+            reporter.report(progress, total, message)
+
+
+class Operation:
+    __slots__ = ("_reporter", "total", "message")
+
+    def __init__(self, reporter: Optional[ProgressReporter], total: Optional[float], message: Optional[str]) -> None:
+        self._reporter = reporter
+        self.total = total
+        self.message = message
+
+    def advance(self, progress: float) -> None:
+        if self._reporter is not None:
+            self._reporter.report(progress, self.total, self.message)
+
+
+_CURRENT: ContextVar[Optional[ProgressReporter]] = ContextVar("directive_progress", default=None)
+_NOOP = Operation(None, None, None)
+
+
+def current_reporter() -> Optional[ProgressReporter]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def progress_scope(reporter: Optional[ProgressReporter]) -> Iterator[None]:
+    reset = _CURRENT.set(reporter)
+    try:
+        yield
+    finally:
+        _CURRENT.reset(reset)
+
+
+@contextmanager
+def operation(message: str, total: Optional[float] = None) -> Iterator[Operation]:
+    """Report progress of a long operation; a no-op without a reporter or when nested in another operation."""
+    reporter = _CURRENT.get()
+    if reporter is None:
+        yield _NOOP
+        return
+    outermost = reporter._depth == 0
+    reporter._depth += 1
+    try:
+        yield Operation(reporter, total, message) if outermost else _NOOP
+    finally:
+        reporter._depth -= 1
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import codec
+from .bench import ServerClient, summarize_latencies
+
+
+# Recordings are NDJSON: one {"t": seconds since the session started,
+# "message": <client JSON-RPC message>} record per request or notification,
+# in arrival order. Only client-to-server traffic is captured.
+
+RECORDING_FORMAT = "directive-mcp-recording/1"
+
+
+class TrafficRecorder:
+    """Append incoming JSON-RPC messages to a recording file; safe to call from any thread."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fh: Optional[IO[str]] = open(path, "w", encoding="utf-8")
+        self._fh.write(codec.dumps_str({"format": RECORDING_FORMAT}) + "\n")
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, message: Dict[str, Any]) -> None:
+        line = codec.dumps_str({"t": round(time.monotonic() - self._started, 6), "message": message}) + "\n"
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line)
+            # Flush per message so a killed server still leaves a usable recording
+            self._fh.flush()
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def load_recording(path: Path) -> List[Tuple[float, Dict[str, Any]]]:
+    """Return ``(offset_seconds, message)`` pairs from a recording.
+
+    Raises: ValueError when the file is not a Directive recording
+    """
+    entries: List[Tuple[float, Dict[str, Any]]] = []
+    with open(path, "r", encoding="utf-8") as fh:
+        header = fh.readline()
+        if not header.strip() or codec.loads(header).get("format") != RECORDING_FORMAT:
+            raise ValueError(f"Not a Directive MCP recording: {path}")
+        for lineno, line in enumerate(fh, start=2):
+            if not line.strip():
+                continue
+            record = codec.loads(line)
+            if not isinstance(record.get("message"), dict):
+                raise ValueError(f"{path}:{lineno}: record has no message")
+            entries.append((float(record.get("t", 0.0)), record["message"]))
+    return entries
+
+
+def _describe(message: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    method = message.get("method", "")
+    params = message.get("params") or {}
+    return method, params.get("name") if method == "tools/call" else None
+
+
+def replay_recording(
+    recording: Path,
+    repo_root: Path,
+    runtime: str = "legacy",
+    speed: float = 1.0,
+    command: Optional[Sequence[str]] = None,
+    timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """Replay a recording against a fresh server and measure every request.
+
+    Messages are sent at their recorded offsets divided by ``speed`` (``0``
+    sends them back to back) without waiting for responses, so the original
+    overlap between requests is reproduced.
+
+    Returns: summary latency stats plus per-request latency and response size
+    """
+    if speed < 0:
+        raise ValueError("speed must be >= 0")
+    entries = load_recording(recording)
+    client = ServerClient(repo_root, runtime, command=command)
+    sent: List[Tuple[int, Dict[str, Any], int, Any]] = []
+    # The client numbers requests afresh, so cancellations are remapped to match
+    ids: Dict[Any, int] = {}
+    cancelled: Set[int] = set()
+    try:
+        started = time.perf_counter()
+        for index, (offset, message) in enumerate(entries):
+            if speed:
+                delay = offset / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            if "id" in message:
+                request_id, pending = client.send_request(message.get("method", ""), message.get("params"))
+                sent.append((index, message, request_id, pending))
+                if isinstance(message["id"], (int, str)):
+                    ids[message["id"]] = request_id
+            else:
+                params = message.get("params")
+                if message.get("method") == "notifications/cancelled" and isinstance(params, dict):
+                    recorded_id = params.get("requestId")
+                    if isinstance(recorded_id, (int, str)) and recorded_id in ids:
+                        params = {**params, "requestId": ids[recorded_id]}
+                        cancelled.add(ids[recorded_id])
+                client.notify(message.get("method", ""), params)
+        # A cancelled request gets no response unless it finished first, so it is not waited for
+        for _, _, request_id, pending in sorted(sent, key=lambda item: item[2] in cancelled):
+            try:
+                client.wait(request_id, pending, timeout=0 if request_id in cancelled else timeout)
+            except TimeoutError:
+                pass
+        duration = time.perf_counter() - started
+    finally:
+        client.close()
+
+    detail: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    for index, message, request_id, pending in sent:
+        method, tool = _describe(message)
+        response = pending.response
+        entry: Dict[str, Any] = {"index": index, "method": method, "tool": tool}
+        if response is None:
+            error = "cancelled" if request_id in cancelled else "no response"
+            entry.update({"latency_ms": None, "response_bytes": None, "error": error})
+        else:
+            latencies.append(pending.latency)
+            error = response.get("error") or ((response.get("result") or {}).get("isError") and "tool error") or None
+            entry.update(
+                {
+                    "latency_ms": round(pending.latency * 1000.0, 3),
+                    "response_bytes": pending.size,
+                    "error": error.get("message") if isinstance(error, dict) else error,
+                }
+            )
+        detail.append(entry)
+
+    return {
+        "recording": str(recording),
+        "runtime": runtime,
+        "speed": speed,
+        "messages": len(entries),
+        "requests": len(sent),
+        "duration_s": round(duration, 4),
+        "errors": sum(1 for d in detail if d["error"]),
+        "latency": summarize_latencies(latencies),
+        "response_bytes": sum(d["response_bytes"] or 0 for d in detail),
+        "detail": detail,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Diff two replay reports of the same recording (e.g. from two builds), request by request."""
+    base_detail = {d["index"]: d for d in baseline.get("detail", [])}
+    size_changes: List[Dict[str, Any]] = []
+    latency_deltas: List[float] = []
+    for entry in current.get("detail", []):
+        before = base_detail.get(entry["index"])
+        if before is None:
+            continue
+        if before["response_bytes"] != entry["response_bytes"]:
+            size_changes.append(
+                {
+                    "index": entry["index"],
+                    "method": entry["method"],
+                    "tool": entry["tool"],
+                    "baseline_bytes": before["response_bytes"],
+                    "current_bytes": entry["response_bytes"],
+                }
+            )
+        if before["latency_ms"] is not None and entry["latency_ms"] is not None:
+            latency_deltas.append(entry["latency_ms"] - before["latency_ms"])
+
+    latency = {}
+    for key in ("p50_ms", "p95_ms", "p99_ms", "mean_ms"):
+        b = baseline.get("latency", {}).get(key, 0.0)
+        c = current.get("latency", {}).get(key, 0.0)
+        latency[key] = {"baseline": b, "current": c, "delta": round(c - b, 3)}
+    return {
+        "latency": latency,
+        "median_request_delta_ms": round(sorted(latency_deltas)[len(latency_deltas) // 2], 3) if latency_deltas else 0.0,
+        "response_bytes": {
+            "baseline": baseline.get("response_bytes", 0),
+            "current": current.get("response_bytes", 0),
+            "delta": current.get("response_bytes", 0) - baseline.get("response_bytes", 0),
+        },
+        "size_changes": size_changes,
+    }
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from . import codec
+
+
+# Structured per-request log for the MCP server. Every tool call appends one
+# record to a bounded ring buffer. A record is kept as the raw tuple of what
+# was measured, the arguments as received; it is turned into JSON (and the
+# arguments into their hash) only when the buffer is dumped (the
+# directive/server.log tool, or SIGUSR1 where available) or when a record is
+# streamed to a file, so keeping the buffer costs one append per call.
+# Streaming can be sampled. Cache hits and misses are counted per request
+# through a context variable that the caches bump.
+
+# Records kept by default
+DEFAULT_CAPACITY = 1000
+
+# (time, tool, arguments, duration, outcome, bytes, cache hits, cache misses)
+_Record = Tuple[float, str, Dict[str, Any], float, str, Optional[int], int, int]
+
+
+class CacheLookups:
+    __slots__ = ("hits", "misses")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+_LOOKUPS: ContextVar[Optional[CacheLookups]] = ContextVar("directive_cache_lookups", default=None)
+
+
+def note_cache_lookup(hit: bool) -> None:
+    """Count a cache hit or miss against the request being served, if any."""
+    lookups = _LOOKUPS.get()
+    if lookups is None:
+        return
+    if hit:
+        lookups.hits += 1
+    else:
+        lookups.misses += 1
+
+
+@contextmanager
+def count_cache_lookups() -> Iterator[CacheLookups]:
+    lookups = CacheLookups()
+    reset = _LOOKUPS.set(lookups)
+    try:
+        yield lookups
+    finally:
+        _LOOKUPS.reset(reset)
+
+
+def _arguments_hash(arguments: Dict[str, Any]) -> str:
+    canonical = {k: v for k, v in arguments.items() if v is not None}
+    return hashlib.sha1(codec.dumps(canonical, sort_keys=True)).hexdigest()[:12]
+
+
+def format_record(record: _Record) -> Dict[str, Any]:
+    at, tool, arguments, duration, outcome, size, hits, misses = record
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(at)) + f".{int(at % 1 * 1000):03d}Z",
+        "tool": tool,
+        "argsHash": _arguments_hash(arguments),
+        "durationMs": round(duration * 1000, 3),
+        "outcome": outcome,
+        "bytes": size,
+        "cacheHits": hits,
+        "cacheMisses": misses,
+    }
+
+
+class RequestLog:
+    """Ring buffer of the last ``capacity`` tool calls (0 keeps none), optionally streamed (sampled) to ``stream``."""
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        stream: Optional[TextIO] = None,
+        sample: float = 1.0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        if capacity < 0:
+            raise ValueError("capacity must be >= 0")
+        if not 0 <= sample <= 1:
+            raise ValueError("sample must be between 0 and 1")
+        self.capacity = capacity
+        self._records: Deque[_Record] = deque(maxlen=capacity)
+        self._stream = stream
+        self.sample = sample
+        self._rng = rng
+        self._write_lock = threading.Lock()
+        self.logged = 0
+
+    def record(
+        self,
+        tool: str,
+        arguments: Dict[str, Any],
+        duration: float,
+        outcome: str,
+        size: Optional[int] = None,
+        cache_hits: int = 0,
+        cache_misses: int = 0,
+    ) -> None:
+        entry = (time.time(), tool, arguments, duration, outcome, size, cache_hits, cache_misses)
+        self._records.append(entry)
+        self.logged += 1
+        if self._stream is not None and (self.sample >= 1 or self._rng() < self.sample):
+            self._write([entry], self._stream)
+
+    def records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The buffered records, oldest first (the latest ``limit`` when given)."""
+        entries = list(self._records)
+        if limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        return [format_record(entry) for entry in entries]
+
+    def _write(self, entries: List[_Record], stream: TextIO) -> None:
+        lines = "".join(codec.dumps_str(format_record(entry)) + "\n" for entry in entries)
+        with self._write_lock:
+            try:
+                stream.write(lines)
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def dump(self, stream: Optional[TextIO] = None) -> int:
+        """Write every buffered record as JSON lines to ``stream`` (default: stderr); returns the count."""
+        entries = list(self._records)
+        self._write(entries, stream if stream is not None else sys.stderr)
+        return len(entries)
+
+    def status(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "buffered": len(self._records), "logged": self.logged, "sample": self.sample}
+
+    def start(self) -> "RequestLog":
+        """Register as the process log that servers record tool calls to."""
+        global _ACTIVE
+        _ACTIVE = self
+        return self
+
+    def stop(self) -> None:
+        global _ACTIVE
+        if _ACTIVE is self:
+            _ACTIVE = None
+        if self._stream is not None and self._stream is not sys.stderr:
+            self._stream.close()
+
+    def install_dump_signal(self) -> bool:
+        """Dump the buffer to stderr on SIGUSR1; False where the platform has no SIGUSR1 (or off the main thread)."""
+        if not hasattr(signal, "SIGUSR1"):
+            return False
+
+        def _on_signal(signum: int, frame: Any) -> None:
+            # The interrupted thread may hold the write lock; dump from another one
+            threading.Thread(target=self.dump, name="directive-log-dump", daemon=True).start()
+
+        try:
+            signal.signal(signal.SIGUSR1, _on_signal)
+        except ValueError:
+            return False
+        return True
+
+
+_ACTIVE: Optional[RequestLog] = None
+
+
+def active_log() -> Optional[RequestLog]:
+    return _ACTIVE
+
+
+def request_log(limit: Optional[int] = None) -> Dict[str, Any]:
+    """Status and buffered records of the process request log (``enabled: false`` when there is none)."""
+    log = _ACTIVE
+    if log is None:
+        return {"enabled": False, "records": []}
+    return {"enabled": True, **log.status(), "records": log.records(limit)}
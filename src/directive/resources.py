@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+from .bundles import iter_directive_entries, list_directive_files, read_directive_file
+
+
+# Files under directive/ are exposed as MCP resources with URIs of the form
+# directive:///reference/agent_context.md (path relative to directive/, empty authority).
+RESOURCE_SCHEME = "directive:///"
+
+_MIME_TYPES = {
+    ".md": "text/markdown",
+    ".mdc": "text/markdown",
+    ".json": "application/json",
+}
+
+
+def path_to_uri(path: str) -> str:
+    rel = path[len("directive/"):] if path.startswith("directive/") else path
+    return RESOURCE_SCHEME + quote(rel)
+
+
+def uri_to_path(uri: str) -> str:
+    if not uri.startswith(RESOURCE_SCHEME):
+        raise ValueError(f"Unsupported resource URI (expected {RESOURCE_SCHEME}...): {uri}")
+    return "directive/" + unquote(uri[len(RESOURCE_SCHEME):])
+
+
+def mime_type_for(path: str) -> str:
+    return _MIME_TYPES.get(os.path.splitext(path)[1].lower(), "text/plain")
+
+
+def list_resources(repo_root: Path | None = None) -> List[Dict[str, str]]:
+    return [
+        {"uri": path_to_uri(path), "name": path.rsplit("/", 1)[-1], "title": path, "mimeType": mime_type_for(path)}
+        for path in list_directive_files(repo_root)
+    ]
+
+
+def read_resource(repo_root: Path | None, uri: str) -> Dict[str, str]:
+    path = uri_to_path(uri)
+    return {"uri": uri, "mimeType": mime_type_for(path), "text": read_directive_file(repo_root, path)}
+
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class ResourceWatcher:
+    """Poll directive/ for changes and report them to callbacks.
+
+    ``on_updated`` receives the URIs of files whose mtime or size changed;
+    ``on_list_changed`` is called when files are added or removed. Polling keeps
+    the watcher dependency-free and portable; only stat calls are made per tick.
+    """
+
+    def __init__(
+        self,
+        repo_root: Path,
+        on_updated: Callable[[List[str]], None],
+        on_list_changed: Callable[[], None],
+        interval: float = 1.0,
+    ) -> None:
+        self.repo_root = repo_root
+        self.on_updated = on_updated
+        self.on_list_changed = on_list_changed
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Snapshot:
+        snapshot: Snapshot = {}
+        try:
+            for path, entry in iter_directive_entries(self.repo_root):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def poll_once(self) -> None:
+        current = self._take_snapshot()
+        previous = self._snapshot
+        self._snapshot = current
+        changed = [path_to_uri(p) for p, sig in current.items() if p in previous and previous[p] != sig]
+        if changed:
+            self.on_updated(changed)
+        if current.keys() != previous.keys():
+            self.on_list_changed()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception:  # pragma: no cover - keep watching on transient errors
+                continue
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="directive-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+class SharedWatcher:
+    """One ``ResourceWatcher`` reporting to many listeners, polling only while at least one is registered.
+
+    ``add`` registers a listener (the watcher starts, with a fresh snapshot,
+    when the first one arrives) and returns a key for ``remove``; the watcher
+    stops when the last listener is removed.
+    """
+
+    def __init__(self, repo_root: Path, interval: float = 1.0) -> None:
+        self.repo_root = repo_root
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._listeners: Dict[int, Tuple[Callable[[List[str]], None], Callable[[], None]]] = {}
+        self._next_key = 0
+        self._watcher: Optional[ResourceWatcher] = None
+
+    def add(self, on_updated: Callable[[List[str]], None], on_list_changed: Callable[[], None]) -> int:
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._listeners[key] = (on_updated, on_list_changed)
+            if self._watcher is None:
+                self._watcher = ResourceWatcher(self.repo_root, self._updated, self._list_changed, self.interval)
+                self._watcher.start()
+            return key
+
+    def remove(self, key: int) -> None:
+        with self._lock:
+            self._listeners.pop(key, None)
+            watcher = self._watcher if not self._listeners else None
+            if watcher is not None:
+                self._watcher = None
+        if watcher is not None:
+            watcher.stop()
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._watcher is not None
+
+    def _updated(self, uris: List[str]) -> None:
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for on_updated, _ in listeners:
+            on_updated(uris)
+
+    def _list_changed(self) -> None:
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for _, on_list_changed in listeners:
+            on_list_changed()
+
+
+class Subscriptions:
+    """Thread-safe set of subscribed resource URIs."""
+
+    def __init__(self) -> None:
+        self._uris: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, uri: str) -> None:
+        with self._lock:
+            self._uris.add(uri)
+
+    def discard(self, uri: str) -> None:
+        with self._lock:
+            self._uris.discard(uri)
+
+    def filter(self, uris: List[str]) -> List[str]:
+        with self._lock:
+            return [u for u in uris if u in self._uris]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._uris)
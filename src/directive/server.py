@@ -1,14 +1,21 @@
 #!/usr/bin/env -S uv run -q
 # /// script
 # requires-python = ">=3.11"
-# dependencies = ["mcp>=1.2.0"]
+# dependencies = ["mcp>=1.14.1,<1.15"]
 # ///
 from __future__ import annotations
 
-import json
+import io
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import sys as _sys
 from pathlib import Path as _Path
@@ -18,7 +25,33 @@ _SRC_CANDIDATE = _Path(__file__).resolve().parents[2] / "src"
 if _SRC_CANDIDATE.exists() and str(_SRC_CANDIDATE) not in _sys.path:
     _sys.path.insert(0, str(_SRC_CANDIDATE))
 
-from directive.bundles import build_template_bundle, list_directive_files, read_directive_file, get_directive_root
+from directive import codec
+from directive.cancellation import CancelToken, Cancelled, DeadlineExceeded, cancel_scope, checkpoint
+from directive.paging import (
+    DEFAULT_MAX_RESPONSE_BYTES,
+    encoded_sizes,
+    limit_files,
+    limit_keyed_list,
+    limit_payload,
+    track_versions,
+)
+from directive.progress import ProgressReporter, progress_scope
+from directive.bundles import (
+    DIRECTIVE_DIRNAME,
+    PREWARM_TARGETS,
+    build_template_bundle,
+    list_directive_files_page,
+    prewarm_caches,
+    read_directive_file,
+    read_directive_sections,
+)
+from directive.specs import SCAFFOLD_TEMPLATES, create_spec, specs_changed, specs_digest
+from directive.resources import SharedWatcher, Subscriptions, list_resources, read_resource
+from directive.idle import IdleMonitor, server_status
+from directive.replay import TrafficRecorder
+from directive.requestlog import active_log, count_cache_lookups, request_log
+from directive.shared_cache import batch_publishes
+from directive.singleflight import SingleFlight
 try:
     # Prefer official MCP server when launched as a script (Cursor)
     from mcp.server.fastmcp import FastMCP  # type: ignore
@@ -41,75 +74,332 @@ class Request:
     params: Dict[str, Any]
 
 
-def _read_message() -> Optional[Dict[str, Any]]:
-    import sys
+# Basic safety cap (10 MB) to avoid excessive memory usage
+_MAX_MESSAGE_BYTES = 10 * 1024 * 1024
 
-    # Read headers until blank line; accept multiple headers and case-insensitive names.
+
+def _parse_header_line(line: bytes, headers: Dict[str, str]) -> None:
+    # Accept multiple headers and case-insensitive names; ignore malformed lines rather than failing hard
+    if b":" not in line:
+        return
+    name, value = line.decode("latin-1").split(":", 1)
+    headers[name.strip().lower()] = value.strip()
+
+
+def _content_length(headers: Dict[str, str]) -> Optional[int]:
+    try:
+        length = int(headers.get("content-length", ""))
+    except ValueError:
+        return None
+    if length < 0 or length > _MAX_MESSAGE_BYTES:
+        return None
+    return length
+
+
+def _read_message(reader: BinaryIO) -> Optional[Dict[str, Any]]:
+    # Frames are byte-oriented: Content-Length counts bytes. Read headers until blank line.
     headers: Dict[str, str] = {}
     while True:
-        line = sys.stdin.readline()
+        line = reader.readline()
         if not line:
             return None
-        if line in ("\r\n", "\n", ""):
+        if line in (b"\r\n", b"\n"):
             break
-        if ":" not in line:
-            # Ignore malformed header lines rather than failing hard
-            continue
-        name, value = line.split(":", 1)
-        headers[name.strip().lower()] = value.strip()
-
-    length_str = headers.get("content-length")
-    if not length_str:
+        _parse_header_line(line, headers)
+
+    length = _content_length(headers)
+    if length is None:
         return None
-    try:
-        length = int(length_str)
-    except Exception:
+    raw = reader.read(length)
+    if not raw:
         return None
-    # Basic safety cap (10 MB) to avoid excessive memory usage
-    if length < 0 or length > 10 * 1024 * 1024:
+    return codec.loads(raw)
+
+
+async def _read_message_async(reader: Any) -> Optional[Dict[str, Any]]:
+    import asyncio
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+        if line in (b"\r\n", b"\n"):
+            break
+        _parse_header_line(line, headers)
+
+    length = _content_length(headers)
+    if length is None:
         return None
+    try:
+        raw = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+    return codec.loads(raw)
 
-    raw = sys.stdin.read(length)
-    if not raw:
+
+class _MessageWriter:
+    """Frame and send JSON-RPC messages through ``send_frame``.
+
+    Responses and watcher notifications are written from different threads,
+    so frames are serialized under a lock.
+    """
+
+    def __init__(self, send_frame: Callable[[bytes], None]) -> None:
+        self._send_frame = send_frame
+        self._lock = threading.Lock()
+
+    def write(self, payload: Dict[str, Any]) -> None:
+        data = codec.dumps(payload)
+        header = f"Content-Length: {len(data)}\r\nContent-Type: application/json\r\n\r\n".encode("ascii")
+        with self._lock:
+            self._send_frame(header + data)
+
+    def error(self, id_value: Any, code: int, message: str, data: Any = None) -> None:
+        err: Dict[str, Any] = {"jsonrpc": "2.0", "id": id_value, "error": {"code": code, "message": message}}
+        if data is not None:
+            err["error"]["data"] = data
+        self.write(err)
+
+    def result(self, id_value: Any, result: Any) -> None:
+        self.write({"jsonrpc": "2.0", "id": id_value, "result": result})
+
+    def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        msg: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            msg["params"] = params
+        self.write(msg)
+
+
+# ---- Cache prewarming ----
+
+def start_prewarm(repo_root: Path, targets: Any = PREWARM_TARGETS) -> Optional[threading.Thread]:
+    """Warm caches on a daemon thread so server startup and `initialize` are never delayed."""
+    targets = list(targets)
+    if not targets:
         return None
-    return json.loads(raw)
+
+    def _run() -> None:
+        try:
+            prewarm_caches(repo_root, targets)
+        except Exception:
+            # Best effort: a missing directive/ or unreadable file is reported on first real use
+            pass
+
+    thread = threading.Thread(target=_run, name="directive-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+# ---- Tool output ----
+# Tools return structured results. Both runtimes send each payload exactly
+# once: clients that negotiated a protocol version with structuredContent get
+# it there (with empty content), older clients get the JSON-encoded payload as
+# a text content item instead. The spec suggests also sending the text copy to
+# structured clients for compatibility; it is omitted because those clients
+# read structuredContent, and a second copy would double every response.
+SUPPORTED_PROTOCOL_VERSIONS = ("2024-11-05", "2025-03-26", "2025-06-18")
+STRUCTURED_CONTENT_SINCE = "2025-06-18"
+
+_STRING = {"type": "string"}
+_STRINGS = {"type": "array", "items": _STRING}
+# Set on payloads cut to the response size limit (or by a deadline)
+_TRUNCATED = {"truncated": {"type": "boolean"}, "cursor": _STRING}
+_FILE_SCHEMA = {
+    "type": "object",
+    "properties": {"path": _STRING, "content": _STRING, **_TRUNCATED},
+    "required": ["path", "content"],
+}
+_BUNDLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "agentOperatingProcedure": _FILE_SCHEMA,
+        "agentContext": _FILE_SCHEMA,
+        "template": _FILE_SCHEMA,
+        "resources": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"path": _STRING}, "required": ["path"]},
+        },
+    },
+    "required": ["agentOperatingProcedure", "agentContext", "template", "resources"],
+}
+_OUTPUT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "directive/files.list": {
+        "type": "object",
+        "properties": {"files": _STRINGS, **_TRUNCATED},
+        "required": ["files"],
+    },
+    "directive/files.get": _FILE_SCHEMA,
+    "directive/files.section": {
+        "type": "object",
+        "properties": {
+            "path": _STRING,
+            "sections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"title": _STRING, "level": {"type": "integer"}, "content": _STRING},
+                    "required": ["title", "level", "content"],
+                },
+            },
+            "missing": _STRINGS,
+            "headings": _STRINGS,
+            **_TRUNCATED,
+        },
+        "required": ["path", "sections"],
+    },
+    "directive/specs.digest": {
+        "type": "object",
+        "properties": {"format": _STRING, "count": {"type": "integer"}, "specs": _STRINGS, **_TRUNCATED},
+        "required": ["format", "count", "specs"],
+    },
+    "directive/specs.changed": {
+        "type": "object",
+        "properties": {
+            "since": _STRING,
+            "mode": {"type": "string", "enum": ["git", "mtime"]},
+            "count": {"type": "integer"},
+            "specs": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "dir": _STRING,
+                        "path": _STRING,
+                        "status": {"type": "string", "enum": ["added", "modified", "deleted"]},
+                        "id": _STRING,
+                        "created": _STRING,
+                        "feature": _STRING,
+                        "summary": _STRING,
+                        "docs": _STRINGS,
+                        "files": _STRINGS,
+                    },
+                    "required": ["dir", "path", "status", "files"],
+                },
+            },
+            **_TRUNCATED,
+        },
+        "required": ["since", "mode", "count", "specs"],
+    },
+    "directive/specs.create": {
+        "type": "object",
+        "properties": {"dir": _STRING, "path": _STRING, "specId": _STRING, "created": _STRING, "files": _STRINGS},
+        "required": ["dir", "path", "specId", "created", "files"],
+    },
+    "directive/templates.spec": _BUNDLE_SCHEMA,
+    "directive/templates.impact": _BUNDLE_SCHEMA,
+    "directive/templates.tdr": _BUNDLE_SCHEMA,
+    "directive/server.status": {
+        "type": "object",
+        "properties": {
+            "pid": {"type": "integer"},
+            "uptimeSeconds": {"type": "number"},
+            "idle": {
+                "anyOf": [
+                    {"type": "null"},
+                    {
+                        "type": "object",
+                        "properties": {
+                            "idleSeconds": {"type": "number"},
+                            "previousIdleSeconds": {"type": "number"},
+                            "inFlight": {"type": "integer"},
+                            "released": {"type": "boolean"},
+                            "releases": {"type": "integer"},
+                            "releaseAfter": {"type": ["number", "null"]},
+                            "exitAfter": {"type": ["number", "null"]},
+                        },
+                    },
+                ]
+            },
+            "memory": {
+                "type": "object",
+                "properties": {"rssBytes": {"type": ["integer", "null"]}, "peakRssBytes": {"type": ["integer", "null"]}},
+            },
+            "caches": {"type": "object", "additionalProperties": {"type": "integer"}},
+        },
+        "required": ["pid", "uptimeSeconds", "idle", "memory", "caches"],
+    },
+    "directive/server.log": {
+        "type": "object",
+        "properties": {
+            "enabled": {"type": "boolean"},
+            "capacity": {"type": "integer"},
+            "buffered": {"type": "integer"},
+            "logged": {"type": "integer"},
+            "sample": {"type": "number"},
+            "records": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "time": _STRING,
+                        "tool": _STRING,
+                        "argsHash": _STRING,
+                        "durationMs": {"type": "number"},
+                        "outcome": {"type": "string", "enum": ["ok", "truncated", "cancelled", "deadline", "error"]},
+                        "bytes": {"type": ["integer", "null"]},
+                        "cacheHits": {"type": "integer"},
+                        "cacheMisses": {"type": "integer"},
+                    },
+                    "required": ["time", "tool", "argsHash", "durationMs", "outcome", "bytes", "cacheHits", "cacheMisses"],
+                },
+            },
+        },
+        "required": ["enabled", "records"],
+    },
+}
+
+
+def _negotiate_protocol(requested: Any) -> str:
+    """Echo the client's protocol version when supported, else answer with the latest."""
+    return requested if requested in SUPPORTED_PROTOCOL_VERSIONS else SUPPORTED_PROTOCOL_VERSIONS[-1]
 
 
-def _write_message(payload: Dict[str, Any]) -> None:
-    import sys
+def _supports_structured_content(protocol_version: Optional[str]) -> bool:
+    return protocol_version is not None and protocol_version >= STRUCTURED_CONTENT_SINCE
 
-    data = json.dumps(payload)
-    sys.stdout.write(
-        f"Content-Length: {len(data)}\r\nContent-Type: application/json\r\n\r\n{data}"
-    )
-    sys.stdout.flush()
 
+def _tool_result(payload: Any, structured: bool) -> Dict[str, Any]:
+    if structured:
+        return {"content": [], "structuredContent": payload}
+    return _wrap_text_content(codec.dumps_str(payload))
 
-def _error(id_value: Any, code: int, message: str, data: Any = None) -> None:
-    err: Dict[str, Any] = {"jsonrpc": "2.0", "id": id_value, "error": {"code": code, "message": message}}
-    if data is not None:
-        err["error"]["data"] = data
-    _write_message(err)
 
+_REV_SCHEMA = {
+    "type": "string",
+    "description": "Optional git revision (commit, branch or tag) to read directive/ at instead of the working tree",
+}
 
-def _result(id_value: Any, result: Any) -> None:
-    _write_message({"jsonrpc": "2.0", "id": id_value, "result": result})
+_CURSOR_SCHEMA = {"type": "string", "description": "Continue a truncated result from the cursor it returned"}
 
+# Accepted by every tool
+_DEADLINE_SCHEMA = {
+    "type": "integer",
+    "minimum": 1,
+    "description": "Optional time budget for this call in milliseconds; it can shorten, but not extend, the server's deadline for the tool",
+}
 
-# ---- MCP helpers ----
 
-def _tool_descriptors() -> List[Dict[str, Any]]:
-    return [
+def _tool_descriptors(structured: bool = True) -> List[Dict[str, Any]]:
+    """Tool definitions; output schemas are only advertised to clients that receive structuredContent."""
+    tools: List[Dict[str, Any]] = [
         {
             "name": "directive/files.list",
             "title": "List Directive Files",
-            "description": "List all files under the repository’s directive/ directory (context and templates).",
-            "inputSchema": {"type": "object", "additionalProperties": False, "properties": {}},
+            "description": "List all files under the repository’s directive/ directory (context and templates). If the call runs out of time or the listing exceeds the response size limit, it is returned truncated, with a cursor to continue from.",
+            "inputSchema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "rev": _REV_SCHEMA,
+                    "cursor": _CURSOR_SCHEMA,
+                },
+            },
         },
         {
             "name": "directive/files.get",
             "title": "Read Directive File",
-            "description": "Read a file under directive/ by path and return its full contents verbatim.",
+            "description": "Read a file under directive/ by path and return its full contents verbatim; files over the response size limit are returned in pages cut at line boundaries, with a cursor to continue from.",
             "inputSchema": {
                 "type": "object",
                 "additionalProperties": False,
@@ -117,11 +407,76 @@ def _tool_descriptors() -> List[Dict[str, Any]]:
                     "path": {
                         "type": "string",
                         "description": "Path under directive/ (e.g., directive/reference/agent_context.md)",
-                    }
+                    },
+                    "rev": _REV_SCHEMA,
+                    "cursor": _CURSOR_SCHEMA,
                 },
                 "required": ["path"],
             },
         },
+        {
+            "name": "directive/files.section",
+            "title": "Read Directive File Section",
+            "description": "Return only the requested heading section(s) of a markdown file under directive/ (e.g., 'Acceptance Criteria' from a spec or 'Rollout' from a TDR), including subsections.",
+            "inputSchema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path under directive/ (e.g., directive/specs/20250101-feature/spec.md)",
+                    },
+                    "heading": {
+                        "description": "Heading title or list of titles; matching ignores case and leading numbering, and falls back to prefix matches",
+                        "anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}],
+                    },
+                    "rev": _REV_SCHEMA,
+                    "cursor": _CURSOR_SCHEMA,
+                },
+                "required": ["path", "heading"],
+            },
+        },
+        {
+            "name": "directive/specs.digest",
+            "title": "Specs Digest",
+            "description": "Return one compact line per spec under directive/specs/ (dir | id | created | feature | summary | companion docs present) to understand project history without reading every spec.",
+            "inputSchema": {"type": "object", "additionalProperties": False, "properties": {"cursor": _CURSOR_SCHEMA}},
+        },
+        {
+            "name": "directive/specs.changed",
+            "title": "Specs Changed Since",
+            "description": "List specs under directive/specs/ added, modified or deleted since a git revision or date, with their metadata and changed file paths but no content; use it for impact analysis instead of re-reading every spec.",
+            "inputSchema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "since": {
+                        "type": "string",
+                        "description": "Git revision (commit, branch or tag) compared with the working tree, or an ISO date (YYYY-MM-DD) compared with file modification times",
+                    },
+                    "cursor": _CURSOR_SCHEMA,
+                },
+                "required": ["since"],
+            },
+        },
+        {
+            "name": "directive/specs.create",
+            "title": "Create Spec Directory",
+            "description": "Create directive/specs/YYYYMMDD-<name>/ with spec.md, impact.md and tdr.md rendered from the templates (Spec ID, Created and feature name filled in) in one atomic step; returns the created paths.",
+            "inputSchema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "name": {"type": "string", "description": "Feature name (e.g., 'Selective update'); slugified for the directory"},
+                    "docs": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": list(SCAFFOLD_TEMPLATES)},
+                        "description": "Documents to create (default: spec, impact, tdr)",
+                    },
+                },
+                "required": ["name"],
+            },
+        },
         {
             "name": "directive/templates.spec",
             "title": "Spec Template Bundle",
@@ -140,28 +495,539 @@ def _tool_descriptors() -> List[Dict[str, Any]]:
             "description": "Return Agent Operating Procedure, Agent Context, and the TDR template, plus a concise Primer for drafting a Technical Design Review.",
             "inputSchema": {"type": "object", "additionalProperties": False, "properties": {}},
         },
+        {
+            "name": "directive/server.status",
+            "title": "Server Status",
+            "description": "Report this server process's idle state (seconds idle, in-flight requests, whether caches were released), resident memory and cache sizes.",
+            "inputSchema": {"type": "object", "additionalProperties": False, "properties": {}},
+        },
+        {
+            "name": "directive/server.log",
+            "title": "Server Request Log",
+            "description": "Return this server's recent tool calls from its in-memory request log: tool, arguments hash, duration, outcome, response bytes and cache hits/misses per call, oldest first.",
+            "inputSchema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {"limit": {"type": "integer", "minimum": 1, "description": "Return only the latest N records"}},
+            },
+        },
     ]
+    for tool in tools:
+        tool["inputSchema"]["properties"]["deadlineMs"] = _DEADLINE_SCHEMA
+        if structured:
+            tool["outputSchema"] = _OUTPUT_SCHEMAS[tool["name"]]
+    return tools
+
+
+def _heading_queries(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+        return value
+    raise ValueError("heading must be a string or a non-empty list of strings")
 
 
 def _wrap_text_content(text: str) -> Dict[str, Any]:
     return {"content": [{"type": "text", "text": text}]}
 
 
-def serve_stdio(root: Path) -> int:
-    # Ensure we consistently resolve the repo root and directive root once.
-    repo_root = root.parent
-    try:
-        directive_root = get_directive_root(repo_root)
-    except Exception:
-        directive_root = root
+class ToolNotFound(LookupError):
+    pass
 
-    while True:
-        msg = _read_message()
-        if msg is None:
+
+# Tools with side effects (or point-in-time answers) are never coalesced: each call must run.
+_UNCOALESCED_TOOLS = {"directive/specs.create", "directive/server.status", "directive/server.log"}
+# Worker threads for tool execution in the legacy server.
+_TOOL_WORKERS = 8
+# Time budget in seconds per tool call, by tool name; "*" covers unlisted tools and 0 means none.
+DEFAULT_TOOL_DEADLINES: Dict[str, float] = {"*": 30.0}
+
+
+def parse_deadlines(value: str) -> Dict[str, float]:
+    """Parse ``files.list=5,*=30`` into per-tool deadlines (the ``directive/`` prefix is optional)."""
+    deadlines: Dict[str, float] = {}
+    for item in value.split(","):
+        name, sep, seconds = item.strip().partition("=")
+        name = name.strip()
+        try:
+            budget = float(seconds)
+        except ValueError:
+            budget = -1.0
+        if not sep or not name or budget < 0:
+            raise ValueError(f"invalid deadline {item.strip()!r}; expected TOOL=SECONDS")
+        if name != "*" and not name.startswith("directive/"):
+            name = "directive/" + name
+        deadlines[name] = budget
+    return deadlines
+
+
+def _deadline_seconds(deadlines: Optional[Dict[str, float]], name: str, requested_ms: Any) -> Optional[float]:
+    """Effective budget of one call: the tool's configured deadline, shortened by the request's ``deadlineMs``."""
+    if deadlines is None:
+        deadlines = DEFAULT_TOOL_DEADLINES
+    budget = deadlines.get(name, deadlines.get("*")) or None
+    if requested_ms is not None:
+        if isinstance(requested_ms, bool) or not isinstance(requested_ms, (int, float)) or requested_ms <= 0:
+            raise ValueError("deadlineMs must be a positive integer")
+        budget = min(budget, requested_ms / 1000) if budget is not None else requested_ms / 1000
+    return budget
+
+
+# Field of each tool's payload that is paged to fit the response size limit; its ``cursor`` argument resumes it.
+_PAGED_FIELDS = {
+    "directive/files.get": "content",
+    "directive/files.section": "sections",
+    "directive/specs.digest": "specs",
+    "directive/specs.changed": "specs",
+}
+_BUNDLE_TOOLS = {"directive/templates.spec", "directive/templates.impact", "directive/templates.tdr"}
+_BUNDLE_FILES = ["agentOperatingProcedure", "agentContext", "template"]
+# Tries at cutting a page whose tool result is still over the limit (escaping in text content)
+_FIT_ATTEMPTS = 8
+
+
+def _result_size(payload: Any, structured: bool) -> int:
+    """Encoded size of the tool result sent for ``payload`` (see ``_tool_result``), computed without encoding it."""
+    size, text_size = encoded_sizes(payload)
+    if structured:
+        return _STRUCTURED_RESULT_OVERHEAD + size
+    return _TEXT_RESULT_OVERHEAD + text_size
+
+
+# Bytes a tool result adds around the payload (or its JSON text)
+_STRUCTURED_RESULT_OVERHEAD = len(codec.dumps(_tool_result(None, True))) - len("null")
+_TEXT_RESULT_OVERHEAD = len(codec.dumps(_wrap_text_content(""))) - len('""')
+
+
+def _page_limiter(name: str, cursor: Optional[str], versions: Any = None) -> Optional[Callable[[Any, int], Any]]:
+    if name == "directive/files.list":
+        # The tool resumes after the path cursor itself
+        return lambda payload, max_bytes: limit_keyed_list(payload, "files", max_bytes)
+    if name in _PAGED_FIELDS:
+        return lambda payload, max_bytes: limit_payload(payload, _PAGED_FIELDS[name], max_bytes, cursor, versions)
+    if name in _BUNDLE_TOOLS:
+        return lambda payload, max_bytes: limit_files(payload, _BUNDLE_FILES, max_bytes, versions)
+    return None
+
+
+def _limit_response(
+    name: str,
+    payload: Any,
+    cursor: Optional[str],
+    max_bytes: Optional[int],
+    structured: bool = True,
+    measure: bool = False,
+    versions: Any = None,
+) -> Tuple[Any, Optional[int]]:
+    """Cut ``payload`` at its page boundaries so the tool result sent for it fits ``max_bytes``.
+
+    ``max_bytes`` is ``DEFAULT_MAX_RESPONSE_BYTES`` when None and 0 for no
+    limit. It applies to the result as the client receives it: clients
+    without ``structured`` content get the payload JSON-encoded inside a text
+    item, where escaping makes it larger, so a page is cut again until that
+    form fits. Sizes are computed from the payload, so the result is only
+    encoded when it is sent. ``versions`` come from ``track_versions`` around
+    the tool call. Returns the payload to send and, when it was measured anyway
+    or ``measure`` is set, the encoded size of its tool result.
+    """
+    if max_bytes is None:
+        max_bytes = DEFAULT_MAX_RESPONSE_BYTES
+    limit = _page_limiter(name, cursor, versions)
+    if limit is None or not max_bytes:
+        result = payload if limit is None else limit(payload, 0)  # no limit: only the cursor applies
+        return result, _result_size(result, structured) if measure else None
+    if cursor is None:
+        size = _result_size(payload, structured)
+        if size <= max_bytes:
+            return payload, size
+    budget = max_bytes - (_result_size({}, structured) - len("{}"))
+    for _ in range(_FIT_ATTEMPTS):
+        result = limit(payload, max(budget, 1))
+        size = _result_size(result, structured)
+        if size <= max_bytes or budget <= 1:
             break
+        budget = budget * max_bytes // size - 1
+    return result, size
+
+
+def _report_deadline(name: str, budget: float, elapsed: float, outcome: str) -> None:
+    sys.stderr.write(f"directive: {name} missed its {budget:g}s deadline after {elapsed:.3f}s; {outcome}\n")
+    sys.stderr.flush()
+
+
+def _rev_argument(arguments: Dict[str, Any]) -> Optional[str]:
+    rev = arguments.get("rev")
+    if rev is not None and not isinstance(rev, str):
+        raise ValueError("rev must be a string")
+    return rev or None
+
+
+def _dispatch_tool(repo_root: Path, name: str, arguments: Dict[str, Any]) -> Any:
+    """Run a tool by name and return its JSON-serializable payload (shared by both runtimes)."""
+    if name == "directive/files.list":
+        cursor = arguments.get("cursor")
+        if cursor is not None and not isinstance(cursor, str):
+            raise ValueError("cursor must be a string")
+        return list_directive_files_page(repo_root, rev=_rev_argument(arguments), cursor=cursor)
+
+    if name == "directive/files.get":
+        path = arguments.get("path")
+        if not isinstance(path, str):
+            raise ValueError("path must be a string")
+        return {"path": path, "content": read_directive_file(repo_root, path, rev=_rev_argument(arguments))}
+
+    if name == "directive/files.section":
+        path = arguments.get("path")
+        if not isinstance(path, str):
+            raise ValueError("path must be a string")
+        headings = _heading_queries(arguments.get("heading"))
+        return read_directive_sections(repo_root, path, headings, rev=_rev_argument(arguments))
+
+    if name == "directive/specs.digest":
+        return specs_digest(repo_root)
+
+    if name == "directive/specs.changed":
+        since = arguments.get("since")
+        if not isinstance(since, str) or not since:
+            raise ValueError("since must be a non-empty string")
+        return specs_changed(repo_root, since)
+
+    if name == "directive/specs.create":
+        spec_name = arguments.get("name")
+        if not isinstance(spec_name, str):
+            raise ValueError("name must be a string")
+        return create_spec(repo_root, spec_name, docs=arguments.get("docs") or list(SCAFFOLD_TEMPLATES))
+
+    if name == "directive/templates.spec":
+        return build_template_bundle("spec_template.md", repo_root)
+
+    if name == "directive/templates.impact":
+        return build_template_bundle("impact_template.md", repo_root)
+
+    if name == "directive/templates.tdr":
+        return build_template_bundle("tdr_template.md", repo_root)
+
+    if name == "directive/server.status":
+        return server_status()
+
+    if name == "directive/server.log":
+        limit = arguments.get("limit")
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+            raise ValueError("limit must be a positive integer")
+        return request_log(limit)
+
+    raise ToolNotFound(f"Tool not found: {name}")
+
+
+def _complete_payload(outcome: Tuple[Any, Any]) -> bool:
+    # Tools only truncate their own payload when they run out of time (paging happens afterwards)
+    payload = outcome[0]
+    return not (isinstance(payload, dict) and payload.get("truncated"))
+
+
+def _execute_tool(flights: SingleFlight, repo_root: Path, name: str, arguments: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Run a tool and return its payload and field versions, sharing work with identical in-flight calls.
+
+    Calls are identical when the repository, tool name and canonicalized
+    arguments (sorted keys, ``None`` values dropped) match. Coalesced callers
+    receive the same payload object and must not mutate it. A payload the
+    tool truncated because the running call's deadline passed is only shared
+    with callers whose own deadline has passed too; the rest run the tool again.
+    The versions are what the tool noted for paging (see ``track_versions``).
+    """
+    arguments = {k: v for k, v in arguments.items() if v is not None}
+
+    def _run() -> Tuple[Any, Any]:
+        with track_versions() as versions:
+            return _dispatch_tool(repo_root, name, arguments), versions
+
+    if name in _UNCOALESCED_TOOLS:
+        return _run()
+    key = (str(repo_root), name, codec.dumps(arguments, sort_keys=True))
+    return flights.do(key, _run, complete=_complete_payload)
+
+
+def _execute_for_request(
+    token: CancelToken,
+    reporter: Optional[ProgressReporter],
+    flights: SingleFlight,
+    repo_root: Path,
+    name: str,
+    arguments: Dict[str, Any],
+    deadlines: Optional[Dict[str, float]] = None,
+    max_response_bytes: Optional[int] = None,
+    structured: bool = True,
+) -> Any:
+    """``_execute_tool`` on behalf of one request.
+
+    ``token`` is checked at the tools' cooperative checkpoints (raising
+    ``Cancelled``) and long operations report to ``reporter`` when the request
+    carried a progress token. The call's time budget comes from ``deadlines``
+    (``DEFAULT_TOOL_DEADLINES`` when None) and the ``deadlineMs`` argument;
+    running out of it yields a truncated payload where the tool supports one,
+    and ``DeadlineExceeded`` otherwise. Either way the miss is logged to stderr.
+    The payload is then cut so its tool result (``structured`` or as text)
+    fits ``max_response_bytes`` (see ``_limit_response``); the ``cursor`` of paged tools selects the page, so calls for different
+    pages of one result still share its computation. When a request log is
+    active the call is recorded to it.
+    """
+    log = active_log()
+    if log is None:
+        return _run_for_request(
+            token, reporter, flights, repo_root, name, arguments, deadlines, max_response_bytes, structured
+        )[0]
+    started = time.monotonic()
+    outcome, size = "error", None
+    with count_cache_lookups() as lookups:
+        try:
+            payload, size = _run_for_request(
+                token, reporter, flights, repo_root, name, arguments, deadlines, max_response_bytes, structured, measure=True
+            )
+            outcome = "truncated" if isinstance(payload, dict) and payload.get("truncated") else "ok"
+            return payload
+        except Cancelled:
+            outcome = "cancelled"
+            raise
+        except DeadlineExceeded:
+            outcome = "deadline"
+            raise
+        finally:
+            log.record(name, arguments, time.monotonic() - started, outcome, size, lookups.hits, lookups.misses)
+
+
+def _run_for_request(
+    token: CancelToken,
+    reporter: Optional[ProgressReporter],
+    flights: SingleFlight,
+    repo_root: Path,
+    name: str,
+    arguments: Dict[str, Any],
+    deadlines: Optional[Dict[str, float]],
+    max_response_bytes: Optional[int],
+    structured: bool = True,
+    measure: bool = False,
+) -> Tuple[Any, Optional[int]]:
+    arguments = dict(arguments)
+    budget = _deadline_seconds(deadlines, name, arguments.pop("deadlineMs", None))
+    cursor = arguments.pop("cursor", None) if name in _PAGED_FIELDS else None
+    if cursor is not None and not isinstance(cursor, str):
+        raise ValueError("cursor must be a string")
+    started = time.monotonic()
+    if budget is not None:
+        token.deadline = started + budget
+    with cancel_scope(token), progress_scope(reporter), batch_publishes():
+        try:
+            checkpoint()  # cancelled while still queued
+            payload, versions = _execute_tool(flights, repo_root, name, arguments)
+        except DeadlineExceeded:
+            if budget is None:
+                raise
+            _report_deadline(name, budget, time.monotonic() - started, "returned a timeout error")
+            raise DeadlineExceeded(f"Deadline exceeded: {name} did not finish within {budget:g}s") from None
+    if budget is not None and token.expired and isinstance(payload, dict) and payload.get("truncated"):
+        _report_deadline(name, budget, time.monotonic() - started, "returned a partial result")
+    return _limit_response(name, payload, cursor, max_response_bytes, structured, measure, versions)
+
+
+def _progress_params(progress_token: Any, progress: float, total: Optional[float], message: Optional[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"progressToken": progress_token, "progress": progress}
+    if total is not None:
+        params["total"] = total
+    if message is not None:
+        params["message"] = message
+    return params
+
+
+def _report_coalescing(flights: SingleFlight) -> None:
+    if flights.executed:
+        sys.stderr.write(flights.summary() + "\n")
+        sys.stderr.flush()
+
+
+class DirectiveService:
+    """Per-process state behind both server runtimes.
+
+    Created once per server with the repository and directive/ roots resolved
+    up front, the coalescing table and the tool execution limits. Legacy
+    sessions and the FastMCP tools and resource handlers all go through it, so
+    state kept here is shared by every connection of either runtime.
+    """
+
+    def __init__(
+        self,
+        repo_root: Optional[Path] = None,
+        flights: Optional[SingleFlight] = None,
+        deadlines: Optional[Dict[str, float]] = None,
+        max_response_bytes: Optional[int] = None,
+    ) -> None:
+        self.repo_root = (Path.cwd() if repo_root is None else Path(repo_root)).absolute()
+        self.directive_root = self.repo_root / DIRECTIVE_DIRNAME
+        self.flights = flights if flights is not None else SingleFlight()
+        self.deadlines = deadlines
+        self.max_response_bytes = max_response_bytes
+        # Resource watchers shared by every session, by polling interval
+        self._watchers: Dict[float, SharedWatcher] = {}
+        self._watchers_lock = threading.Lock()
+
+    def call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        token: Optional[CancelToken] = None,
+        reporter: Optional[ProgressReporter] = None,
+        structured: bool = True,
+    ) -> Any:
+        """Run a tool on behalf of one request (see ``_execute_for_request``).
+
+        ``structured`` tells whether the client receives the payload as
+        structuredContent or as text, which the response size limit measures.
+        """
+        return _execute_for_request(
+            token if token is not None else CancelToken(),
+            reporter,
+            self.flights,
+            self.repo_root,
+            name,
+            arguments,
+            self.deadlines,
+            self.max_response_bytes,
+            structured,
+        )
+
+    def list_resources(self) -> List[Dict[str, Any]]:
+        return list_resources(self.repo_root)
+
+    def read_resource(self, uri: str) -> Dict[str, Any]:
+        return read_resource(self.repo_root, uri)
+
+    def watch(
+        self, on_updated: Callable[[List[str]], None], on_list_changed: Callable[[], None], interval: float = 1.0
+    ) -> Callable[[], None]:
+        """Report changes under directive/ to the callbacks until the returned function is called.
+
+        Every caller with the same ``interval`` shares one watcher, which only
+        polls while at least one of them is registered.
+        """
+        with self._watchers_lock:
+            watcher = self._watchers.get(interval)
+            if watcher is None:
+                watcher = self._watchers[interval] = SharedWatcher(self.repo_root, interval)
+        return partial(watcher.remove, watcher.add(on_updated, on_list_changed))
+
+    def prewarm(self, targets: Any = PREWARM_TARGETS) -> Optional[threading.Thread]:
+        return start_prewarm(self.repo_root, targets)
+
+    def report_coalescing(self) -> None:
+        _report_coalescing(self.flights)
+
+
+class _Session:
+    """Protocol state for one client connection of the legacy server, independent of the transport."""
+
+    def __init__(
+        self,
+        service: DirectiveService,
+        out: _MessageWriter,
+        watch_interval: float = 1.0,
+        recorder: Optional[TrafficRecorder] = None,
+        monitor: Optional[IdleMonitor] = None,
+    ) -> None:
+        self.service = service
+        self.out = out
+        self.watch_interval = watch_interval
+        self.recorder = recorder
+        self.monitor = monitor
+        # Resource subscriptions; the service's watcher reports to this session while there are any.
+        self.subscriptions = Subscriptions()
+        self._unwatch: Optional[Callable[[], None]] = None
+        # Negotiated at initialize; clients that never initialize get text content.
+        self.protocol_version: Optional[str] = None
+        # Tool calls run on worker threads so concurrent requests overlap (and identical ones coalesce).
+        self.pool = ThreadPoolExecutor(max_workers=_TOOL_WORKERS, thread_name_prefix="directive-tool")
+        # Cancellation tokens of tool calls not yet answered, by request id
+        self._tokens: Dict[Any, CancelToken] = {}
+        self._tokens_lock = threading.Lock()
+        self.cancelled = 0
+
+    def _on_updated(self, uris: List[str]) -> None:
+        for uri in self.subscriptions.filter(uris):
+            self.out.notify("notifications/resources/updated", {"uri": uri})
+
+    def _on_list_changed(self) -> None:
+        self.out.notify("notifications/resources/list_changed")
+
+    def _update_watch(self) -> None:
+        if self.subscriptions and self._unwatch is None:
+            self._unwatch = self.service.watch(self._on_updated, self._on_list_changed, interval=self.watch_interval)
+        elif not self.subscriptions and self._unwatch is not None:
+            self._unwatch()
+            self._unwatch = None
+
+    def _run_tool(self, id_value: Any, params: Dict[str, Any], token: CancelToken) -> Optional[Callable[[], None]]:
+        # Returns the reply to send, or None when the call was cancelled
+        try:
+            name = params.get("name")
+            arguments = params.get("arguments") or {}
+            if not isinstance(name, str):
+                raise ValueError("name must be a string")
+            progress_token = (params.get("_meta") or {}).get("progressToken")
+            reporter = None
+            if isinstance(progress_token, (str, int)):
+                reporter = ProgressReporter(
+                    lambda progress, total, message: self.out.notify(
+                        "notifications/progress", _progress_params(progress_token, progress, total, message)
+                    )
+                )
+            structured = _supports_structured_content(self.protocol_version)
+            payload = self.service.call_tool(name, arguments, token, reporter, structured)
+            return partial(self.out.result, id_value, _tool_result(payload, structured))
+        except Cancelled:
+            return None
+        except DeadlineExceeded as e:
+            return partial(self.out.error, id_value, 1002, str(e))
+        except ToolNotFound as e:
+            return partial(self.out.error, id_value, -32601, str(e))
+        except FileNotFoundError as e:
+            return partial(self.out.error, id_value, 1001, str(e))
+        except Exception as e:  # pragma: no cover
+            return partial(self.out.error, id_value, -32000, "Server error", {"details": str(e)})
+
+    def _call_tool(self, id_value: Any, params: Dict[str, Any], tracked: bool = False, token: Optional[CancelToken] = None) -> None:
+        token = token if token is not None else CancelToken()
+        try:
+            reply = self._run_tool(id_value, params, token)
+            # A request cancelled after its work finished still gets no response
+            if reply is not None and not token.cancelled:
+                reply()
+        finally:
+            with self._tokens_lock:
+                if self._tokens.get(id_value) is token:
+                    del self._tokens[id_value]
+            if tracked:
+                self.monitor.end()  # type: ignore[union-attr]
+
+    def _cancel(self, request_id: Any) -> None:
+        if not isinstance(request_id, (str, int)):
+            return
+        with self._tokens_lock:
+            token = self._tokens.get(request_id)
+            if token is not None and not token.cancelled:
+                token.cancel()
+                self.cancelled += 1
+
+    def handle(self, msg: Dict[str, Any]) -> None:
+        if self.recorder is not None:
+            self.recorder.record(msg)
         id_value = msg.get("id")
         method = msg.get("method")
         params = msg.get("params") or {}
+        out = self.out
+        # Requests count as in flight until answered; tool calls finish on a worker thread
+        tracked = self.monitor is not None and "id" in msg
+        if tracked:
+            self.monitor.begin()  # type: ignore[union-attr]
+        elif self.monitor is not None:
+            self.monitor.touch()
 
         try:
             # MCP initialize: declare capabilities so clients know tools are available
@@ -172,103 +1038,675 @@ def serve_stdio(root: Path) -> int:
                         ver = _pkg_version("directive")  # type: ignore
                 except Exception:
                     pass
-                _result(
+                self.protocol_version = _negotiate_protocol(params.get("protocolVersion"))
+                out.result(
                     id_value,
                     {
-                        "capabilities": {"tools": {}},
+                        "protocolVersion": self.protocol_version,
+                        "capabilities": {"tools": {}, "resources": {"subscribe": True, "listChanged": True}},
                         "serverInfo": {"name": "directive", "version": ver},
                     },
                 )
 
             # MCP tool discovery
             elif method == "tools/list":
-                _result(id_value, {"tools": _tool_descriptors()})
+                out.result(id_value, {"tools": _tool_descriptors(_supports_structured_content(self.protocol_version))})
 
             # MCP tool execution
             elif method == "tools/call":
-                name = params.get("name")
-                arguments = params.get("arguments") or {}
-                if not isinstance(name, str):
-                    raise ValueError("name must be a string")
-
-                # Dispatch based on tool name
-                if name == "directive/files.list":
-                    files = list_directive_files(repo_root)
-                    _result(id_value, _wrap_text_content(json.dumps({"files": files})))
-
-                elif name == "directive/files.get":
-                    path = arguments.get("path")
-                    if not isinstance(path, str):
-                        raise ValueError("path must be a string")
-                    content = read_directive_file(repo_root, path)
-                    _result(id_value, _wrap_text_content(json.dumps({"path": path, "content": content})))
-
-                elif name == "directive/templates.spec":
-                    bundle = build_template_bundle("spec_template.md", repo_root)
-                    _result(id_value, _wrap_text_content(json.dumps(bundle)))
-
-                elif name == "directive/templates.impact":
-                    bundle = build_template_bundle("impact_template.md", repo_root)
-                    _result(id_value, _wrap_text_content(json.dumps(bundle)))
-
-                elif name == "directive/templates.tdr":
-                    bundle = build_template_bundle("tdr_template.md", repo_root)
-                    _result(id_value, _wrap_text_content(json.dumps(bundle)))
+                token = CancelToken()
+                if isinstance(id_value, (str, int)):
+                    with self._tokens_lock:
+                        self._tokens[id_value] = token
+                self.pool.submit(self._call_tool, id_value, params, tracked, token)
+                tracked = False
 
-                else:
-                    _error(id_value, -32601, f"Tool not found: {name}")
+            # Cancellation of an in-flight tool call; like every notification, never answered
+            elif method == "notifications/cancelled":
+                self._cancel(params.get("requestId"))
+
+            # MCP resources: directive/ files, with change subscriptions
+            elif method == "resources/list":
+                out.result(id_value, {"resources": self.service.list_resources()})
+
+            elif method == "resources/read":
+                uri = params.get("uri")
+                if not isinstance(uri, str):
+                    raise ValueError("uri must be a string")
+                out.result(id_value, {"contents": [self.service.read_resource(uri)]})
+
+            elif method == "resources/subscribe":
+                uri = params.get("uri")
+                if not isinstance(uri, str):
+                    raise ValueError("uri must be a string")
+                self.subscriptions.add(uri)
+                self._update_watch()
+                out.result(id_value, {})
+
+            elif method == "resources/unsubscribe":
+                uri = params.get("uri")
+                if not isinstance(uri, str):
+                    raise ValueError("uri must be a string")
+                self.subscriptions.discard(uri)
+                self._update_watch()
+                out.result(id_value, {})
 
             # Back-compat custom methods removed per new naming convention
-            else:
-                _error(id_value, -32601, f"Method not found: {method}")
+            elif "id" in msg:
+                out.error(id_value, -32601, f"Method not found: {method}")
         except FileNotFoundError as e:
-            _error(id_value, 1001, str(e))
+            if "id" in msg:
+                out.error(id_value, 1001, str(e))
         except Exception as e:  # pragma: no cover
-            _error(id_value, -32000, "Server error", {"details": str(e)})
+            if "id" in msg:
+                out.error(id_value, -32000, "Server error", {"details": str(e)})
+        finally:
+            if tracked:
+                self.monitor.end()  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        # Finish in-flight tool calls before exiting
+        self.pool.shutdown(wait=True)
+        if self._unwatch is not None:
+            self._unwatch()
+            self._unwatch = None
+
+
+def _service_for(root: Optional[Path], service: Optional[DirectiveService]) -> DirectiveService:
+    """``service``, or a new one for the repository whose directive/ directory is ``root``.
+
+    Passing both is allowed only when they agree.
+    """
+    if service is None:
+        if root is None:
+            raise TypeError("either root or service is required")
+        return DirectiveService(Path(root).parent)
+    if root is not None and Path(root).absolute() != service.directive_root:
+        raise ValueError(f"root {root} is not the service's directive/ directory ({service.directive_root})")
+    return service
+
+
+def serve_streams(
+    reader: BinaryIO,
+    writer: BinaryIO,
+    root: Optional[Path] = None,
+    watch_interval: float = 1.0,
+    recorder: Optional[TrafficRecorder] = None,
+    service: Optional[DirectiveService] = None,
+    monitor: Optional[IdleMonitor] = None,
+) -> int:
+    """Serve the legacy (Content-Length framed) protocol over a pair of binary streams until ``reader`` hits EOF.
+
+    Tools run through ``service``, or one created for ``root``, the
+    repository's directive/ directory (see ``_service_for``). Returns once
+    every in-flight tool call has been answered.
+    """
+
+    def _send_frame(frame: bytes) -> None:
+        writer.write(frame)
+        writer.flush()
+
+    session = _Session(_service_for(root, service), _MessageWriter(_send_frame), watch_interval, recorder, monitor)
+    try:
+        while True:
+            msg = _read_message(reader)
+            if msg is None:
+                break
+            session.handle(msg)
+    finally:
+        session.close()
+    return 0
+
+
+async def serve_streams_async(
+    reader: Any,
+    writer: Any,
+    root: Optional[Path] = None,
+    watch_interval: float = 1.0,
+    recorder: Optional[TrafficRecorder] = None,
+    service: Optional[DirectiveService] = None,
+    monitor: Optional[IdleMonitor] = None,
+) -> int:
+    """Async ``serve_streams`` for asyncio streams (``readline``/``readexactly`` and ``write``/``drain``).
+
+    Requests are handled off the event loop; responses are written (and
+    drained) by a task on the calling loop.
+    """
+    import asyncio
+
+    service = _service_for(root, service)
+    loop = asyncio.get_running_loop()
+    frames: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
 
+    async def _write_frames() -> None:
+        while True:
+            frame = await frames.get()
+            if frame is None:
+                break
+            writer.write(frame)
+            await writer.drain()
+
+    writer_task = asyncio.create_task(_write_frames())
+    out = _MessageWriter(lambda frame: loop.call_soon_threadsafe(frames.put_nowait, frame))
+    session = _Session(service, out, watch_interval, recorder, monitor)
+    try:
+        while True:
+            msg = await _read_message_async(reader)
+            if msg is None:
+                break
+            await asyncio.to_thread(session.handle, msg)
+    finally:
+        await asyncio.to_thread(session.close)
+        # Frames scheduled by the finished calls are queued ahead of the sentinel
+        frames.put_nowait(None)
+        await writer_task
     return 0
 
 
+class _StdinInput(io.RawIOBase):
+    """The stdin file descriptor, read by a daemon thread so ``end()`` can end a read in progress as end of input.
+
+    A read on stdin blocks and cannot be interrupted portably; reading it from
+    a thread of its own lets the stdio servers stop at any time and return
+    normally. The thread reads the descriptor directly, so it holds no lock
+    that would block interpreter shutdown.
+    """
+
+    def __init__(self, fd: int) -> None:
+        super().__init__()
+        self._chunks: Deque[bytes] = deque()
+        self._ready = threading.Condition()
+        self._ended = False
+        threading.Thread(target=self._pump, args=(fd,), name="directive-stdin", daemon=True).start()
+
+    def _pump(self, fd: int) -> None:
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                chunk = b""
+            with self._ready:
+                if chunk:
+                    self._chunks.append(chunk)
+                else:
+                    self._ended = True
+                self._ready.notify_all()
+            if not chunk:
+                return
+
+    def end(self) -> None:
+        """Report end of input to the current and every later read; unread input is dropped."""
+        with self._ready:
+            self._ended = True
+            self._chunks.clear()
+            self._ready.notify_all()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        with self._ready:
+            while not self._chunks and not self._ended:
+                self._ready.wait()
+            if not self._chunks:
+                return 0
+            chunk = self._chunks.popleft()
+            n = min(len(buffer), len(chunk))
+            buffer[:n] = chunk[:n]
+            if n < len(chunk):
+                self._chunks.appendleft(chunk[n:])
+            return n
+
+
+# stdin of the running stdio server, ended by ``idle_exit_handler``
+_STDIN: Optional[_StdinInput] = None
+
+
+def _stdin_reader() -> BinaryIO:
+    """Buffered stdin for the stdio servers: a ``_StdinInput`` where stdin is a real descriptor."""
+    global _STDIN
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        return sys.stdin.buffer
+    _STDIN = _StdinInput(fd)
+    return io.BufferedReader(_STDIN)  # type: ignore[return-value]
+
+
+def serve_stdio(
+    root: Optional[Path] = None,
+    watch_interval: float = 1.0,
+    recorder: Optional[TrafficRecorder] = None,
+    service: Optional[DirectiveService] = None,
+    monitor: Optional[IdleMonitor] = None,
+) -> int:
+    service = _service_for(root, service)
+    code = serve_streams(_stdin_reader(), sys.stdout.buffer, None, watch_interval, recorder, service, monitor)
+    service.report_coalescing()
+    return code
+
+
+def idle_exit_handler() -> Callable[[], None]:
+    """Return an ``IdleMonitor.on_exit`` callback that ends the stdio server's input.
+
+    The server then shuts down as at end of input: its serve call returns, and
+    the caller's cleanup (recording, request log) and the interpreter's own
+    exit (flushing stdout, atexit handlers) run as usual.
+    """
+
+    def _exit() -> None:
+        sys.stderr.write("Directive MCP server idle; exiting.\n")
+        if _STDIN is not None:
+            _STDIN.end()
+
+    return _exit
+
+
 # ---- FastMCP (preferred runtime in Cursor) ----
-def _build_fastmcp_app() -> Any:
+def _build_fastmcp_app(service: Optional[DirectiveService] = None) -> Any:
+    """FastMCP app serving ``service`` (by default, one for the current directory), or None without FastMCP."""
     if FastMCP is None:
         return None
+    import anyio  # FastMCP dependency
+
     app = FastMCP("directive")
+    service = service if service is not None else DirectiveService()
+
+    async def _run(name: str, **arguments: Any) -> Dict[str, Any]:
+        # Execute off the event loop so concurrent calls overlap and identical ones coalesce
+        token = CancelToken()
+        reporter = _fastmcp_progress_reporter(app)
+        structured = _fastmcp_client_structured(app)
+        try:
+            return await anyio.to_thread.run_sync(
+                lambda: service.call_tool(name, arguments, token, reporter, structured),  # type: ignore[union-attr]
+                abandon_on_cancel=True,
+            )
+        except anyio.get_cancelled_exc_class():
+            # notifications/cancelled: the abandoned worker stops at its next checkpoint
+            token.cancel()
+            raise
 
     @app.tool(name="directive/files.list")
-    def directive_files_list() -> str:  # type: ignore
-        files = list_directive_files(Path.cwd())
-        return json.dumps({"files": files})
+    async def directive_files_list(
+        rev: Optional[str] = None, cursor: Optional[str] = None, deadlineMs: Optional[int] = None
+    ) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/files.list", rev=rev, cursor=cursor, deadlineMs=deadlineMs)
 
     @app.tool(name="directive/files.get")
-    def directive_file_get(path: str) -> str:  # type: ignore
-        content = read_directive_file(Path.cwd(), path)
-        return json.dumps({"path": path, "content": content})
+    async def directive_file_get(
+        path: str, rev: Optional[str] = None, cursor: Optional[str] = None, deadlineMs: Optional[int] = None
+    ) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/files.get", path=path, rev=rev, cursor=cursor, deadlineMs=deadlineMs)
+
+    @app.tool(name="directive/files.section")
+    async def directive_file_section(
+        path: str,
+        heading: Union[str, List[str]],
+        rev: Optional[str] = None,
+        cursor: Optional[str] = None,
+        deadlineMs: Optional[int] = None,
+    ) -> Dict[str, Any]:  # type: ignore
+        return await _run(
+            "directive/files.section", path=path, heading=heading, rev=rev, cursor=cursor, deadlineMs=deadlineMs
+        )
+
+    @app.tool(name="directive/specs.digest")
+    async def directive_specs_digest(cursor: Optional[str] = None, deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/specs.digest", cursor=cursor, deadlineMs=deadlineMs)
+
+    @app.tool(name="directive/specs.changed")
+    async def directive_specs_changed(
+        since: str, cursor: Optional[str] = None, deadlineMs: Optional[int] = None
+    ) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/specs.changed", since=since, cursor=cursor, deadlineMs=deadlineMs)
+
+    @app.tool(name="directive/specs.create")
+    async def directive_specs_create(
+        name: str, docs: Optional[List[str]] = None, deadlineMs: Optional[int] = None
+    ) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/specs.create", name=name, docs=docs, deadlineMs=deadlineMs)
 
     @app.tool(name="directive/templates.spec")
-    def directive_spec_template() -> str:  # type: ignore
-        bundle = build_template_bundle("spec_template.md", Path.cwd())
-        return json.dumps(bundle)
+    async def directive_spec_template(deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/templates.spec", deadlineMs=deadlineMs)
 
     @app.tool(name="directive/templates.impact")
-    def directive_impact_template() -> str:  # type: ignore
-        bundle = build_template_bundle("impact_template.md", Path.cwd())
-        return json.dumps(bundle)
+    async def directive_impact_template(deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/templates.impact", deadlineMs=deadlineMs)
 
     @app.tool(name="directive/templates.tdr")
-    def directive_tdr_template() -> str:  # type: ignore
-        bundle = build_template_bundle("tdr_template.md", Path.cwd())
-        return json.dumps(bundle)
+    async def directive_tdr_template(deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/templates.tdr", deadlineMs=deadlineMs)
+
+    @app.tool(name="directive/server.status")
+    async def directive_server_status(deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/server.status", deadlineMs=deadlineMs)
+
+    @app.tool(name="directive/server.log")
+    async def directive_server_log(limit: Optional[int] = None, deadlineMs: Optional[int] = None) -> Dict[str, Any]:  # type: ignore
+        return await _run("directive/server.log", limit=limit, deadlineMs=deadlineMs)
 
+    _register_fastmcp_structured_results(app)
+    _register_fastmcp_resources(app, service)
     return app
 
 
+def _fastmcp_progress_reporter(app: Any) -> Optional[ProgressReporter]:
+    """Progress reporter for the current FastMCP request, or None when it carried no progress token."""
+    import anyio
+
+    try:
+        ctx = app.get_context()
+        meta = ctx.request_context.meta
+    except (LookupError, ValueError):
+        return None
+    if meta is None or meta.progressToken is None:
+        return None
+    # Called from the worker thread; the notification is sent on the event loop
+    return ProgressReporter(lambda progress, total, message: anyio.from_thread.run(ctx.report_progress, progress, total, message))
+
+
+# Longest wait at end of input for in-flight FastMCP requests to be answered
+_DRAIN_TIMEOUT = 30.0
+
+
+def run_fastmcp_stdio(app: Any, recorder: Optional[TrafficRecorder] = None, monitor: Optional[IdleMonitor] = None) -> None:
+    """Run a FastMCP app over stdio, optionally recording every incoming message.
+
+    At end of input the session is kept open until in-flight requests have
+    been answered; FastMCP would otherwise close it and drop their responses.
+    Requests are reported to ``monitor`` as they arrive and are answered. The
+    SDK answers cancelled requests with an error; that reply is dropped here,
+    as the protocol expects no response to a cancelled request.
+    """
+    import anyio
+    from mcp import types  # type: ignore
+    from mcp.server.stdio import stdio_server  # type: ignore
+
+    server = app._mcp_server
+    stdin = anyio.wrap_file(io.TextIOWrapper(_stdin_reader(), encoding="utf-8"))
+
+    async def _run() -> None:
+        async with stdio_server(stdin=stdin) as (read_stream, write_stream):
+            in_send, in_receive = anyio.create_memory_object_stream(0)
+            out_send, out_receive = anyio.create_memory_object_stream(0)
+            in_flight: set = set()
+            cancelled: set = set()
+            # Set once input has ended and every request it carried has been answered
+            drained = anyio.Event()
+            input_ended = False
+
+            async def _forward_input() -> None:
+                nonlocal input_ended
+                async with read_stream, in_send:
+                    async for item in read_stream:
+                        if not isinstance(item, Exception):
+                            if recorder is not None:
+                                recorder.record(item.message.model_dump(by_alias=True, mode="json", exclude_none=True))
+                            if isinstance(item.message.root, types.JSONRPCRequest):
+                                if monitor is not None and item.message.root.id not in in_flight:
+                                    monitor.begin()
+                                in_flight.add(item.message.root.id)
+                            else:
+                                if monitor is not None:
+                                    monitor.touch()
+                                root = item.message.root
+                                if isinstance(root, types.JSONRPCNotification) and root.method == "notifications/cancelled":
+                                    request_id = (root.params or {}).get("requestId")
+                                    if request_id in in_flight:
+                                        cancelled.add(request_id)
+                        await in_send.send(item)
+                    input_ended = True
+                    if in_flight:
+                        with anyio.move_on_after(_DRAIN_TIMEOUT):
+                            await drained.wait()
+
+            async def _forward_output() -> None:
+                # Closing write_stream lets the stdio transport shut down
+                async with out_receive, write_stream:
+                    async for item in out_receive:
+                        if isinstance(item.message.root, (types.JSONRPCResponse, types.JSONRPCError)):
+                            request_id = item.message.root.id
+                            if request_id in in_flight:
+                                in_flight.discard(request_id)
+                                if monitor is not None:
+                                    monitor.end()
+                                if input_ended and not in_flight:
+                                    drained.set()
+                            if request_id in cancelled:
+                                cancelled.discard(request_id)
+                                continue
+                        await write_stream.send(item)
+
+            async with anyio.create_task_group() as outer:
+                outer.start_soon(_forward_output)
+                async with anyio.create_task_group() as inner:
+                    inner.start_soon(_forward_input)
+                    await server.run(in_receive, out_send, server.create_initialization_options())
+                    inner.cancel_scope.cancel()
+                # Let the last responses reach stdout before the transport closes
+                await out_send.aclose()
+
+    anyio.run(_run)
+
+
+def _register_fastmcp_structured_results(app: Any) -> None:
+    """Send tool payloads once, in the form the client negotiated, as the legacy server does.
+
+    FastMCP always adds an indented JSON text copy of structured results, and
+    always sends structuredContent and output schemas; the low-level handlers
+    are replaced so the text copy is only produced for clients that predate
+    structuredContent, and those clients see neither structuredContent nor
+    output schemas. Tools still run (with argument validation) through
+    FastMCP's tool manager.
+
+    FastMCP's public API fixes a tool's output form at registration, not per
+    client, so this reaches into its internals (``_mcp_server``,
+    ``_tool_manager``, ``request_handlers``). The ``mcp`` dependency is pinned
+    to the minor release they were checked against, and
+    ``test_fastmcp_internals_used_by_the_overrides_exist`` fails when one goes.
+    """
+    from mcp import types  # type: ignore
+
+    server = app._mcp_server
+    for name, schema in _OUTPUT_SCHEMAS.items():
+        tool = app._tool_manager.get_tool(name)
+        if tool is not None:
+            tool.fn_metadata.output_schema = schema
+
+    # FastMCP validates arguments against each tool's signature
+    @server.call_tool(validate_input=False)
+    async def _call_tool(name: str, arguments: Dict[str, Any]) -> Any:
+        payload = await app._tool_manager.call_tool(name, arguments, context=app.get_context())
+        if _fastmcp_client_structured(app):
+            return [], payload
+        return [types.TextContent(type="text", text=codec.dumps_str(payload))], payload
+
+    # The payload is still validated against the output schema before the structured copy is dropped
+    validated = server.request_handlers[types.CallToolRequest]
+
+    async def _handle_call_tool(request: Any) -> Any:
+        result = await validated(request)
+        if isinstance(result.root, types.CallToolResult) and not _fastmcp_client_structured(app):
+            result.root.structuredContent = None
+        return result
+
+    server.request_handlers[types.CallToolRequest] = _handle_call_tool
+
+    listed = server.request_handlers[types.ListToolsRequest]
+
+    async def _handle_list_tools(request: Any) -> Any:
+        result = await listed(request)
+        if isinstance(result.root, types.ListToolsResult) and not _fastmcp_client_structured(app):
+            # Copies: the listed tools are cached for output validation
+            result.root.tools = [tool.model_copy(update={"outputSchema": None}) for tool in result.root.tools]
+        return result
+
+    server.request_handlers[types.ListToolsRequest] = _handle_list_tools
+
+
+def _fastmcp_client_structured(app: Any) -> bool:
+    """Whether the client of the current FastMCP request negotiated structuredContent."""
+    try:
+        client = app._mcp_server.request_context.session.client_params
+    except LookupError:
+        return True
+    return _supports_structured_content(str(client.protocolVersion) if client is not None else None)
+
+
+class _ResourceSessions:
+    """FastMCP sessions that use resources, each with its own subscriptions.
+
+    Notifications are sent from the watcher thread by scheduling them on each
+    session's event loop; a session whose loop has closed, or whose send
+    fails (it disconnected), is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: Dict[int, Tuple[Any, Any, Subscriptions]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, session: Any, loop: Any) -> Subscriptions:
+        """Register ``session`` (served on ``loop``) if needed; returns its subscriptions."""
+        with self._lock:
+            entry = self._sessions.get(id(session))
+            if entry is None or entry[0] is not session:
+                entry = self._sessions[id(session)] = (session, loop, Subscriptions())
+            return entry[2]
+
+    def subscriptions(self, session: Any) -> Optional[Subscriptions]:
+        with self._lock:
+            entry = self._sessions.get(id(session))
+        return entry[2] if entry is not None and entry[0] is session else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def subscribed(self) -> bool:
+        """Whether any session has a subscription."""
+        with self._lock:
+            return any(subscriptions for _, _, subscriptions in self._sessions.values())
+
+    def _drop(self, session: Any) -> None:
+        with self._lock:
+            entry = self._sessions.get(id(session))
+            if entry is not None and entry[0] is session:
+                del self._sessions[id(session)]
+
+    def _schedule(self, session: Any, loop: Any, send: Callable[[], Any]) -> None:
+        import asyncio
+
+        if loop.is_closed():
+            self._drop(session)
+            return
+        coro = send()
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+        except RuntimeError:  # the loop closed meanwhile
+            coro.close()
+            self._drop(session)
+            return
+
+        def _done(future: Any) -> None:
+            if future.cancelled() or future.exception() is not None:
+                self._drop(session)
+
+        future.add_done_callback(_done)
+
+    def updated(self, uris: List[str], send: Callable[[Any, str], Any]) -> None:
+        """Schedule ``send(session, uri)`` for each of ``uris`` a session subscribed to."""
+        with self._lock:
+            entries = list(self._sessions.values())
+        for session, loop, subscriptions in entries:
+            for uri in subscriptions.filter(uris):
+                self._schedule(session, loop, lambda s=session, u=uri: send(s, u))
+
+    def broadcast(self, send: Callable[[Any], Any]) -> None:
+        """Schedule ``send(session)`` for every session."""
+        with self._lock:
+            entries = list(self._sessions.values())
+        for session, loop, _ in entries:
+            self._schedule(session, loop, lambda s=session: send(s))
+
+
+def _register_fastmcp_resources(app: Any, service: DirectiveService, watch_interval: float = 1.0) -> None:
+    """Serve directive/ files as resources on the FastMCP runtime, with subscriptions.
+
+    FastMCP only lists statically registered resources and does not advertise
+    subscriptions, so the low-level handlers are installed directly. The
+    service's watcher reports changes while any session has a subscription.
+    """
+    import asyncio
+
+    from mcp import types  # type: ignore
+    from mcp.server.lowlevel.helper_types import ReadResourceContents  # type: ignore
+    from pydantic import AnyUrl  # type: ignore
+
+    server = app._mcp_server
+    sessions = _ResourceSessions()
+    state: Dict[str, Any] = {"unwatch": None}
+    lock = threading.Lock()
+
+    def _on_updated(uris: List[str]) -> None:
+        sessions.updated(uris, lambda session, uri: session.send_resource_updated(AnyUrl(uri)))
+
+    def _on_list_changed() -> None:
+        sessions.broadcast(lambda session: session.send_resource_list_changed())
+
+    def _track_session() -> Subscriptions:
+        return sessions.track(server.request_context.session, asyncio.get_running_loop())
+
+    def _update_watch() -> None:
+        with lock:
+            subscribed = sessions.subscribed()
+            if subscribed and state["unwatch"] is None:
+                state["unwatch"] = service.watch(_on_updated, _on_list_changed, interval=watch_interval)
+            elif not subscribed and state["unwatch"] is not None:
+                state["unwatch"]()
+                state["unwatch"] = None
+
+    @server.list_resources()
+    async def _list_resources() -> List[Any]:
+        _track_session()
+        return [types.Resource(**r) for r in service.list_resources()]
+
+    @server.read_resource()
+    async def _read_resource(uri: Any) -> List[Any]:
+        r = service.read_resource(str(uri))
+        return [ReadResourceContents(content=r["text"], mime_type=r["mimeType"])]
+
+    @server.subscribe_resource()
+    async def _subscribe(uri: Any) -> None:
+        _track_session().add(str(uri))
+        _update_watch()
+
+    @server.unsubscribe_resource()
+    async def _unsubscribe(uri: Any) -> None:
+        subscriptions = sessions.subscriptions(server.request_context.session)
+        if subscriptions is not None:
+            subscriptions.discard(str(uri))
+            _update_watch()
+
+    base_options = server.create_initialization_options
+
+    def _initialization_options(*args: Any, **kwargs: Any) -> Any:
+        options = base_options(*args, **kwargs)
+        if options.capabilities.resources is not None:
+            options.capabilities.resources.subscribe = True
+            options.capabilities.resources.listChanged = True
+        return options
+
+    server.create_initialization_options = _initialization_options
+
+
 if __name__ == "__main__":  # pragma: no cover
     app = _build_fastmcp_app()
     if app is None:
         # Fallback to legacy server (should not happen in Cursor execution)
         serve_stdio(root=Path.cwd().joinpath("directive"))
     else:
-        app.run("stdio")
+        run_fastmcp_stdio(app)
 
 
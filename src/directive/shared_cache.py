@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import codec
+from .requestlog import note_cache_lookup
+
+try:  # POSIX only; the shared cache is disabled where flock is unavailable
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+
+# Cross-process cache shared by every server on the host that serves the same
+# repository. The segment file under .directive/cache/ is mapped read-only by
+# each process, so file contents live once in the page cache instead of once
+# per process heap. The segment is an append-only log of records: writers
+# take an exclusive flock and append new entries (a later record replaces an
+# earlier one with the same key), and readers index only the records added
+# since they last looked. Entries carry the stat signature they were read
+# with and are validated against the file on every lookup, like the
+# in-process caches.
+#
+# Misses are not published one at a time: inside ``batch_publishes()`` (a
+# tool call, the prewarm pass) they are staged and appended in one write when
+# the block ends. A publish that would take the segment over
+# ``_MAX_SEGMENT_BYTES`` compacts it instead: the current entries are copied
+# from the mapping into a new segment, shedding replaced records, entries of
+# changed or deleted files and then the least recently used, and the new file
+# is renamed into place. Readers notice the new inode and remap.
+#
+# Layout: magic | records, each: lengths (key, meta, blob) | key | meta (JSON) | blob
+
+CACHE_DIRNAME = os.path.join(".directive", "cache")
+SEGMENT_NAME = "segment.v2"
+_MAGIC = b"DIRSEG02"
+_RECORD = struct.Struct("<IIQ")
+# Upper bound on the segment file; past it, publishing compacts the segment
+_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+# Share of the cap a compacted segment is cut to, so compactions stay rare
+_COMPACT_RATIO = 0.75
+# Staged updates past this size are published before the batch ends
+_BATCH_FLUSH_BYTES = 8 * 1024 * 1024
+
+Entry = Tuple[Dict[str, Any], Any]
+
+
+def shared_cache_available() -> bool:
+    return fcntl is not None and hasattr(mmap, "ACCESS_READ")
+
+
+def _record(key: str, meta: Dict[str, Any], blob: Any) -> List[Any]:
+    key_bytes = key.encode("utf-8")
+    meta_bytes = codec.dumps(meta)
+    return [_RECORD.pack(len(key_bytes), len(meta_bytes), len(blob)), key_bytes, meta_bytes, blob]
+
+
+class SharedSegment:
+    """A memory-mapped key/value segment: ``key -> (meta, bytes)``."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory / SEGMENT_NAME
+        self.lock_path = directory / (SEGMENT_NAME + ".lock")
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._inode: Optional[int] = None
+        # key -> (meta, blob offset, blob length), least recently published first
+        self._index: Dict[str, Tuple[Dict[str, Any], int, int]] = {}
+        # End of the last complete record indexed
+        self._end = 0
+        # Keys this process read since its last publish, least recent first
+        self._touched: Dict[str, None] = {}
+        self.remaps = 0
+        self.publishes = 0
+        self.compactions = 0
+
+    def _refresh(self) -> None:
+        # Called with self._lock held; maps records appended since the last
+        # look, or the whole file when it was replaced
+        try:
+            fh = open(self.path, "rb")
+        except FileNotFoundError:
+            self._close_map()
+            return
+        with fh:
+            st = os.fstat(fh.fileno())
+            if st.st_ino == self._inode and st.st_size == (len(self._map) if self._map is not None else 0):
+                return
+            if st.st_ino != self._inode or st.st_size < self._end:
+                self._close_map()
+            if st.st_size < len(_MAGIC):
+                return
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map is None and mm[:len(_MAGIC)] != _MAGIC:
+            mm.close()
+            return
+        if self._map is not None:
+            self._release(self._map)
+        else:
+            self._end = len(_MAGIC)
+        self._map, self._inode = mm, st.st_ino
+        self._index_records()
+        self.remaps += 1
+
+    def _index_records(self) -> None:
+        mm, pos = self._map, self._end
+        assert mm is not None
+        size = len(mm)
+        while pos + _RECORD.size <= size:
+            key_len, meta_len, blob_len = _RECORD.unpack_from(mm, pos)
+            key_start = pos + _RECORD.size
+            blob_start = key_start + key_len + meta_len
+            if blob_start + blob_len > size:
+                break  # being appended, or torn by a crash (the next writer cuts it off)
+            try:
+                key = str(mm[key_start:key_start + key_len], "utf-8")
+                meta = codec.loads(mm[key_start + key_len:blob_start])
+            except ValueError:
+                break
+            self._index.pop(key, None)
+            self._index[key] = (meta, blob_start, blob_len)
+            pos = blob_start + blob_len
+        self._end = pos
+
+    @staticmethod
+    def _release(mm: mmap.mmap) -> None:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes away with the last one
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._release(self._map)
+        self._map, self._inode, self._index, self._end = None, None, {}, 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], memoryview]]:
+        """``(meta, view)`` for ``key``; the view points into the shared mapping (no copy)."""
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(key)
+            if entry is None or self._map is None:
+                return None
+            self._touched.pop(key, None)
+            self._touched[key] = None
+            meta, start, length = entry
+            return meta, memoryview(self._map)[start:start + length]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def publish(self, updates: Dict[str, Entry], live: Optional[Callable[[str, Dict[str, Any]], bool]] = None) -> None:
+        """Add ``updates`` to the segment (replacing existing keys) under the writer lock.
+
+        They are appended, unless that would take the segment over
+        ``_MAX_SEGMENT_BYTES``; then the segment is compacted to a share of it,
+        dropping entries for which ``live(key, meta)`` is False first, then the
+        least recently used ones (publish order, refreshed by this process's reads).
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        ignore = self.directory / ".gitignore"
+        if not ignore.exists():
+            ignore.write_text("*\n", encoding="utf-8")
+        records = [part for key, (meta, blob) in updates.items() for part in _record(key, meta, blob)]
+        added = sum(len(part) for part in records)
+        with open(self.lock_path, "a+b") as lock_fh:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)  # type: ignore[union-attr]
+            try:
+                with self._lock:
+                    self._refresh()
+                    end = self._end
+                    touched, self._touched = list(self._touched), {}
+                if self._map is not None and end + added <= _MAX_SEGMENT_BYTES:
+                    with open(self.path, "r+b") as fh:
+                        fh.seek(end)
+                        fh.writelines(records)
+                        fh.truncate()  # drops a torn record left by a writer that crashed
+                else:
+                    self._compact(updates, touched, live)
+            finally:
+                fcntl.flock(lock_fh.fileno(), fcntl.LOCK_UN)  # type: ignore[union-attr]
+        self.publishes += 1
+
+    def _compact(
+        self,
+        updates: Dict[str, Entry],
+        touched: List[str],
+        live: Optional[Callable[[str, Dict[str, Any]], bool]],
+    ) -> None:
+        # Called under the writer lock: write the surviving entries (and
+        # ``updates``) to a new segment and rename it into place. Also creates
+        # the segment, or replaces one that is not a segment.
+        with self._lock:
+            view = memoryview(self._map) if self._map is not None else None
+            index = dict(self._index)
+        try:
+            entries: Dict[str, Entry] = {}
+            if view is not None:
+                entries = {key: (meta, view[start:start + length]) for key, (meta, start, length) in index.items() if key not in updates}
+            for key in touched:
+                if key in entries:
+                    entries[key] = entries.pop(key)
+            entries.update(updates)
+            entries = _fit(entries, live, int(_MAX_SEGMENT_BYTES * _COMPACT_RATIO))
+            tmp = self.directory / f".{SEGMENT_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "wb") as fh:
+                    fh.write(_MAGIC)
+                    for key, (meta, blob) in entries.items():
+                        fh.writelines(_record(key, meta, blob))
+                os.replace(tmp, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        finally:
+            if view is not None:
+                view.release()
+                self.compactions += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_map()
+
+
+def _entry_size(key: str, meta: Dict[str, Any], blob: Any) -> int:
+    return _RECORD.size + len(key.encode("utf-8")) + len(codec.dumps(meta)) + len(blob)
+
+
+def _fit(entries: Dict[str, Entry], live: Optional[Callable[[str, Dict[str, Any]], bool]], limit: int) -> Dict[str, Entry]:
+    """Evict from ``entries`` (dead first, then least recently used) until the segment fits ``limit``."""
+    sizes = {key: _entry_size(key, meta, blob) for key, (meta, blob) in entries.items()}
+    total = len(_MAGIC) + sum(sizes.values())
+    if total <= limit:
+        return entries
+    if live is not None:
+        for key, (meta, _) in list(entries.items()):
+            if not live(key, meta):
+                total -= sizes.pop(key)
+                del entries[key]
+    for key in list(entries):
+        if total <= limit:
+            break
+        total -= sizes.pop(key)
+        del entries[key]
+    return entries
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.updates: Dict["SharedFiles", Dict[str, Entry]] = {}
+        self.size = 0
+
+    def stage(self, shared: "SharedFiles", key: str, entry: Entry) -> None:
+        self.updates.setdefault(shared, {})[key] = entry
+        self.size += len(entry[1])
+        if self.size > _BATCH_FLUSH_BYTES:
+            self.flush()
+
+    def lookup(self, shared: "SharedFiles", key: str) -> Optional[Entry]:
+        return self.updates.get(shared, {}).get(key)
+
+    def flush(self) -> None:
+        updates, self.updates, self.size = self.updates, {}, 0
+        for shared, entries in updates.items():
+            shared._publish(entries)
+
+
+_BATCH: ContextVar[Optional[_Batch]] = ContextVar("directive_shared_batch", default=None)
+
+
+@contextmanager
+def batch_publishes() -> Iterator[None]:
+    """Publish what shared caches read inside the block in one rewrite per segment, when it ends.
+
+    Nested blocks join the outermost one.
+    """
+    if _BATCH.get() is not None:
+        yield
+        return
+    batch = _Batch()
+    reset = _BATCH.set(batch)
+    try:
+        yield
+    finally:
+        _BATCH.reset(reset)
+        batch.flush()
+
+
+class SharedFiles:
+    """File contents and directory listings under one repository, backed by a ``SharedSegment``."""
+
+    def __init__(self, repo_root: Path) -> None:
+        self.repo_root = Path(os.path.abspath(repo_root))
+        # Callers pass both resolved and unresolved paths; accept either spelling of the root
+        self._prefixes = sorted({os.path.abspath(repo_root) + os.sep, os.path.realpath(repo_root) + os.sep}, key=len, reverse=True)
+        self.segment = SharedSegment(self.repo_root / CACHE_DIRNAME)
+        self.hits = 0
+        self.misses = 0
+
+    def covers(self, path: str) -> bool:
+        return any(path.startswith(prefix) for prefix in self._prefixes)
+
+    def _key(self, kind: str, path: str) -> str:
+        for prefix in self._prefixes:
+            if path.startswith(prefix):
+                return f"{kind}:{path[len(prefix):]}"
+        return f"{kind}:{path}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.repo_root, key.split(":", 1)[1])
+
+    def _live(self, key: str, meta: Dict[str, Any]) -> bool:
+        """Whether the file (or listed directory) behind an entry is still as it was cached."""
+        path = self._path(key)
+        if key.startswith("listing:"):
+            return os.path.isdir(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return [st.st_mtime_ns, st.st_ctime_ns, st.st_size] == list(meta.get("sig", ()))
+
+    def _get(self, key: str) -> Optional[Tuple[Dict[str, Any], Any]]:
+        batch = _BATCH.get()
+        staged = batch.lookup(self, key) if batch is not None else None
+        return staged if staged is not None else self.segment.get(key)
+
+    def _put(self, key: str, entry: Entry) -> None:
+        batch = _BATCH.get()
+        if batch is not None:
+            batch.stage(self, key, entry)
+        else:
+            self._publish({key: entry})
+
+    def _publish(self, updates: Dict[str, Entry]) -> None:
+        try:
+            self.segment.publish(updates, live=self._live)
+        except OSError:
+            pass  # read-only checkout or full disk: serve uncached
+
+    def read_text(self, path: str, sig: Tuple[int, int, int], load: Optional[Callable[[str], str]] = None) -> str:
+        """Contents of ``path`` as of ``sig``; on a miss ``load(path)`` reads it (in one read by default)."""
+        key = self._key("file", path)
+        hit = self._get(key)
+        if hit is not None and tuple(hit[0]["sig"]) == sig:
+            self.hits += 1
+            note_cache_lookup(True)
+            return str(hit[1], "utf-8")
+        self.misses += 1
+        note_cache_lookup(False)
+        if load is None:
+            with open(path, "r", encoding="utf-8") as fh:
+                text = fh.read()
+        else:
+            text = load(path)
+        self._put(key, ({"sig": list(sig)}, text.encode("utf-8")))
+        return text
+
+    def get_listing(self, root: str) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        hit = self._get(self._key("listing", root))
+        if hit is None:
+            return None
+        files = str(hit[1], "utf-8").split("\n") if len(hit[1]) else []
+        return {path: tuple(sig) for path, sig in hit[0]["dirs"].items()}, files
+
+    def put_listing(self, root: str, dir_sigs: Dict[str, Any], files: List[str]) -> None:
+        self._put(self._key("listing", root), ({"dirs": dir_sigs}, "\n".join(files).encode("utf-8")))
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .cancellation import Interrupted, deadline_passed, wait_event
+from .progress import ProgressFanout, current_reporter, progress_scope
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "partial", "progress")
+
+    def __init__(self, progress: ProgressFanout) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.partial = False
+        self.progress = progress
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls so they share one computation.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait and receive the same result (or exception). Nothing is
+    cached once the call completes, so later calls always recompute. A waiter
+    can be cancelled on its own; when the running call is cancelled (or runs
+    out of time) instead, its waiters start over rather than inherit that.
+    The same goes for a result that ``complete`` rejects as partial (cut short
+    by the running call's deadline), except for waiters out of time themselves.
+    Progress the running call reports (see ``progress.operation``) reaches
+    every waiter's reporter as well as its own.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], complete: Optional[Callable[[Any], bool]] = None) -> Any:
+        reporter = current_reporter()
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if call is None:
+                    call = self._calls[key] = _Call(ProgressFanout(reporter))
+                    self.executed += 1
+                else:
+                    self.coalesced += 1
+                    if reporter is not None:
+                        call.progress.add(reporter)
+            if leader:
+                break
+            try:
+                wait_event(call.done)
+            finally:
+                if reporter is not None:
+                    call.progress.remove(reporter)
+            if isinstance(call.error, Interrupted) or (call.partial and not deadline_passed()):
+                with self._lock:
+                    self.coalesced -= 1
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            with progress_scope(call.progress.reporter):
+                call.value = fn()
+            call.partial = complete is not None and not complete(call.value)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def summary(self) -> str:
+        total = self.executed + self.coalesced
+        return f"directive: coalesced {self.coalesced} of {total} tool calls ({self.executed} executed)"
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import os
+import re
+import secrets
+import shutil
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .bundles import get_directive_root, read_template
+from .cancellation import checkpoint
+from .cache import Signature, stat_signature
+from .paging import note_version
+
+
+SPECS_DIRNAME = "specs"
+# Companion documents reported in the digest, in workflow order
+SPEC_DOCS = ("impact", "tdr", "implementation_summary")
+
+_FIELD = re.compile(r"^\*\*(Spec ID|Created|Feature name|One-line summary)\*\*:\s*(.*?)\s*$")
+_DATE_PREFIX = re.compile(r"^(\d{8})(?:-(.*))?$")
+_HEADER_MAX_LINES = 40
+
+
+def _parse_header(spec_path: str) -> Dict[str, str]:
+    """Read the metadata fields from the header of spec.md (stops at the first ``---`` rule)."""
+    fields: Dict[str, str] = {}
+    try:
+        with open(spec_path, "r", encoding="utf-8") as fh:
+            for i, line in enumerate(fh):
+                if i >= _HEADER_MAX_LINES or line.strip() == "---":
+                    break
+                m = _FIELD.match(line.strip())
+                if m:
+                    fields[m.group(1)] = m.group(2)
+    except (OSError, UnicodeDecodeError):
+        pass
+    return fields
+
+
+def _spec_record(dir_path: str, name: str) -> Dict[str, Any]:
+    fields = _parse_header(os.path.join(dir_path, "spec.md"))
+    m = _DATE_PREFIX.match(name)
+    prefix, slug = (m.group(1), m.group(2) or "") if m else ("", name)
+    fallback_date = f"{prefix[:4]}-{prefix[4:6]}-{prefix[6:]}" if prefix else ""
+    return {
+        "dir": name,
+        "path": f"directive/{SPECS_DIRNAME}/{name}",
+        "id": fields.get("Spec ID") or prefix,
+        "created": fields.get("Created") or fallback_date,
+        "feature": fields.get("Feature name") or slug.replace("-", " "),
+        "summary": fields.get("One-line summary", ""),
+        "docs": [doc for doc in SPEC_DOCS if os.path.isfile(os.path.join(dir_path, f"{doc}.md"))],
+    }
+
+
+def format_digest_line(record: Dict[str, Any]) -> str:
+    return " | ".join(
+        [record["dir"], record["id"], record["created"], record["feature"], record["summary"], ",".join(record["docs"]) or "-"]
+    )
+
+
+class SpecIndex:
+    """Incrementally maintained digest of ``directive/specs/*``.
+
+    Each spec directory is keyed by the stat signatures of the directory (which
+    changes when companion docs are added or removed) and of its spec.md; only
+    specs whose signatures changed are re-parsed on refresh. ``version``
+    changes whenever the records do.
+    """
+
+    def __init__(self, specs_root: Path) -> None:
+        self.specs_root = specs_root
+        self._entries: Dict[str, Tuple[Tuple[Signature, Optional[Signature]], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.reparsed = 0
+        self._token = secrets.token_hex(4)
+        self._generation = 0
+
+    @staticmethod
+    def _signatures(path: str) -> Optional[Tuple[Signature, Optional[Signature]]]:
+        try:
+            dir_sig = stat_signature(os.stat(path))
+        except OSError:
+            return None
+        try:
+            spec_sig: Optional[Signature] = stat_signature(os.stat(os.path.join(path, "spec.md")))
+        except OSError:
+            spec_sig = None
+        return dir_sig, spec_sig
+
+    @property
+    def version(self) -> str:
+        return f"{self._token}:{self._generation}"
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        return self.snapshot()[1]
+
+    def snapshot(self) -> Tuple[str, List[Dict[str, Any]]]:
+        """Refresh and return ``(version, records)``."""
+        with self._lock:
+            try:
+                with os.scandir(self.specs_root) as it:
+                    dirs = sorted((e.name, e.path) for e in it if e.is_dir() and not e.name.startswith("."))
+            except FileNotFoundError:
+                dirs = []
+            entries: Dict[str, Tuple[Tuple[Signature, Optional[Signature]], Dict[str, Any]]] = {}
+            for name, path in dirs:
+                sigs = self._signatures(path)
+                if sigs is None:
+                    continue
+                previous = self._entries.get(name)
+                if previous is not None and previous[0] == sigs:
+                    entries[name] = previous
+                    continue
+                checkpoint()
+                self.reparsed += 1
+                entries[name] = (sigs, _spec_record(path, name))
+            if entries.keys() != self._entries.keys() or any(
+                entries[name] is not self._entries[name] for name in entries
+            ):
+                self._generation += 1
+            self._entries = entries
+            return self.version, [record for _, record in entries.values()]
+
+    def record(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the record of one spec directory without scanning the others; None if it does not exist."""
+        path = os.path.join(self.specs_root, name)
+        sigs = self._signatures(path) if os.path.isdir(path) else None
+        if sigs is None:
+            return None
+        with self._lock:
+            previous = self._entries.get(name)
+            if previous is not None and previous[0] == sigs:
+                return previous[1]
+            self.reparsed += 1
+            record = _spec_record(path, name)
+            self._entries[name] = (sigs, record)
+            self._generation += 1
+            return record
+
+
+_INDEXES: Dict[str, SpecIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_spec_index(repo_root: Path | None = None) -> SpecIndex:
+    """Return the process-wide index for a repository's specs directory."""
+    specs_root = get_directive_root(repo_root) / SPECS_DIRNAME
+    key = os.fspath(specs_root.resolve())
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = SpecIndex(specs_root)
+        return index
+
+
+def clear_spec_indexes() -> None:
+    with _INDEXES_LOCK:
+        _INDEXES.clear()
+
+
+def spec_index_count() -> int:
+    with _INDEXES_LOCK:
+        return len(_INDEXES)
+
+
+def specs_digest(repo_root: Path | None = None) -> Dict[str, Any]:
+    """Return one compact line per spec: ``dir | id | created | feature | summary | docs``."""
+    version, records = get_spec_index(repo_root).snapshot()
+    lines = [format_digest_line(r) for r in records]
+    note_version(lines, version)
+    return {"format": "dir | id | created | feature | summary | docs", "count": len(records), "specs": lines}
+
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ].*)?$")
+# Metadata copied from the index into specs.changed results
+_CHANGED_FIELDS = ("id", "created", "feature", "summary", "docs")
+
+
+def _changed_by_git(repo_root: Path, specs_root: Path, since: str) -> Dict[str, Tuple[str, List[str]]]:
+    from .gitrev import changed_paths, get_git_objects
+
+    by_dir: Dict[str, List[str]] = {}
+    for _, path in changed_paths(repo_root, since, f"directive/{SPECS_DIRNAME}"):
+        parts = path.split("/")
+        # Only files inside a spec directory; hidden directories are scaffolding in progress
+        if len(parts) < 4 or parts[2].startswith("."):
+            continue
+        by_dir.setdefault(parts[2], []).append(path)
+    objects = get_git_objects(repo_root)
+    changes: Dict[str, Tuple[str, List[str]]] = {}
+    for name, files in by_dir.items():
+        if not (specs_root / name).is_dir():
+            status = "deleted"
+        elif objects.resolve(since, f"directive/{SPECS_DIRNAME}/{name}") is None:
+            status = "added"
+        else:
+            status = "modified"
+        changes[name] = (status, files)
+    return changes
+
+
+def _changed_by_mtime(specs_root: Path, cutoff: float) -> Dict[str, Tuple[str, List[str]]]:
+    cutoff_ns = int(cutoff * 1_000_000_000)
+    changes: Dict[str, Tuple[str, List[str]]] = {}
+    try:
+        with os.scandir(specs_root) as it:
+            dirs = [(e.name, e.path) for e in it if e.is_dir() and not e.name.startswith(".")]
+    except FileNotFoundError:
+        return changes
+    for name, path in dirs:
+        try:
+            # A newer directory mtime alone means a document was added, renamed or removed
+            dir_changed = os.stat(path).st_mtime_ns >= cutoff_ns
+            with os.scandir(path) as it:
+                files = [
+                    f"directive/{SPECS_DIRNAME}/{name}/{e.name}"
+                    for e in it
+                    if e.is_file() and e.stat().st_mtime_ns >= cutoff_ns
+                ]
+        except OSError:
+            continue
+        if files or dir_changed:
+            changes[name] = ("modified", files)
+    return changes
+
+
+def specs_changed(repo_root: Path | None, since: str) -> Dict[str, Any]:
+    """List specs added, modified or deleted since a git revision or an ISO date, without their content.
+
+    A revision (commit, branch or tag) is compared with the working tree,
+    including uncommitted and untracked files, using ``git diff`` over
+    ``directive/specs/``, so the cost follows the number of changed files. A
+    date (``YYYY-MM-DD`` or an ISO timestamp, local time unless it carries an
+    offset) is compared with file modification times; this needs no git but
+    cannot tell added specs from modified ones, and a fresh checkout makes
+    every spec look new. Metadata for existing specs comes from the spec
+    index, re-parsing only the specs reported.
+
+    Returns: ``since``, ``mode`` (``git`` or ``mtime``) and one entry per changed spec
+    """
+    base = Path.cwd() if repo_root is None else repo_root
+    index = get_spec_index(base)
+    if _ISO_DATE.match(since):
+        try:
+            cutoff = datetime.fromisoformat(since).timestamp()
+        except ValueError:
+            raise ValueError(f"Invalid date: {since}") from None
+        mode, changes = "mtime", _changed_by_mtime(index.specs_root, cutoff)
+    else:
+        mode, changes = "git", _changed_by_git(base, index.specs_root, since)
+
+    specs: List[Dict[str, Any]] = []
+    for name in sorted(changes):
+        status, files = changes[name]
+        entry: Dict[str, Any] = {"dir": name, "path": f"directive/{SPECS_DIRNAME}/{name}", "status": status}
+        record = index.record(name) if status != "deleted" else None
+        if record is not None:
+            entry.update({field: record[field] for field in _CHANGED_FIELDS})
+        entry["files"] = sorted(files)
+        specs.append(entry)
+    return {"since": since, "mode": mode, "count": len(specs), "specs": specs}
+
+
+# Documents scaffolded by create_spec, mapped to their templates
+SCAFFOLD_TEMPLATES = {
+    "spec": "spec_template.md",
+    "impact": "impact_template.md",
+    "tdr": "tdr_template.md",
+}
+_SLUG_INVALID = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(name: str) -> str:
+    return _SLUG_INVALID.sub("-", name.lower()).strip("-")
+
+
+def _fill_template(text: str, spec_id: str, created: str, feature: str, dir_name: str) -> str:
+    text = re.sub(r"^(\*\*Spec ID\*\*:) YYYYMMDD", rf"\g<1> {spec_id}", text, flags=re.M)
+    text = re.sub(r"^(\*\*Created\*\*:) YYYY-MM-DD", rf"\g<1> {created}", text, flags=re.M)
+    text = re.sub(r"^(\*\*Feature name\*\*:)[ \t]*$", lambda m: f"{m.group(1)} {feature}  ", text, flags=re.M)
+    return text.replace("<Feature Name>", feature).replace("/directive/specs/<feature>/", f"/directive/specs/{dir_name}/")
+
+
+def create_spec(
+    repo_root: Path | None,
+    name: str,
+    docs: Sequence[str] = ("spec", "impact", "tdr"),
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Scaffold ``directive/specs/YYYYMMDD-<slug>/`` from templates in one step.
+
+    Documents are rendered from the repository templates (falling back to the
+    packaged defaults) with Spec ID, Created and the feature name filled in,
+    written to a hidden temporary directory and renamed into place, so the
+    spec appears complete or not at all. Same-day name collisions get a
+    ``-2``, ``-3``, ... suffix.
+
+    Returns: the created directory and file paths
+    """
+    slug = slugify(name)
+    if not slug:
+        raise ValueError("name must contain at least one letter or digit")
+    unknown = [d for d in docs if d not in SCAFFOLD_TEMPLATES]
+    if unknown or not docs:
+        raise ValueError(f"docs must be chosen from: {', '.join(SCAFFOLD_TEMPLATES)}")
+    today = today or date.today()
+    spec_id = today.strftime("%Y%m%d")
+    created = today.isoformat()
+    feature = " ".join(name.split())
+
+    specs_root = get_directive_root(repo_root) / SPECS_DIRNAME
+    specs_root.mkdir(parents=True, exist_ok=True)
+    # Hidden (skipped by the spec index) and created with os.mkdir so the default umask applies
+    tmp_dir = os.fspath(specs_root / f".tmp-{spec_id}-{slug}-{secrets.token_hex(4)}")
+    os.mkdir(tmp_dir)
+    try:
+        suffix = 1
+        while True:
+            dir_name = f"{spec_id}-{slug}" if suffix == 1 else f"{spec_id}-{slug}-{suffix}"
+            final = specs_root / dir_name
+            if not final.exists():
+                # Render per candidate: the links inside the docs carry the directory name
+                for doc in docs:
+                    text = _fill_template(read_template(repo_root, SCAFFOLD_TEMPLATES[doc]), spec_id, created, feature, dir_name)
+                    with open(os.path.join(tmp_dir, f"{doc}.md"), "w", encoding="utf-8") as fh:
+                        fh.write(text)
+                try:
+                    os.rename(tmp_dir, final)
+                    break
+                except OSError:
+                    if not final.exists():
+                        raise
+            suffix += 1
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    rel_dir = f"directive/{SPECS_DIRNAME}/{dir_name}"
+    return {
+        "dir": dir_name,
+        "path": rel_dir,
+        "specId": spec_id,
+        "created": created,
+        "files": [f"{rel_dir}/{doc}.md" for doc in docs],
+    }
@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import sys
 
 
@@ -14,3 +15,31 @@ def _ensure_src_on_path():
 _ensure_src_on_path()
 
 
+def frames(*messages: dict) -> bytes:
+    """JSON-RPC ``messages`` in Content-Length frames, as the legacy server reads them."""
+    out = b""
+    for message in messages:
+        body = json.dumps({"jsonrpc": "2.0", **message}).encode("utf-8")
+        out += f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+    return out
+
+
+def read_messages(data: bytes) -> list:
+    """The JSON-RPC messages in a stream of Content-Length frames, in order."""
+    messages = []
+    while data:
+        header, _, rest = data.partition(b"\r\n\r\n")
+        length = int(header.split(b"Content-Length:")[1].split(b"\r\n")[0])
+        messages.append(json.loads(rest[:length]))
+        data = rest[length:]
+    return messages
+
+
+class Clock:
+    """Manually advanced stand-in for ``time.monotonic``."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
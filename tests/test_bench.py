@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+from directive.bench import DEFAULT_MIX, parse_mix, percentile, run_server_bench, summarize_latencies
+
+
+def _make_repo(root: Path) -> None:
+    templates = root / "directive" / "reference" / "templates"
+    templates.mkdir(parents=True)
+    (root / "directive" / "reference" / "agent_operating_procedure.md").write_text("AOP")
+    (root / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    for name in ("spec_template.md", "impact_template.md", "tdr_template.md"):
+        (templates / name).write_text(name)
+
+
+def test_parse_mix_adds_prefix_and_validates_weights():
+    assert parse_mix("tools/list=1, files.get=3,directive/templates.spec") == {
+        "tools/list": 1,
+        "directive/files.get": 3,
+        "directive/templates.spec": 1,
+    }
+    for bad in ("files.get=0", "files.get=x", " , "):
+        with pytest.raises(ValueError):
+            parse_mix(bad)
+
+
+def test_percentiles_use_nearest_rank():
+    samples = [i / 1000 for i in range(1, 101)]
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    assert summarize_latencies(samples)["p95_ms"] == 95.0
+
+
+@pytest.mark.parametrize("runtime", ["legacy", "fastmcp"])
+def test_run_server_bench_reports_per_operation_latency(tmp_path: Path, runtime: str):
+    if runtime == "fastmcp":
+        pytest.importorskip("mcp.server.fastmcp")
+    _make_repo(tmp_path)
+
+    report = run_server_bench(tmp_path, runtime=runtime, requests=35, concurrency=4, warmup=2)
+
+    assert report["runtime"] == runtime
+    assert report["requests"] == 35 and report["errors"] == 0
+    assert set(report["operations"]) == set(DEFAULT_MIX)
+    # Weighted round robin: files.get has twice the weight of the others
+    assert report["operations"]["directive/files.get"]["count"] == 10
+    overall = report["overall"]
+    assert 0 < overall["p50_ms"] <= overall["p95_ms"] <= overall["p99_ms"] <= overall["max_ms"]
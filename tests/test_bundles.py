@@ -52,3 +52,116 @@ def test_build_template_bundle_missing_template(tmp_path: Path, monkeypatch):
         assert "Missing template" in str(e)
 
 
+def _make_bundle_repo(tmp_path: Path) -> Path:
+    root = tmp_path / "directive"
+    (root / "reference" / "templates").mkdir(parents=True)
+    (root / "reference" / "agent_operating_procedure.md").write_text("AOP")
+    (root / "reference" / "agent_context.md").write_text("CTX")
+    (root / "reference" / "templates" / "spec_template.md").write_text("SPEC")
+    (root / "specs" / "20250101-a").mkdir(parents=True)
+    (root / "specs" / "20250101-a" / "spec.md").write_text("Spec A")
+    return root
+
+
+def test_read_directive_file_cache_sees_edits(tmp_path: Path):
+    from directive.bundles import read_directive_file
+
+    root = _make_bundle_repo(tmp_path)
+    assert read_directive_file(tmp_path, "directive/reference/agent_context.md") == "CTX"
+    (root / "reference" / "agent_context.md").write_text("CTX v2")
+    assert read_directive_file(tmp_path, "directive/reference/agent_context.md") == "CTX v2"
+
+
+def test_listing_cache_sees_added_and_removed_files(tmp_path: Path):
+    root = _make_bundle_repo(tmp_path)
+    first = list_directive_files(tmp_path)
+    assert list_directive_files(tmp_path) == first
+
+    (root / "specs" / "20250101-a" / "tdr.md").write_text("TDR")
+    assert "directive/specs/20250101-a/tdr.md" in list_directive_files(tmp_path)
+    (root / "reference" / "agent_context.md").unlink()
+    assert "directive/reference/agent_context.md" not in list_directive_files(tmp_path)
+
+
+def test_prewarm_caches_populates_all_targets(tmp_path: Path):
+    from directive import bundles
+
+    root = _make_bundle_repo(tmp_path)
+    warmed = bundles.prewarm_caches(tmp_path)
+    assert warmed == {"reference": 2, "templates": 1, "listing": 4, "specs": 1}
+    assert (root / "specs" / "20250101-a" / "spec.md") in bundles._CONTENT_CACHE
+    assert (root / "reference" / "templates" / "spec_template.md") in bundles._CONTENT_CACHE
+    assert bundles._LISTING_CACHE.peek(root) is not None
+
+    try:
+        bundles.prewarm_caches(tmp_path, ["bogus"])
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        assert "bogus" in str(e)
+
+
+def test_listing_is_globally_sorted_and_matches_walk_order(tmp_path: Path):
+    from directive.bundles import iter_directive_files
+
+    root = tmp_path / "directive"
+    for rel in ["a.md", "a/x.md", "a-b.md", "a0/y.md", "B.md", "z/deep/k.md"]:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(rel)
+
+    streamed = list(iter_directive_files(tmp_path))
+    assert streamed == sorted(streamed)
+    assert list_directive_files(tmp_path) == streamed
+
+
+def test_directiveignore_prunes_subtrees_and_patterns(tmp_path: Path):
+    root = tmp_path / "directive"
+    (root / "specs" / "20250101-a" / "attachments" / "big").mkdir(parents=True)
+    (root / "specs" / "20250101-a" / "spec.md").write_text("Spec")
+    (root / "specs" / "20250101-a" / ".spec.md.swp").write_text("swap")
+    (root / "specs" / "20250101-a" / "attachments" / "big" / "video.bin").write_text("x")
+    (root / "build").mkdir()
+    (root / "build" / "out.md").write_text("generated")
+    (root / "keep.swp").write_text("kept")
+    (root / ".directiveignore").write_text("# comment\nattachments/\n*.swp\n!keep.swp\n/build\n")
+
+    files = list_directive_files(tmp_path)
+    assert files == [
+        "directive/.directiveignore",
+        "directive/keep.swp",
+        "directive/specs/20250101-a/spec.md",
+    ]
+
+    # Editing the ignore file invalidates the cached listing
+    (root / ".directiveignore").write_text("attachments/\n")
+    assert "directive/build/out.md" in list_directive_files(tmp_path)
+
+
+def test_ignore_file_without_rules_still_invalidates_the_listing(tmp_path: Path):
+    root = tmp_path / "directive"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "b.md").write_text("B")
+    (root / ".directiveignore").write_text("# nothing ignored yet\n")
+    assert "directive/sub/b.md" in list_directive_files(tmp_path)
+
+    with open(root / ".directiveignore", "a") as fh:
+        fh.write("sub/\n")
+    assert "directive/sub/b.md" not in list_directive_files(tmp_path)
+
+
+def test_read_directive_sections_returns_only_requested_sections(tmp_path: Path):
+    from directive.bundles import read_directive_sections
+
+    spec = tmp_path / "directive" / "specs" / "20250101-a" / "spec.md"
+    spec.parent.mkdir(parents=True)
+    spec.write_text("# Spec\n## Problem\nP\n## Acceptance Criteria\n- Given A\n## Non-Goals\nN\n")
+
+    result = read_directive_sections(tmp_path, "directive/specs/20250101-a/spec.md", ["Acceptance Criteria", "Nope"])
+    assert result["sections"] == [{"title": "Acceptance Criteria", "level": 2, "content": "## Acceptance Criteria\n- Given A\n"}]
+    assert result["missing"] == ["Nope"]
+    assert "Problem" in result["headings"]
+
+    # The cached index is invalidated when the file changes
+    spec.write_text("# Spec\n## Acceptance Criteria\n- Given B, a longer criterion\n")
+    result = read_directive_sections(tmp_path, "specs/20250101-a/spec.md", ["acceptance criteria"])
+    assert result["sections"][0]["content"] == "## Acceptance Criteria\n- Given B, a longer criterion\n"
+    assert "missing" not in result
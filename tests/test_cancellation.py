@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from directive import server
+from directive.cancellation import CancelToken, Cancelled, cancel_scope, checkpoint
+from directive.singleflight import SingleFlight
+from conftest import frames
+
+
+def test_checkpoint_raises_only_inside_a_cancelled_scope():
+    checkpoint()  # no scope: never cancelled
+    token = CancelToken()
+    with cancel_scope(token):
+        checkpoint()
+        token.cancel()
+        with pytest.raises(Cancelled):
+            checkpoint()
+    checkpoint()
+
+
+def _in_thread(fn):
+    result = {}
+
+    def _run():
+        try:
+            result["value"] = fn()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=_run)
+    thread.start()
+    return thread, result
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flights = SingleFlight()
+    leader_token = CancelToken()
+    started, runs = threading.Event(), []
+
+    def _slow():
+        runs.append(1)
+        started.set()
+        while True:
+            checkpoint()
+            time.sleep(0.005)
+
+    def _lead():
+        with cancel_scope(leader_token):
+            return flights.do("k", _slow)
+
+    leader, leader_result = _in_thread(_lead)
+    started.wait(5)
+    follower, follower_result = _in_thread(lambda: flights.do("k", lambda: "fresh"))
+    _wait_until(lambda: flights.coalesced == 1)
+    leader_token.cancel()
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader_result["error"], Cancelled)
+    # The waiter started over and ran the call itself
+    assert follower_result == {"value": "fresh"}
+    assert (flights.executed, flights.coalesced) == (2, 0)
+
+
+def test_cancelled_waiter_stops_waiting():
+    flights = SingleFlight()
+    release = threading.Event()
+    leader, leader_result = _in_thread(lambda: flights.do("k", lambda: release.wait(5) and "done"))
+    _wait_until(lambda: flights.executed == 1)
+    token = CancelToken()
+
+    def _follow():
+        with cancel_scope(token):
+            return flights.do("k", lambda: "unused")
+
+    follower, follower_result = _in_thread(_follow)
+    _wait_until(lambda: flights.coalesced == 1)
+    token.cancel()
+    follower.join(5)
+    assert isinstance(follower_result["error"], Cancelled)
+    release.set()
+    leader.join(5)
+    assert leader_result == {"value": "done"}
+
+
+def test_legacy_server_drops_cancelled_calls_and_frees_the_worker(tmp_path: Path, monkeypatch):
+    (tmp_path / "directive").mkdir()
+    started, stopped = threading.Event(), threading.Event()
+    real_dispatch = server._dispatch_tool
+
+    def _dispatch(repo_root, name, arguments):
+        if name != "directive/slow":
+            return real_dispatch(repo_root, name, arguments)
+        started.set()
+        try:
+            for _ in range(1000):
+                checkpoint()
+                time.sleep(0.005)
+        finally:
+            stopped.set()
+        return {"finished": True}
+
+    monkeypatch.setattr(server, "_dispatch_tool", _dispatch)
+    read_fd, write_fd = os.pipe()
+    out = _Collector()
+
+    def _client():
+        with os.fdopen(write_fd, "wb") as fh:
+
+            def _send(message):
+                fh.write(frames(message))
+                fh.flush()
+
+            _send({"id": 1, "method": "tools/call", "params": {"name": "directive/slow", "arguments": {}}})
+            started.wait(5)
+            _send({"method": "notifications/cancelled", "params": {"requestId": 1, "reason": "user interrupt"}})
+            assert stopped.wait(5)
+            # Cancelled before it starts: never runs
+            _send({"id": 2, "method": "tools/call", "params": {"name": "directive/slow", "arguments": {"n": 2}}})
+            _send({"method": "notifications/cancelled", "params": {"requestId": 2}})
+            _send({"method": "notifications/cancelled", "params": {"requestId": 99}})
+            _send({"id": 3, "method": "tools/call", "params": {"name": "directive/files.list", "arguments": {}}})
+
+    client = threading.Thread(target=_client)
+    client.start()
+    with os.fdopen(read_fd, "rb") as reader:
+        server.serve_streams(reader, out, tmp_path / "directive")
+    client.join(5)
+
+    # Only the uncancelled request is answered; notifications never are
+    assert [message.get("id") for message in out.messages()] == [3]
+
+
+class _Collector:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    def flush(self) -> None:
+        pass
+
+    def messages(self):
+        data, messages = self.data, []
+        while data:
+            header, _, rest = data.partition(b"\r\n\r\n")
+            length = int(header.split(b"Content-Length:")[1].split(b"\r\n")[0])
+            messages.append(json.loads(rest[:length]))
+            data = rest[length:]
+        return messages
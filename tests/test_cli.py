@@ -399,3 +399,170 @@ def test_update_verbose_flag(tmp_path: Path, monkeypatch):
     assert len(output) > 0
 
 
+def test_update_leaves_identical_files_untouched(tmp_path: Path, monkeypatch):
+    """Test that update only rewrites maintained files whose content differs."""
+    from directive import cli as dcli
+
+    class Args:
+        verbose = False
+
+    _run_cli(["init"], tmp_path)
+    aop_file = tmp_path / "directive" / "reference" / "agent_operating_procedure.md"
+    rule_file = tmp_path / ".cursor" / "rules" / "directive-core-protocol.mdc"
+    aop_file.write_text("OLD CONTENT")
+    os.utime(rule_file, ns=(0, 0))
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.stdin.isatty", lambda: False)
+    import io
+    captured = io.StringIO()
+    monkeypatch.setattr("sys.stdout", captured)
+
+    assert dcli.cmd_update(Args()) == 0
+    output = captured.getvalue()
+    assert "Updated 1 file:" in output
+    assert "directive/reference/agent_operating_procedure.md" in output
+    assert "5 files already up to date." in output
+    assert aop_file.read_text() != "OLD CONTENT"
+    # Identical files are not rewritten
+    assert rule_file.stat().st_mtime_ns == 0
+
+
+# ============================================================================
+# Tests for tree copy
+# ============================================================================
+
+def test_copy_entries_copies_nested_files_and_reports_throughput(tmp_path: Path):
+    from directive import cli as dcli, package_data
+
+    src = tmp_path / "src"
+    (src / "a" / "b").mkdir(parents=True)
+    (src / "top.md").write_text("top")
+    (src / "a" / "b" / "deep.md").write_text("deep" * 1000)
+    dst = tmp_path / "dst"
+
+    copied, skipped, notes = dcli._copy_entries(package_data.walk_files(src), dst)
+    assert (copied, skipped) == (2, 0)
+    assert (dst / "a" / "b" / "deep.md").read_text() == "deep" * 1000
+    assert (dst / "top.md").read_text() == "top"
+    assert notes[-1].startswith("throughput: 2 files, 4003 bytes")
+
+
+def test_copy_entries_overwrite_skips_identical_content(tmp_path: Path):
+    from directive import cli as dcli, package_data
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "same.md").write_text("same")
+    (src / "changed.md").write_text("new")
+    dst = tmp_path / "dst"
+    dst.mkdir()
+    (dst / "same.md").write_text("same")
+    (dst / "changed.md").write_text("old")
+
+    copied, skipped, notes = dcli._copy_entries(package_data.walk_files(src), dst, overwrite=True)
+    assert (copied, skipped) == (1, 1)
+    assert (dst / "changed.md").read_text() == "new"
+    assert f"skip identical: {dst / 'same.md'}" in notes
+
+
+def test_cli_init_verbose_reports_throughput(tmp_path: Path):
+    res = _run_cli(["--verbose", "init"], tmp_path)
+    assert res.returncode == 0
+    assert "throughput:" in res.stdout
+
+
+def test_init_works_from_zipped_package(tmp_path: Path):
+    """Packaged defaults are read through importlib.resources, so a zipped install works."""
+    import zipfile
+
+    src_pkg = Path(__file__).resolve().parents[1] / "src" / "directive"
+    archive = tmp_path / "directive.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for f in src_pkg.rglob("*"):
+            if f.is_file() and "__pycache__" not in f.parts:
+                zf.write(f, Path("directive") / f.relative_to(src_pkg))
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(archive)
+    res = subprocess.run(
+        [sys.executable, "-c", "import directive.cli, sys; sys.exit(directive.cli.main(['init']))"],
+        cwd=str(repo), env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    assert (repo / "directive" / "reference" / "templates" / "spec_template.md").exists()
+    assert (repo / ".cursor" / "rules" / "directive-core-protocol.mdc").exists()
+
+
+# ============================================================================
+# Tests for streaming output
+# ============================================================================
+
+def test_bundle_ndjson_streams_one_record_per_section(tmp_path: Path):
+    _run_cli(["init"], tmp_path)
+    res = _run_cli(["bundle", "spec_template.md", "--format", "ndjson"], tmp_path)
+    assert res.returncode == 0
+    records = [json.loads(line) for line in res.stdout.splitlines()]
+    assert [r["section"] for r in records] == ["agentOperatingProcedure", "agentContext", "template", "resources"]
+    assert records[2]["path"] == "directive/reference/templates/spec_template.md"
+    assert "Spec ID" in records[2]["content"]
+    assert len(records[3]["resources"]) == 3
+
+
+def test_bundle_ndjson_missing_template_emits_nothing(tmp_path: Path):
+    _run_cli(["init"], tmp_path)
+    (tmp_path / "directive" / "reference" / "templates" / "tdr_template.md").unlink()
+    res = _run_cli(["bundle", "tdr_template.md", "--format", "ndjson"], tmp_path)
+    assert res.returncode == 1
+    assert res.stdout == ""
+    assert "Missing template" in res.stderr
+
+
+def test_ls_streams_listing_text_and_ndjson(tmp_path: Path):
+    _run_cli(["init"], tmp_path)
+    res = _run_cli(["ls"], tmp_path)
+    assert res.returncode == 0
+    lines = res.stdout.splitlines()
+    assert "directive/reference/agent_context.md" in lines
+
+    res2 = _run_cli(["ls", "--format", "ndjson"], tmp_path)
+    assert res2.returncode == 0
+    paths = [json.loads(line)["path"] for line in res2.stdout.splitlines()]
+    assert sorted(paths) == sorted(lines)
+
+
+def test_ls_without_directive_fails(tmp_path: Path):
+    res = _run_cli(["ls"], tmp_path)
+    assert res.returncode == 1
+    assert "directive init" in res.stderr
+
+
+def test_mcp_serve_prewarm_flag_parsing():
+    import pytest
+    from directive import cli as dcli
+
+    parser = dcli.build_parser()
+    assert parser.parse_args(["mcp", "serve"]).prewarm == ["reference", "templates", "listing", "specs"]
+    assert parser.parse_args(["mcp", "serve", "--prewarm", "none"]).prewarm == []
+    assert parser.parse_args(["mcp", "serve", "--prewarm", "templates,specs"]).prewarm == ["templates", "specs"]
+    with pytest.raises(SystemExit):
+        parser.parse_args(["mcp", "serve", "--prewarm", "templates,bogus"])
+
+
+def test_new_creates_spec_directory(tmp_path: Path):
+    from datetime import date
+
+    _run_cli(["init"], tmp_path)
+    res = _run_cli(["new", "My", "Feature"], tmp_path)
+    assert res.returncode == 0, res.stderr
+    spec_dir = tmp_path / "directive" / "specs" / f"{date.today():%Y%m%d}-my-feature"
+    assert sorted(p.name for p in spec_dir.iterdir()) == ["impact.md", "spec.md", "tdr.md"]
+    assert f"{spec_dir.name}/spec.md" in res.stdout
+
+
+def test_new_without_directive_fails(tmp_path: Path):
+    res = _run_cli(["new", "x"], tmp_path)
+    assert res.returncode == 1
+    assert "directive init" in res.stderr
@@ -0,0 +1,30 @@
+import pytest
+
+from directive import codec
+
+
+@pytest.mark.parametrize("name", codec.available_codecs())
+def test_codecs_round_trip_compact_utf8(name):
+    c = codec.get_codec(name)
+    payload = {"b": [1, 2.5, None, True], "a": "café — \"quoted\"\n"}
+    data = c.dumps(payload, False)
+    assert isinstance(data, bytes)
+    assert "café".encode("utf-8") in data and b", " not in data
+    assert c.loads(data) == payload
+    assert c.loads(data.decode("utf-8")) == payload
+    assert c.dumps(payload, True).startswith(b'{"a":')
+    assert c.dumps_pretty({"k": [1]}) == '{\n  "k": [\n    1\n  ]\n}'
+
+
+@pytest.mark.parametrize("name", codec.available_codecs())
+def test_codecs_fall_back_for_unsupported_values_and_reject_bad_input(name):
+    c = codec.get_codec(name)
+    assert c.loads(c.dumps({"big": 2**70}, False)) == {"big": 2**70}
+    with pytest.raises(ValueError):
+        c.loads(b"{not json")
+
+
+def test_unknown_codec_is_rejected():
+    assert "stdlib" in codec.available_codecs()
+    with pytest.raises(ValueError):
+        codec.get_codec("yaml")
@@ -0,0 +1,155 @@
+import io
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+from directive import bundles, cancellation, server
+from directive.cancellation import CancelToken, DeadlineExceeded, cancel_scope, checkpoint
+from directive.server import parse_deadlines
+from conftest import frames, read_messages
+
+
+def test_checkpoint_raises_once_the_deadline_passes(monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(cancellation, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    token = CancelToken(deadline=1.0)
+    with cancel_scope(token):
+        checkpoint()
+        clock.now = 1.0
+        with pytest.raises(DeadlineExceeded):
+            checkpoint()
+    assert token.expired and not token.cancelled
+
+
+def test_deadline_configuration():
+    assert parse_deadlines("files.list=5, *=60,directive/specs.create=0") == {
+        "directive/files.list": 5.0,
+        "*": 60.0,
+        "directive/specs.create": 0.0,
+    }
+    for bad in ("files.list", "files.list=soon", "=5", "files.list=-1"):
+        with pytest.raises(ValueError):
+            parse_deadlines(bad)
+
+    deadlines = {"directive/files.list": 5.0, "directive/specs.create": 0.0, "*": 30.0}
+    assert server._deadline_seconds(deadlines, "directive/files.list", None) == 5.0
+    assert server._deadline_seconds(deadlines, "directive/files.get", None) == 30.0
+    assert server._deadline_seconds(deadlines, "directive/specs.create", None) is None
+    # A request can shorten its budget but not extend it
+    assert server._deadline_seconds(deadlines, "directive/files.list", 250) == 0.25
+    assert server._deadline_seconds(deadlines, "directive/files.list", 60000) == 5.0
+    assert server._deadline_seconds({}, "directive/files.list", 100) == 0.1
+    with pytest.raises(ValueError):
+        server._deadline_seconds(deadlines, "directive/files.list", 0)
+
+
+def test_listing_is_truncated_with_a_cursor_and_resumes(tmp_path: Path, monkeypatch):
+    for name in ("a", "b", "c"):
+        (tmp_path / "directive" / name).mkdir(parents=True)
+        (tmp_path / "directive" / name / "x.md").write_text(name)
+    (tmp_path / "directive" / "z.md").write_text("z")
+    bundles.clear_caches()
+    everything = bundles.list_directive_files(tmp_path)
+    bundles.clear_caches()
+
+    # Every checkpoint (one per directory scanned) advances the clock by one second
+    clock = types.SimpleNamespace(now=0.0)
+
+    def _monotonic():
+        clock.now += 1
+        return clock.now
+
+    monkeypatch.setattr(cancellation, "time", types.SimpleNamespace(monotonic=_monotonic))
+    with cancel_scope(CancelToken(deadline=2.5)):
+        page = bundles.list_directive_files_page(tmp_path)
+    assert page == {"files": ["directive/a/x.md"], "truncated": True, "cursor": "directive/a/x.md"}
+
+    rest = bundles.list_directive_files_page(tmp_path, cursor=page["cursor"])
+    assert page["files"] + rest["files"] == everything
+    assert "truncated" not in rest
+    assert bundles.list_directive_files_page(tmp_path, cursor="directive/b/x.md")["files"] == [
+        "directive/c/x.md",
+        "directive/z.md",
+    ]
+    # Truncated walks are not cached
+    assert bundles.list_directive_files_page(tmp_path) == {"files": everything}
+    bundles.clear_caches()
+
+
+def test_legacy_server_returns_a_timeout_error_and_logs_the_miss(tmp_path: Path, monkeypatch, capsys):
+    (tmp_path / "directive").mkdir()
+    real_dispatch = server._dispatch_tool
+    seen = []
+
+    def _dispatch(repo_root, name, arguments):
+        if name != "directive/slow":
+            return real_dispatch(repo_root, name, arguments)
+        seen.append(arguments)
+        while True:
+            checkpoint()
+            time.sleep(0.005)
+
+    monkeypatch.setattr(server, "_dispatch_tool", _dispatch)
+    requests = frames(
+        {"id": 1, "method": "tools/call", "params": {"name": "directive/slow", "arguments": {"deadlineMs": 50}}},
+        {"id": 2, "method": "tools/call", "params": {"name": "directive/files.list", "arguments": {"deadlineMs": 5000}}},
+    )
+    out = io.BytesIO()
+    service = server.DirectiveService(tmp_path, deadlines={"directive/slow": 10.0})
+    server.serve_streams(io.BytesIO(requests), out, service=service)
+
+    replies = {m["id"]: m for m in read_messages(out.getvalue())}
+    assert replies[1]["error"]["code"] == 1002
+    assert replies[1]["error"]["message"] == "Deadline exceeded: directive/slow did not finish within 0.05s"
+    assert replies[2]["result"]["content"]
+    # deadlineMs is not passed on to the tool
+    assert seen == [{}]
+    assert "directive: directive/slow missed its 0.05s deadline after" in capsys.readouterr().err
+
+
+def test_a_partial_listing_is_not_shared_with_callers_that_have_time_left(tmp_path: Path, monkeypatch):
+    import threading
+
+    from directive.singleflight import SingleFlight
+
+    flights = SingleFlight()
+    runs = []
+
+    def _dispatch(repo_root, name, arguments):
+        runs.append(arguments)
+        found = []
+        try:
+            for i in range(30):
+                checkpoint()
+                found.append(f"directive/{i:02}.md")
+                time.sleep(0.01)
+        except DeadlineExceeded:
+            return {"files": found, "truncated": True, "cursor": found[-1]}
+        return {"files": found}
+
+    monkeypatch.setattr(server, "_dispatch_tool", _dispatch)
+    results = {}
+
+    def _call(label, arguments):
+        results[label] = server._execute_for_request(
+            CancelToken(), None, flights, tmp_path, "directive/files.list", arguments, deadlines={}
+        )
+
+    short = threading.Thread(target=_call, args=("short", {"deadlineMs": 100}))
+    short.start()
+    while not runs:
+        time.sleep(0.001)
+    # Joins the short call while it is running: same key, since deadlineMs is not an argument of the tool
+    patient = threading.Thread(target=_call, args=("patient", {}))
+    patient.start()
+    while not flights.coalesced:
+        time.sleep(0.001)
+    short.join()
+    patient.join()
+
+    assert results["short"]["truncated"] and len(results["short"]["files"]) < 30
+    assert results["patient"] == {"files": [f"directive/{i:02}.md" for i in range(30)]}
+    # The patient caller ran the listing again rather than take the partial page
+    assert runs == [{}, {}] and (flights.executed, flights.coalesced) == (2, 0)
@@ -0,0 +1,96 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from directive import bundles
+from directive.gitrev import get_git_objects, validate_rev
+from directive.server import _dispatch_tool
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def repo(tmp_path: Path):
+    ref = tmp_path / "directive" / "reference"
+    ref.mkdir(parents=True)
+    (ref / "agent_context.md").write_text("# Context\n\n## Old\nv1 é\n")
+    (tmp_path / "directive" / "zeta.md").write_text("z")
+    (tmp_path / "directive" / "notes").mkdir()
+    (tmp_path / "directive" / "notes" / "a.md").write_text("a")
+    (tmp_path / "directive" / ".directiveignore").write_text("notes/\n")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "one")
+    (ref / "agent_context.md").write_text("# Context\n\n## New\nv2\n")
+    (tmp_path / "directive" / "added.md").write_text("new")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "two")
+    (ref / "agent_context.md").write_text("uncommitted")
+    bundles.clear_caches()
+    yield tmp_path
+    bundles.clear_caches()
+
+
+def test_read_and_list_at_revision(repo: Path):
+    assert bundles.read_directive_file(repo, "directive/reference/agent_context.md", rev="HEAD~1") == "# Context\n\n## Old\nv1 é\n"
+    assert bundles.read_directive_file(repo, "reference/agent_context.md", rev="HEAD").endswith("v2\n")
+    assert bundles.read_directive_file(repo, "directive/reference/agent_context.md") == "uncommitted"
+
+    # Sorted like the working-tree walk, with the committed .directiveignore applied
+    assert bundles.list_directive_files(repo, rev="HEAD~1") == [
+        "directive/.directiveignore",
+        "directive/reference/agent_context.md",
+        "directive/zeta.md",
+    ]
+    assert "directive/added.md" in bundles.list_directive_files(repo, rev="HEAD")
+    assert bundles.list_directive_files(repo, rev="HEAD") == bundles.list_directive_files(repo)
+
+
+def test_historical_reads_are_cached_by_object_id(repo: Path):
+    objects = get_git_objects(repo)
+    bundles.read_directive_file(repo, "directive/zeta.md", rev="HEAD~1")
+    misses = objects.blobs.misses
+    # Same blob through another revision name: resolved again, never re-read
+    bundles.read_directive_file(repo, "directive/zeta.md", rev="HEAD")
+    bundles.read_directive_file(repo, "directive/zeta.md", rev=_git(repo, "rev-parse", "HEAD~1"))
+    assert objects.blobs.misses == misses
+    assert objects.blobs.hits == 2
+
+    first = bundles.list_directive_files(repo, rev="HEAD")
+    commands = objects.commands
+    assert bundles.list_directive_files(repo, rev="HEAD") == first
+    assert objects.commands == commands + 1  # only the tree lookup
+
+
+def test_sections_and_errors_at_revision(repo: Path):
+    result = bundles.read_directive_sections(repo, "directive/reference/agent_context.md", ["Old"], rev="HEAD~1")
+    assert result["sections"] == [{"title": "Old", "level": 2, "content": "## Old\nv1 é\n"}]
+
+    with pytest.raises(FileNotFoundError, match="at HEAD~1"):
+        bundles.read_directive_file(repo, "directive/added.md", rev="HEAD~1")
+    with pytest.raises(FileNotFoundError):
+        bundles.list_directive_files(repo, rev="no-such-branch")
+    with pytest.raises(ValueError):
+        bundles.read_directive_file(repo, "../secret", rev="HEAD")
+    for bad in ("", "-p", "HEAD extra", "HEAD:x", "a\nb"):
+        with pytest.raises(ValueError):
+            validate_rev(bad)
+
+
+def test_tools_accept_rev(repo: Path):
+    listing = _dispatch_tool(repo, "directive/files.list", {"rev": "HEAD~1"})
+    assert "directive/added.md" not in listing["files"]
+    got = _dispatch_tool(repo, "directive/files.get", {"path": "directive/reference/agent_context.md", "rev": "HEAD~1"})
+    assert "v1" in got["content"]
@@ -0,0 +1,204 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from directive import bundles
+from directive.idle import IdleMonitor, server_status
+from conftest import Clock, frames
+
+
+def _monitor(clock, **kwargs):
+    events = []
+    monitor = IdleMonitor(
+        on_release=lambda: events.append("release"),
+        on_exit=lambda: events.append("exit"),
+        clock=clock,
+        **kwargs,
+    )
+    return monitor, events
+
+
+def test_release_once_then_exit_and_requests_reset_idle():
+    clock = Clock(100.0)
+    monitor, events = _monitor(clock, release_after=10, exit_after=60)
+
+    clock.now += 9
+    assert monitor.check() is None
+    clock.now += 1
+    assert monitor.check() == "release"
+    clock.now += 5
+    assert monitor.check() is None  # released already
+    assert monitor.status()["released"] is True
+
+    # A long request is never idle, however long it runs
+    monitor.begin()
+    clock.now += 120
+    assert monitor.check() is None
+    monitor.end()
+    assert monitor.status()["released"] is False
+
+    clock.now += 10
+    assert monitor.check() == "release"
+    clock.now += 50
+    assert monitor.check() == "exit"
+    assert events == ["release", "release", "exit"]
+    assert monitor.status()["releases"] == 2
+
+
+def test_requests_wait_for_a_release_in_progress():
+    clock, seen, requests = Clock(100.0), [], []
+
+    def _release():
+        # A request arriving now must not start until the caches are released
+        request = threading.Thread(target=monitor.begin)
+        request.start()
+        request.join(0.1)
+        seen.append((request.is_alive(), monitor.status()["inFlight"]))
+        requests.append(request)
+
+    monitor = IdleMonitor(release_after=10, on_release=_release, clock=clock)
+    clock.now += 10
+    assert monitor.check() == "release"
+    requests[0].join(5)
+    assert seen == [(True, 0)]
+    assert monitor.status()["inFlight"] == 1 and monitor.check() is None
+
+
+def test_status_reports_previous_idle_period():
+    clock = Clock(100.0)
+    monitor, _ = _monitor(clock, release_after=30)
+    clock.now += 42
+    monitor.begin()
+    status = monitor.status()
+    assert (status["inFlight"], status["idleSeconds"], status["previousIdleSeconds"]) == (1, 0.0, 42.0)
+    monitor.end()
+    clock.now += 3
+    assert monitor.status()["idleSeconds"] == 3.0
+
+
+def test_disabled_stages_and_validation():
+    monitor, events = _monitor(Clock(100.0))
+    assert monitor.release_after is None and monitor.check() is None
+    with pytest.raises(ValueError):
+        IdleMonitor(release_after=-1)
+    with pytest.raises(ValueError):
+        IdleMonitor(exit_after=5)  # no way to exit
+
+
+def test_release_drops_caches_and_they_rebuild(tmp_path: Path):
+    ref = tmp_path / "directive" / "reference"
+    ref.mkdir(parents=True)
+    (ref / "agent_context.md").write_text("CTX")
+    bundles.clear_caches()
+    clock = Clock(100.0)
+    monitor = IdleMonitor(release_after=1, clock=clock, poll_interval=3600).start()
+    try:
+        assert bundles.read_directive_file(tmp_path, "directive/reference/agent_context.md") == "CTX"
+        bundles.list_directive_files(tmp_path)
+        caches = server_status()["caches"]
+        assert (caches["files"], caches["listings"]) == (1, 1)
+
+        clock.now += 1
+        assert monitor.check() == "release"
+        status = server_status()
+        assert (status["caches"]["files"], status["caches"]["listings"]) == (0, 0)
+        assert status["idle"]["releases"] == 1
+        assert status["pid"] == os.getpid()
+        assert bundles.read_directive_file(tmp_path, "directive/reference/agent_context.md") == "CTX"
+    finally:
+        monitor.stop()
+    assert server_status()["idle"] is None
+
+
+def test_legacy_session_tracks_requests_and_serves_status(tmp_path: Path):
+    from directive.server import serve_streams
+
+    (tmp_path / "directive").mkdir()
+    monitor = IdleMonitor(release_after=3600).start()
+    try:
+        requests = frames(
+            {"id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18"}},
+            {"method": "notifications/initialized"},
+            {"id": 2, "method": "tools/call", "params": {"name": "directive/server.status", "arguments": {}}},
+        )
+        writer = io.BytesIO()
+        serve_streams(io.BytesIO(requests), writer, tmp_path / "directive", monitor=monitor)
+        assert monitor.status()["inFlight"] == 0
+    finally:
+        monitor.stop()
+    body = writer.getvalue().rsplit(b"\r\n\r\n", 1)[1]
+    status = json.loads(body)["result"]["structuredContent"]
+    assert status["idle"]["inFlight"] == 1  # the status call itself
+    assert status["idle"]["releaseAfter"] == 3600
+    assert set(status["memory"]) == {"rssBytes", "peakRssBytes"}
+
+
+def _serve(tmp_path: Path, command) -> subprocess.Popen:
+    env = os.environ.copy()
+    src_dir = str(Path(__file__).resolve().parents[1] / "src")
+    env["PYTHONPATH"] = src_dir + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    return subprocess.Popen(
+        [sys.executable, *command],
+        cwd=str(tmp_path),
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def _wait_for_exit(proc: subprocess.Popen):
+    # stdin stays open, as with an abandoned editor window
+    try:
+        assert proc.wait(timeout=20) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdin.close()
+    out, err = proc.stdout.read(), proc.stderr.read()
+    proc.stdout.close()
+    proc.stderr.close()
+    return out, err
+
+
+def test_mcp_serve_exits_when_idle(tmp_path: Path):
+    (tmp_path / "directive").mkdir()
+    proc = _serve(
+        tmp_path,
+        ["-m", "directive.cli", "mcp", "serve", "--prewarm", "none", "--idle-exit", "1", "--log-file", "calls.ndjson", "--record", "rec.ndjson"],
+    )
+    messages = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "t", "version": "0"}}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "directive/files.list", "arguments": {}}},
+    ]
+    proc.stdin.write("".join(json.dumps(m) + "\n" for m in messages).encode())
+    proc.stdin.flush()
+    out, err = _wait_for_exit(proc)
+    assert b"idle; exiting" in err
+    # The server shut down normally: every response written whole, the log and recording closed
+    assert [json.loads(line)["id"] for line in out.splitlines()] == [1, 2]
+    assert [json.loads(line)["tool"] for line in (tmp_path / "calls.ndjson").read_text().splitlines()] == ["directive/files.list"]
+    assert len((tmp_path / "rec.ndjson").read_text().splitlines()) == 4
+
+
+def test_legacy_server_returns_when_idle(tmp_path: Path):
+    (tmp_path / "directive").mkdir()
+    script = (
+        "import atexit, sys\n"
+        "from pathlib import Path\n"
+        "from directive.idle import IdleMonitor\n"
+        "from directive.server import idle_exit_handler, serve_stdio\n"
+        "atexit.register(lambda: sys.stderr.write('atexit ran\\n'))\n"
+        "monitor = IdleMonitor(exit_after=0.5, on_exit=idle_exit_handler(), poll_interval=0.1).start()\n"
+        "print('returned', serve_stdio(Path.cwd().joinpath('directive')), flush=True)\n"
+    )
+    out, err = _wait_for_exit(_serve(tmp_path, ["-c", script]))
+    assert out == b"returned 0\n"
+    assert b"idle; exiting" in err and b"atexit ran" in err
@@ -0,0 +1,30 @@
+from directive.ignore import IgnoreRules
+
+
+def test_unanchored_patterns_match_at_any_depth():
+    rules = IgnoreRules(["*.swp", "tmp"])
+    assert rules.is_ignored("x.swp")
+    assert rules.is_ignored("specs/a/.x.swp")
+    assert rules.is_ignored("specs/tmp", is_dir=True)
+    assert not rules.is_ignored("specs/x.md")
+
+
+def test_anchored_directory_and_double_star_patterns():
+    rules = IgnoreRules(["/build", "attachments/", "specs/**/out", "cache/**"])
+    assert rules.is_ignored("build", is_dir=True)
+    assert not rules.is_ignored("specs/build", is_dir=True)
+    assert rules.is_ignored("specs/a/attachments", is_dir=True)
+    assert not rules.is_ignored("specs/a/attachments", is_dir=False)
+    assert rules.is_ignored("specs/out", is_dir=True)
+    assert rules.is_ignored("specs/a/b/out")
+    assert rules.is_ignored("cache/x/y.md")
+
+
+def test_negation_comments_and_character_classes():
+    rules = IgnoreRules(["# comment", "", "*.log", "!keep.log", "[!x]y.md", "\\#literal"])
+    assert rules.is_ignored("a.log")
+    assert not rules.is_ignored("keep.log")
+    assert rules.is_ignored("zy.md")
+    assert not rules.is_ignored("xy.md")
+    assert rules.is_ignored("#literal")
+    assert not IgnoreRules(["# only a comment"])
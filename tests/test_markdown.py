@@ -0,0 +1,44 @@
+from directive.markdown import build_heading_index, match_headings, normalize_title
+
+
+DOC = """# Title
+
+Intro
+## 1. Summary
+Summary body
+```md
+## Not a heading
+```
+## 9. Rollout & Migration
+Rollout body
+### Flags
+Flag body
+## Acceptance Criteria
+- Given X
+""".encode("utf-8")
+
+
+def test_heading_index_offsets_and_section_ranges():
+    index = build_heading_index(DOC)
+    assert [(h.level, h.title) for h in index] == [
+        (1, "Title"),
+        (2, "1. Summary"),
+        (2, "9. Rollout & Migration"),
+        (3, "Flags"),
+        (2, "Acceptance Criteria"),
+    ]
+    rollout = index[2]
+    section = DOC[rollout.start:rollout.end].decode("utf-8")
+    assert section.startswith("## 9. Rollout & Migration\n")
+    assert "Flag body" in section
+    assert "Acceptance" not in section
+    assert index[0].end == len(DOC)
+
+
+def test_match_headings_normalizes_numbering_and_prefixes():
+    index = build_heading_index(DOC)
+    assert normalize_title("9.  Rollout &  Migration") == "rollout & migration"
+    assert [h.title for h in match_headings(index, "summary")] == ["1. Summary"]
+    assert [h.title for h in match_headings(index, "Rollout")] == ["9. Rollout & Migration"]
+    assert match_headings(index, "Roll") == []
+    assert match_headings(index, "") == []
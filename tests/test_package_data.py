@@ -0,0 +1,24 @@
+from directive import package_data
+
+
+def test_packaged_index_lists_defaults_once():
+    index = package_data.packaged_files()
+    assert "reference/agent_operating_procedure.md" in index
+    assert "reference/templates/spec_template.md" in index
+    assert "cursor/rules/directive-core-protocol.mdc" in index
+    # Built once per process
+    assert package_data.packaged_files() is index
+
+
+def test_iter_packaged_files_is_relative_to_prefix():
+    rels = [rel for rel, _ in package_data.iter_packaged_files("cursor/rules")]
+    assert rels == ["directive-core-protocol.mdc"]
+
+
+def test_read_packaged_text_and_missing():
+    assert "Spec ID" in package_data.read_packaged_text("reference/templates/spec_template.md")
+    try:
+        package_data.read_packaged_text("reference/templates/nope.md")
+        assert False, "Expected FileNotFoundError"
+    except FileNotFoundError as e:
+        assert "nope.md" in str(e)
@@ -0,0 +1,177 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from directive import bundles, codec, server
+from directive.paging import encoded_size, encoded_sizes, limit_files, limit_keyed_list, limit_payload
+from conftest import frames
+
+
+def _pages(payload, field, max_bytes):
+    pages, cursor = [], None
+    while True:
+        page = limit_payload(payload, field, max_bytes, cursor)
+        pages.append(page)
+        cursor = page.get("cursor")
+        if cursor is None:
+            return pages
+
+
+def test_text_is_paged_at_line_boundaries():
+    content = "".join(f"line {i}: {'é' * (i % 7)} \"quoted\"\n" for i in range(500))
+    payload = {"path": "directive/big.md", "content": content}
+    assert limit_payload(payload, "content", 0) is payload
+    assert limit_payload(payload, "content", 10**6) is payload
+
+    pages = _pages(payload, "content", 1000)
+    assert len(pages) > 1
+    assert "".join(p["content"] for p in pages) == content
+    for page in pages:
+        assert encoded_size(page) <= 1000
+        assert page["content"].endswith("\n")
+        assert page["path"] == "directive/big.md"
+    assert all(p["truncated"] for p in pages[:-1]) and "truncated" not in pages[-1]
+
+
+def test_lists_are_paged_by_entry_and_long_sections_are_split():
+    sections = [{"title": f"S{i}", "level": 2, "content": "x\n" * (2000 if i == 3 else 10)} for i in range(8)]
+    payload = {"path": "directive/spec.md", "sections": sections}
+    pages = _pages(payload, "sections", 1500)
+    for page in pages:
+        assert encoded_size(page) <= 1500
+
+    # Rejoin the pieces of split sections
+    rejoined = []
+    for page in pages:
+        for section in page["sections"]:
+            if rejoined and rejoined[-1]["title"] == section["title"]:
+                rejoined[-1]["content"] += section["content"]
+            else:
+                rejoined.append(dict(section))
+    assert rejoined == sections
+
+
+def test_stale_and_invalid_cursors_are_rejected():
+    payload = {"specs": [f"spec {i}" for i in range(100)]}
+    cursor = limit_payload(payload, "specs", 200)["cursor"]
+    with pytest.raises(ValueError, match="stale"):
+        limit_payload({"specs": payload["specs"] + ["new"]}, "specs", 200, cursor)
+    with pytest.raises(ValueError, match="invalid cursor"):
+        limit_payload(payload, "specs", 200, "nonsense")
+
+
+def test_keyed_list_leaves_room_for_a_long_cursor():
+    files = [f"directive/specs/{i:04}-{'deeply-nested-' * 12}/spec.md" for i in range(200)]
+    for max_bytes in (1024, 4096, 4097):
+        page = limit_keyed_list({"files": files}, "files", max_bytes)
+        assert encoded_size(page) <= max_bytes
+        assert page["cursor"] == page["files"][-1] and page["files"] == files[: len(page["files"])]
+
+
+def test_bundle_files_are_cut_with_cursors_that_files_get_continues():
+    bundle = {
+        "agentOperatingProcedure": {"path": "directive/reference/agent_operating_procedure.md", "content": "aop\n" * 10},
+        "agentContext": {"path": "directive/reference/agent_context.md", "content": "context line\n" * 400},
+        "template": {"path": "directive/reference/templates/spec_template.md", "content": "template line\n" * 400},
+        "resources": [],
+    }
+    limited = limit_files(bundle, ["agentOperatingProcedure", "agentContext", "template"], 4000)
+    assert encoded_size(limited) <= 4000
+    assert limited["agentOperatingProcedure"] == bundle["agentOperatingProcedure"]
+    context = limited["agentContext"]
+    assert context["truncated"] and limited["template"]["truncated"]
+
+    rest = limit_payload({"path": context["path"], "content": bundle["agentContext"]["content"]}, "content", 0, context["cursor"])
+    assert context["content"] + rest["content"] == bundle["agentContext"]["content"]
+
+
+def _call(root: Path, name: str, arguments: dict, max_bytes: int) -> dict:
+    out = io.BytesIO()
+    request = frames({"id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}})
+    service = server.DirectiveService(root, max_response_bytes=max_bytes)
+    server.serve_streams(io.BytesIO(request), out, service=service)
+    result = json.loads(out.getvalue().partition(b"\r\n\r\n")[2])["result"]
+    # The limit holds for the result as sent: JSON inside a text item for this (pre-structured) session
+    assert len(codec.dumps(result)) <= max_bytes
+    return json.loads(result["content"][0]["text"])
+
+
+def test_legacy_server_pages_large_results(tmp_path: Path):
+    (tmp_path / "directive" / "notes").mkdir(parents=True)
+    for i in range(200):
+        (tmp_path / "directive" / "notes" / f"note-{i:03}.md").write_text("note\n")
+    content = "".join(f"row {i}: \"quoted\"\n" for i in range(3000))
+    (tmp_path / "directive" / "big.md").write_text(content)
+    bundles.clear_caches()
+
+    files, cursor = [], None
+    while True:
+        page = _call(tmp_path, "directive/files.list", {"cursor": cursor} if cursor else {}, 2000)
+        files += page["files"]
+        cursor = page.get("cursor")
+        if cursor is None:
+            break
+    assert files == bundles.list_directive_files(tmp_path)
+
+    text, cursor = "", None
+    while True:
+        arguments = {"path": "directive/big.md", **({"cursor": cursor} if cursor else {})}
+        page = _call(tmp_path, "directive/files.get", arguments, 2000)
+        text += page["content"]
+        cursor = page.get("cursor")
+        if cursor is None:
+            break
+    assert text == content
+    bundles.clear_caches()
+
+
+def test_sizes_are_computed_as_every_codec_encodes(monkeypatch):
+    values = [
+        "",
+        'quotes " and \\ backslashes',
+        "controls \n\t\r\b\f\x00\x1f\x7f",
+        "ünïcødé — 😀",
+        [],
+        ["a", "b\n", "é"],
+        [1, "mixed", None],
+        {"content": "x" * 50, "n": -3, "ok": True, "ratio": 0.1, "nested": [{"k": ["v"]}, []]},
+    ]
+    for name in codec.available_codecs():
+        monkeypatch.setattr(codec, "_ACTIVE", codec.get_codec(name))
+        for value in values:
+            data = codec.dumps(value)
+            assert encoded_sizes(value) == (len(data), len(codec.dumps(data.decode("utf-8")))), (name, value)
+
+
+def test_later_pages_of_a_cached_file_do_not_encode_all_of_it(tmp_path: Path, monkeypatch):
+    (tmp_path / "directive").mkdir()
+    content = "".join(f"row {i}\n" for i in range(20000))
+    (tmp_path / "directive" / "big.md").write_text(content)
+    bundles.clear_caches()
+    first = _call(tmp_path, "directive/files.get", {"path": "big.md"}, 4000)
+
+    encoded = []
+    dumps = codec.dumps
+
+    def _dumps(value, sort_keys=False):
+        data = dumps(value, sort_keys)
+        encoded.append(len(data))
+        return data
+
+    monkeypatch.setattr(codec, "dumps", _dumps)
+    second = _call(tmp_path, "directive/files.get", {"path": "big.md", "cursor": first["cursor"]}, 4000)
+    assert second["content"].startswith("row ") and content.startswith(first["content"] + second["content"])
+    # Only the page itself is encoded, to be sent: never the whole file
+    assert encoded and max(encoded) < 5000
+    monkeypatch.undo()
+
+    # The cursor is versioned by the file's stat signature, so an edit makes it stale
+    (tmp_path / "directive" / "big.md").write_text(content + "more\n")
+    out = io.BytesIO()
+    arguments = {"path": "big.md", "cursor": first["cursor"]}
+    request = frames({"id": 1, "method": "tools/call", "params": {"name": "directive/files.get", "arguments": arguments}})
+    server.serve_streams(io.BytesIO(request), out, service=server.DirectiveService(tmp_path, max_response_bytes=4000))
+    assert b"cursor is stale" in out.getvalue()
+    bundles.clear_caches()
@@ -0,0 +1,140 @@
+from pathlib import Path
+
+import pytest
+
+from directive import bundles, progress
+from directive.progress import ProgressReporter, operation, progress_scope
+from conftest import Clock, frames, read_messages
+
+
+def test_reporter_throttles_and_only_the_outermost_operation_reports():
+    clock, sent = Clock(), []
+    reporter = ProgressReporter(lambda *args: sent.append(args), min_interval=1.0, clock=clock)
+    with progress_scope(reporter):
+        with operation("Outer", total=10) as outer:
+            outer.advance(1)  # within the first interval: quiet
+            clock.now = 1.0
+            outer.advance(2)
+            with operation("Inner", total=1000) as inner:
+                clock.now = 5.0
+                inner.advance(999)
+            outer.advance(3)
+            clock.now = 6.0
+            outer.advance(3)  # not an increase
+            outer.advance(4)
+    assert sent == [(2, 10, "Outer"), (3, 10, "Outer"), (4, 10, "Outer")]
+
+    with operation("No scope") as op:
+        op.advance(1)
+
+
+def test_reporter_stops_when_sending_fails():
+    clock, calls = Clock(), []
+
+    def _send(*args):
+        calls.append(args)
+        raise BrokenPipeError()
+
+    reporter = ProgressReporter(_send, min_interval=0, clock=clock)
+    reporter.report(1)
+    reporter.report(2)
+    assert calls == [(1, None, None)]
+
+
+@pytest.fixture()
+def big_file(tmp_path: Path, monkeypatch):
+    (tmp_path / "directive").mkdir()
+    (tmp_path / "directive" / "big.md").write_text("x" * (3 * 1024 * 1024 + 5))
+    monkeypatch.setattr(progress, "DEFAULT_MIN_INTERVAL", 0.0)
+    bundles.clear_caches()
+    yield tmp_path
+    bundles.clear_caches()
+
+
+def test_coalesced_callers_each_get_the_shared_calls_progress():
+    import threading
+
+    from directive.singleflight import SingleFlight
+
+    flights = SingleFlight()
+    joined = threading.Event()
+
+    def _walk():
+        joined.wait(5)
+        with operation("Walking", total=2) as op:
+            op.advance(1)
+            op.advance(2)
+        return "done"
+
+    sent = {}
+
+    def _call(label):
+        reporter = None
+        if label is not None:
+            sent[label] = []
+            reporter = ProgressReporter(lambda *args: sent[label].append(args), min_interval=0)
+        with progress_scope(reporter):
+            assert flights.do("k", _walk) == "done"
+
+    threads = [threading.Thread(target=_call, args=(label,)) for label in ("leader", "follower", None)]
+    threads[0].start()
+    while not flights.executed:
+        threading.Event().wait(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flights.coalesced < 2:
+        threading.Event().wait(0.001)
+    joined.set()
+    for thread in threads:
+        thread.join()
+
+    assert sent == {"leader": [(1, 2, "Walking"), (2, 2, "Walking")], "follower": [(1, 2, "Walking"), (2, 2, "Walking")]}
+
+
+def test_legacy_server_sends_progress_for_large_reads(big_file: Path):
+    import io
+
+    from directive.server import serve_streams
+
+    call = {"name": "directive/files.get", "arguments": {"path": "directive/big.md"}}
+    requests = frames({"id": 1, "method": "tools/call", "params": {**call, "_meta": {"progressToken": "read-1"}}})
+    # Without a token nothing is reported
+    requests += frames({"id": 2, "method": "tools/call", "params": {"name": "directive/files.list", "arguments": {}}})
+    out = io.BytesIO()
+    serve_streams(io.BytesIO(requests), out, big_file / "directive")
+
+    messages = read_messages(out.getvalue())
+    notes = [m["params"] for m in messages if m.get("method") == "notifications/progress"]
+    assert [n["progressToken"] for n in notes] == ["read-1"] * 4
+    assert [n["total"] for n in notes] == [3 * 1024 * 1024 + 5] * 4
+    assert [n["progress"] for n in notes] == sorted(n["progress"] for n in notes)
+    assert notes[-1]["progress"] == 3 * 1024 * 1024 + 5
+    assert notes[0]["message"] == "Reading big.md (bytes)"
+    # Every notification precedes the response it belongs to
+    last_note = max(i for i, m in enumerate(messages) if m.get("method") == "notifications/progress")
+    assert last_note < next(i for i, m in enumerate(messages) if m.get("id") == 1)
+
+
+def test_fastmcp_sends_progress_for_large_reads(big_file: Path, monkeypatch):
+    import anyio
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from directive.server import _build_fastmcp_app
+
+    monkeypatch.chdir(big_file)
+    app = _build_fastmcp_app()
+    updates = []
+
+    async def _on_progress(progress, total, message):
+        updates.append((progress, total, message))
+
+    async def _exercise():
+        async with create_connected_server_and_client_session(app._mcp_server) as client:
+            result = await client.call_tool("directive/files.get", {"path": "directive/big.md"}, progress_callback=_on_progress)
+            assert result.isError is False
+
+    anyio.run(_exercise)
+    assert len(updates) == 4
+    assert updates[-1] == (3 * 1024 * 1024 + 5, 3 * 1024 * 1024 + 5, "Reading big.md (bytes)")
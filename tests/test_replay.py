@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from directive.replay import RECORDING_FORMAT, TrafficRecorder, compare_reports, load_recording, replay_recording
+
+
+def _make_repo(root: Path) -> None:
+    (root / "directive" / "reference").mkdir(parents=True)
+    (root / "directive" / "reference" / "agent_context.md").write_text("CTX")
+
+
+def test_recorder_round_trips_messages(tmp_path: Path):
+    recorder = TrafficRecorder(tmp_path / "rec.ndjson")
+    recorder.record({"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}})
+    recorder.record({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    recorder.close()
+
+    entries = load_recording(tmp_path / "rec.ndjson")
+    assert [m.get("method") for _, m in entries] == ["tools/list", "notifications/initialized"]
+    assert entries[0][0] <= entries[1][0]
+
+    (tmp_path / "other.ndjson").write_text('{"t": 0, "message": {}}\n')
+    with pytest.raises(ValueError):
+        load_recording(tmp_path / "other.ndjson")
+
+
+def test_replay_against_legacy_server_and_compare(tmp_path: Path):
+    _make_repo(tmp_path)
+    recording = tmp_path / "rec.ndjson"
+    call = {"name": "directive/files.get", "arguments": {"path": "directive/reference/agent_context.md"}}
+    lines = [
+        {"format": RECORDING_FORMAT},
+        {"t": 0.0, "message": {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18"}}},
+        {"t": 0.01, "message": {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": call}},
+        {"t": 0.02, "message": {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "directive/nope"}}},
+    ]
+    recording.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    baseline = replay_recording(recording, tmp_path, runtime="legacy", speed=0)
+    assert baseline["requests"] == 3 and baseline["errors"] == 1
+    assert [d["tool"] for d in baseline["detail"]] == [None, "directive/files.get", "directive/nope"]
+    assert all(d["response_bytes"] > 0 for d in baseline["detail"])
+
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX, but longer")
+    current = replay_recording(recording, tmp_path, runtime="legacy", speed=10)
+    diff = compare_reports(baseline, current)
+    assert [c["index"] for c in diff["size_changes"]] == [1]
+    assert diff["response_bytes"]["delta"] == len(", but longer")
+
+
+def test_replayed_cancellations_name_the_replayed_request(tmp_path: Path):
+    # A stand-in server that logs what it receives and answers every request at once
+    script = (
+        "import json, sys\n"
+        "log = open(sys.argv[1], 'w')\n"
+        "for line in sys.stdin:\n"
+        "    log.write(line)\n"
+        "    log.flush()\n"
+        "    message = json.loads(line)\n"
+        "    if 'id' in message:\n"
+        "        print(json.dumps({'jsonrpc': '2.0', 'id': message['id'], 'result': {}}), flush=True)\n"
+    )
+    received = tmp_path / "received.ndjson"
+    recording = tmp_path / "rec.ndjson"
+    lines = [
+        {"format": RECORDING_FORMAT},
+        {"t": 0.0, "message": {"jsonrpc": "2.0", "id": 41, "method": "tools/list"}},
+        {"t": 0.0, "message": {"jsonrpc": "2.0", "id": "call", "method": "tools/call", "params": {"name": "directive/files.list"}}},
+        {"t": 0.0, "message": {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": "call"}}},
+        {"t": 0.0, "message": {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 99}}},
+    ]
+    recording.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    command = [sys.executable, "-c", script, str(received)]
+    report = replay_recording(recording, tmp_path, runtime="fastmcp", speed=0, command=command)
+    assert report["requests"] == 2
+
+    messages = [json.loads(line) for line in received.read_text().splitlines()]
+    call_id = next(m["id"] for m in messages if m.get("method") == "tools/call")
+    cancels = [m["params"]["requestId"] for m in messages if m.get("method") == "notifications/cancelled"]
+    # Unknown ids pass through unchanged
+    assert cancels == [call_id, 99]
+
+
+def test_mcp_serve_record_then_replay(tmp_path: Path):
+    pytest.importorskip("mcp.server.fastmcp")
+    _make_repo(tmp_path)
+    env = os.environ.copy()
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    env["PYTHONPATH"] = src + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    messages = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "t", "version": "0"}}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "directive/files.list", "arguments": {}}},
+    ]
+    proc = subprocess.run(
+        [sys.executable, "-m", "directive.cli", "mcp", "serve", "--prewarm", "none", "--record", "rec.ndjson"],
+        cwd=str(tmp_path),
+        env=env,
+        input="".join(json.dumps(m) + "\n" for m in messages),
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert proc.returncode == 0, proc.stderr
+    # The call still in flight at end of input is answered before the server exits
+    assert [json.loads(line).get("id") for line in proc.stdout.splitlines()] == [1, 2]
+    recorded = [m for _, m in load_recording(tmp_path / "rec.ndjson")]
+    assert [m.get("method") for m in recorded] == ["initialize", "notifications/initialized", "tools/call"]
+
+    report = replay_recording(tmp_path / "rec.ndjson", tmp_path, runtime="fastmcp", speed=0)
+    assert report["requests"] == 2 and report["errors"] == 0
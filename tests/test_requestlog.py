@@ -0,0 +1,94 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from directive import bundles, requestlog, server
+from directive.requestlog import RequestLog, count_cache_lookups, note_cache_lookup, request_log
+from conftest import frames, read_messages
+
+
+def test_ring_buffer_keeps_the_latest_records_and_formats_them_on_demand(monkeypatch):
+    hashed = []
+    arguments_hash = requestlog._arguments_hash
+    monkeypatch.setattr(requestlog, "_arguments_hash", lambda arguments: hashed.append(arguments) or arguments_hash(arguments))
+    log = RequestLog(capacity=3)
+    for i in range(5):
+        log.record("directive/files.get", {"path": f"directive/{i}.md", "rev": None}, 0.0125, "ok", 42, 1, 0)
+    # Arguments are hashed when the log is read, not per call
+    assert hashed == []
+    records = log.records()
+    assert len(hashed) == 3
+    assert len(records) == 3 and log.logged == 5
+    assert records[-1]["tool"] == "directive/files.get"
+    assert records[-1]["durationMs"] == 12.5
+    assert (records[-1]["bytes"], records[-1]["cacheHits"], records[-1]["cacheMisses"]) == (42, 1, 0)
+    assert records[-1]["time"].endswith("Z")
+    assert [r["argsHash"] for r in log.records(1)] == [records[-1]["argsHash"]]
+    # None-valued arguments do not change the hash
+    other = RequestLog()
+    other.record("directive/files.get", {"path": "directive/4.md"}, 0.0, "ok")
+    assert other.records()[0]["argsHash"] == records[-1]["argsHash"]
+
+    out = io.StringIO()
+    assert log.dump(out) == 3
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == records
+
+
+def test_streaming_is_sampled():
+    rolls = iter([0.05, 0.5, 0.09, 0.99])
+    stream = io.StringIO()
+    log = RequestLog(capacity=0, stream=stream, sample=0.1, rng=lambda: next(rolls))
+    for outcome in ("ok", "error", "deadline", "cancelled"):
+        log.record("directive/specs.digest", {}, 0.001, outcome)
+    assert [json.loads(line)["outcome"] for line in stream.getvalue().splitlines()] == ["ok", "deadline"]
+    assert log.records() == []
+    with pytest.raises(ValueError):
+        RequestLog(sample=2)
+
+
+def test_cache_lookups_are_counted_per_request():
+    note_cache_lookup(True)  # outside a request: ignored
+    with count_cache_lookups() as lookups:
+        note_cache_lookup(True)
+        note_cache_lookup(False)
+        note_cache_lookup(True)
+    assert (lookups.hits, lookups.misses) == (2, 1)
+
+
+def _serve(root: Path, calls) -> list:
+    requests = frames(
+        *({"id": i, "method": "tools/call", "params": {"name": name, "arguments": arguments}} for i, (name, arguments) in enumerate(calls, 1))
+    )
+    out = io.BytesIO()
+    server.serve_streams(io.BytesIO(requests), out, root / "directive")
+    return read_messages(out.getvalue())
+
+
+def test_server_records_tool_calls_and_serves_the_log(tmp_path: Path):
+    (tmp_path / "directive").mkdir()
+    (tmp_path / "directive" / "a.md").write_text("# A\n")
+    bundles.clear_caches()
+    assert request_log() == {"enabled": False, "records": []}
+
+    log = RequestLog().start()
+    try:
+        # One call per session keeps the records in order
+        for path in ("directive/a.md", "directive/a.md", "directive/missing.md"):
+            _serve(tmp_path, [("directive/files.get", {"path": path})])
+        replies = _serve(tmp_path, [("directive/server.log", {"limit": 3})])
+    finally:
+        log.stop()
+        bundles.clear_caches()
+
+    payload = json.loads(replies[0]["result"]["content"][0]["text"])
+    assert payload["enabled"] is True and payload["logged"] == 3
+    first, second, missing = payload["records"]
+    assert [r["outcome"] for r in payload["records"]] == ["ok", "ok", "error"]
+    assert first["argsHash"] == second["argsHash"] != missing["argsHash"]
+    assert first["cacheMisses"] >= 1 and second["cacheHits"] >= 1 and second["cacheMisses"] == 0
+    # The size of the tool result as sent: this session did not negotiate structuredContent
+    text = json.dumps({"path": "directive/a.md", "content": "# A\n"}, separators=(",", ":"))
+    assert first["bytes"] == len(json.dumps({"content": [{"type": "text", "text": text}]}, separators=(",", ":")))
+    assert missing["bytes"] is None
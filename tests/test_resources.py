@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from directive.resources import ResourceWatcher, list_resources, path_to_uri, read_resource, uri_to_path
+
+
+def _make_repo(tmp_path: Path) -> Path:
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    return tmp_path
+
+
+def test_uri_round_trip_preserves_case_and_spaces():
+    uri = path_to_uri("directive/specs/My Feature/spec.md")
+    assert uri == "directive:///specs/My%20Feature/spec.md"
+    assert uri_to_path(uri) == "directive/specs/My Feature/spec.md"
+
+
+def test_list_and_read_resources(tmp_path: Path):
+    repo = _make_repo(tmp_path)
+    resources = list_resources(repo)
+    assert resources == [
+        {
+            "uri": "directive:///reference/agent_context.md",
+            "name": "agent_context.md",
+            "title": "directive/reference/agent_context.md",
+            "mimeType": "text/markdown",
+        }
+    ]
+    content = read_resource(repo, "directive:///reference/agent_context.md")
+    assert content["text"] == "CTX"
+
+
+def test_watcher_reports_updates_and_list_changes(tmp_path: Path):
+    repo = _make_repo(tmp_path)
+    updated = []
+    list_changed = []
+    watcher = ResourceWatcher(repo, updated.extend, lambda: list_changed.append(True))
+
+    watcher.poll_once()
+    assert updated == [] and list_changed == []
+
+    (repo / "directive" / "reference" / "agent_context.md").write_text("CTX changed")
+    watcher.poll_once()
+    assert updated == ["directive:///reference/agent_context.md"]
+    assert list_changed == []
+
+    (repo / "directive" / "reference" / "new.md").write_text("new")
+    watcher.poll_once()
+    assert list_changed == [True]
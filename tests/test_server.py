@@ -4,6 +4,8 @@ import subprocess
 import sys
 import os
 
+from conftest import frames, read_messages
+
 
 def _run_server_once(cwd: Path, request: dict) -> dict:
     # Launch the server and send a single JSON-RPC request over stdio
@@ -175,3 +177,510 @@ def test_header_parsing_accepts_multiple_headers(tmp_path: Path):
         "directive/templates.tdr",
     }.issubset(names)
 
+
+class _ServerProcess:
+    """Drive a legacy stdio server interactively over framed messages."""
+
+    def __init__(self, cwd: Path, serve_args: str = ""):
+        import threading
+
+        repo_root = Path(__file__).resolve().parents[1]
+        env = os.environ.copy()
+        existing = env.get("PYTHONPATH", "")
+        env["PYTHONPATH"] = (str(repo_root / "src") + (os.pathsep + existing if existing else ""))
+        self.proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                f"from directive.server import serve_stdio; from pathlib import Path; serve_stdio(Path.cwd().joinpath('directive'){serve_args})",
+            ],
+            cwd=str(cwd),
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # Never let a misbehaving server hang the test run
+        self._timer = threading.Timer(10, self.proc.kill)
+        self._timer.start()
+
+    def send(self, message: dict) -> None:
+        body = json.dumps({"jsonrpc": "2.0", **message}).encode("utf-8")
+        self.proc.stdin.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        self.proc.stdin.flush()
+
+    def recv(self) -> dict:
+        length = None
+        while True:
+            line = self.proc.stdout.readline()
+            assert line, "server closed stdout"
+            if line in (b"\r\n", b"\n"):
+                break
+            name, value = line.decode("ascii").split(":", 1)
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        return json.loads(self.proc.stdout.read(length))
+
+    def close(self) -> str:
+        self.proc.stdin.close()
+        self.proc.wait(timeout=10)
+        self._timer.cancel()
+        err = self.proc.stderr.read().decode("utf-8")
+        self.proc.stdout.close()
+        self.proc.stderr.close()
+        return err
+
+
+def test_resources_list_read_and_subscribe_notifications(tmp_path: Path):
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    ctx = tmp_path / "directive" / "reference" / "agent_context.md"
+    ctx.write_text("CTX")
+    uri = "directive:///reference/agent_context.md"
+
+    server = _ServerProcess(tmp_path, ", watch_interval=0.05")
+    try:
+        server.send({"id": 1, "method": "initialize", "params": {}})
+        caps = server.recv()["result"]["capabilities"]
+        assert caps["resources"] == {"subscribe": True, "listChanged": True}
+
+        server.send({"id": 2, "method": "resources/list", "params": {}})
+        uris = [r["uri"] for r in server.recv()["result"]["resources"]]
+        assert uris == [uri]
+
+        server.send({"id": 3, "method": "resources/read", "params": {"uri": uri}})
+        assert server.recv()["result"]["contents"][0]["text"] == "CTX"
+
+        server.send({"id": 4, "method": "resources/subscribe", "params": {"uri": uri}})
+        assert server.recv() == {"jsonrpc": "2.0", "id": 4, "result": {}}
+
+        ctx.write_text("CTX changed")
+        note = server.recv()
+        assert note["method"] == "notifications/resources/updated"
+        assert note["params"] == {"uri": uri}
+
+        (tmp_path / "directive" / "reference" / "new.md").write_text("new")
+        assert server.recv()["method"] == "notifications/resources/list_changed"
+    finally:
+        server.close()
+
+
+def test_sessions_share_one_watcher_that_polls_only_while_subscribed(tmp_path: Path):
+    from directive import server
+
+    (tmp_path / "directive").mkdir()
+    service = server.DirectiveService(tmp_path)
+    first, second = (server._Session(service, server._MessageWriter(lambda frame: None), 0.05) for _ in range(2))
+    uri = "directive:///a.md"
+
+    def _watching():
+        return [watcher.running for watcher in service._watchers.values()]
+
+    first.handle({"id": 1, "method": "resources/list", "params": {}})
+    assert _watching() == []
+    first.handle({"id": 2, "method": "resources/subscribe", "params": {"uri": uri}})
+    second.handle({"id": 2, "method": "resources/subscribe", "params": {"uri": uri}})
+    assert _watching() == [True]
+    first.handle({"id": 3, "method": "resources/unsubscribe", "params": {"uri": uri}})
+    assert _watching() == [True]
+    second.close()
+    assert _watching() == [False]
+    first.close()
+
+
+def test_fastmcp_internals_used_by_the_overrides_exist():
+    # The FastMCP runtime replaces handlers through private FastMCP attributes; fail loudly if an upgrade moves them
+    import inspect
+
+    import pytest
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp import types
+    from mcp.server.fastmcp import FastMCP
+    from mcp.server.lowlevel.helper_types import ReadResourceContents  # noqa: F401
+    from mcp.server.session import ServerSession
+    from mcp.server.stdio import stdio_server
+
+    app = FastMCP("check")
+
+    @app.tool(name="check")
+    def _check() -> dict:
+        return {}
+
+    server = app._mcp_server
+    assert {types.CallToolRequest, types.ListToolsRequest} <= set(server.request_handlers)
+    assert hasattr(app._tool_manager.get_tool("check").fn_metadata, "output_schema")
+    assert "context" in inspect.signature(app._tool_manager.call_tool).parameters
+    assert "validate_input" in inspect.signature(server.call_tool).parameters
+    for name in ("request_context", "create_initialization_options", "subscribe_resource", "unsubscribe_resource"):
+        assert hasattr(type(server), name), name
+    for name in ("client_params", "send_resource_updated", "send_resource_list_changed"):
+        assert hasattr(ServerSession, name), name
+    assert "stdin" in inspect.signature(stdio_server).parameters
+
+
+def test_fastmcp_resources_list_read_and_subscribe(tmp_path: Path, monkeypatch):
+    import anyio
+    import pytest
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from pydantic import AnyUrl
+
+    from directive.server import _build_fastmcp_app
+
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    monkeypatch.chdir(tmp_path)
+    app = _build_fastmcp_app()
+
+    async def _exercise():
+        async with create_connected_server_and_client_session(app._mcp_server) as client:
+            listed = await client.list_resources()
+            assert [str(r.uri) for r in listed.resources] == ["directive:///reference/agent_context.md"]
+            read = await client.read_resource(AnyUrl("directive:///reference/agent_context.md"))
+            assert read.contents[0].text == "CTX"
+            await client.subscribe_resource(AnyUrl("directive:///reference/agent_context.md"))
+
+    anyio.run(_exercise)
+    options = app._mcp_server.create_initialization_options()
+    assert options.capabilities.resources.subscribe is True
+
+
+def test_fastmcp_resource_sessions_keep_their_own_subscriptions_and_drop_when_gone():
+    import asyncio
+    import threading
+
+    from directive.server import _ResourceSessions
+
+    loop = asyncio.new_event_loop()
+    runner = threading.Thread(target=loop.run_forever, daemon=True)
+    runner.start()
+    sent = []
+
+    async def _send(session, uri=None):
+        if session == "gone":
+            raise ConnectionResetError()
+        sent.append((session, uri))
+
+    sessions = _ResourceSessions()
+    sessions.track("a", loop).add("directive:///a.md")
+    sessions.track("b", loop)
+    sessions.track("gone", loop)
+    sessions.subscriptions("b").add("directive:///b.md")
+    sessions.subscriptions("a").discard("directive:///b.md")  # not a's: no effect on b
+
+    def _settle():
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+
+    sessions.updated(["directive:///a.md", "directive:///b.md"], _send)
+    sessions.broadcast(_send)
+    _settle()
+    assert sorted(sent, key=str) == sorted([("a", "directive:///a.md"), ("b", "directive:///b.md"), ("a", None), ("b", None)], key=str)
+    # The session whose send failed is gone
+    assert len(sessions) == 2 and sessions.subscriptions("gone") is None
+
+    loop.call_soon_threadsafe(loop.stop)
+    runner.join(5)
+    loop.close()
+    sessions.broadcast(_send)
+    assert len(sessions) == 0
+
+
+def test_start_prewarm_runs_in_background(tmp_path: Path):
+    from directive import bundles
+    from directive.server import start_prewarm
+
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    ctx = tmp_path / "directive" / "reference" / "agent_context.md"
+    ctx.write_text("CTX")
+
+    thread = start_prewarm(tmp_path, ["reference"])
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert ctx in bundles._CONTENT_CACHE
+    assert start_prewarm(tmp_path, []) is None
+
+
+def test_tools_call_files_section(tmp_path: Path):
+    tdr = tmp_path / "directive" / "specs" / "20250101-a" / "tdr.md"
+    tdr.parent.mkdir(parents=True)
+    tdr.write_text("# TDR\n## 1. Summary\nS\n## 9. Rollout & Migration\nR\n### Flags\nF\n## 10. Test Strategy\nT\n")
+
+    resp = _run_server_once(
+        tmp_path,
+        {
+            "method": "tools/call",
+            "params": {"name": "directive/files.section", "arguments": {"path": "directive/specs/20250101-a/tdr.md", "heading": "Rollout"}},
+        },
+    )
+    payload = json.loads(resp["result"]["content"][0]["text"])
+    assert payload["sections"] == [
+        {"title": "9. Rollout & Migration", "level": 2, "content": "## 9. Rollout & Migration\nR\n### Flags\nF\n"}
+    ]
+
+
+def test_tools_call_specs_digest(tmp_path: Path):
+    spec_dir = tmp_path / "directive" / "specs" / "20250101-feature"
+    spec_dir.mkdir(parents=True)
+    (spec_dir / "spec.md").write_text("**Spec ID**: 20250101  \n**One-line summary**: Adds a thing  \n---\n")
+    (spec_dir / "impact.md").write_text("Impact")
+
+    resp = _run_server_once(
+        tmp_path,
+        {"method": "tools/call", "params": {"name": "directive/specs.digest", "arguments": {}}},
+    )
+    payload = json.loads(resp["result"]["content"][0]["text"])
+    assert payload["specs"] == ["20250101-feature | 20250101 | 2025-01-01 | feature | Adds a thing | impact"]
+
+
+def test_tools_call_specs_changed(tmp_path: Path):
+    spec_dir = tmp_path / "directive" / "specs" / "20250101-feature"
+    spec_dir.mkdir(parents=True)
+    (spec_dir / "spec.md").write_text("**Spec ID**: 20250101  \n---\n")
+
+    resp = _run_server_once(
+        tmp_path,
+        {"method": "tools/call", "params": {"name": "directive/specs.changed", "arguments": {"since": "2000-01-01"}}},
+    )
+    payload = json.loads(resp["result"]["content"][0]["text"])
+    assert payload["mode"] == "mtime"
+    assert [(s["dir"], s["files"]) for s in payload["specs"]] == [
+        ("20250101-feature", ["directive/specs/20250101-feature/spec.md"])
+    ]
+
+
+def test_tools_call_specs_create(tmp_path: Path):
+    (tmp_path / "directive").mkdir()
+    resp = _run_server_once(
+        tmp_path,
+        {"method": "tools/call", "params": {"name": "directive/specs.create", "arguments": {"name": "New thing"}}},
+    )
+    payload = json.loads(resp["result"]["content"][0]["text"])
+    assert payload["dir"].endswith("-new-thing")
+    for path in payload["files"]:
+        assert (tmp_path / path).is_file()
+
+
+def test_concurrent_tool_calls_are_answered_and_summarized(tmp_path: Path):
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+
+    server = _ServerProcess(tmp_path)
+    try:
+        call = {"method": "tools/call", "params": {"name": "directive/files.get", "arguments": {"path": "directive/reference/agent_context.md"}}}
+        for i in range(1, 9):
+            server.send({"id": i, **call})
+        server.send({"id": 9, "method": "tools/call", "params": {"name": "directive/nope", "arguments": {}}})
+        responses = {r["id"]: r for r in (server.recv() for _ in range(9))}
+    finally:
+        err = server.close()
+
+    for i in range(1, 9):
+        assert json.loads(responses[i]["result"]["content"][0]["text"])["content"] == "CTX"
+    assert responses[9]["error"]["code"] == -32601
+    # Shutdown reports how many calls were coalesced onto in-flight work
+    assert "directive: coalesced" in err and "of 9 tool calls" in err
+
+
+def test_frames_use_byte_lengths_for_non_ascii_content(tmp_path: Path):
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("Café — über", encoding="utf-8")
+
+    server = _ServerProcess(tmp_path)
+    try:
+        # Request with non-ASCII arguments; the server must read exactly Content-Length bytes
+        server.send({"id": 1, "method": "tools/call", "params": {"name": "directive/files.get", "arguments": {"path": "directive/reference/agent_context.md", "note": "é"}}})
+        server.send({"id": 2, "method": "tools/list", "params": {}})
+        responses = {r["id"]: r for r in (server.recv(), server.recv())}
+    finally:
+        server.close()
+
+    assert json.loads(responses[1]["result"]["content"][0]["text"])["content"] == "Café — über"
+    assert "tools" in responses[2]["result"]
+
+
+def test_tools_call_returns_structured_content_for_negotiated_clients(tmp_path: Path):
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("line one\n\"quoted\"\n")
+    call = {"method": "tools/call", "params": {"name": "directive/files.get", "arguments": {"path": "directive/reference/agent_context.md"}}}
+    expected = {"path": "directive/reference/agent_context.md", "content": "line one\n\"quoted\"\n"}
+
+    server = _ServerProcess(tmp_path)
+    try:
+        server.send({"id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18"}})
+        assert server.recv()["result"]["protocolVersion"] == "2025-06-18"
+        server.send({"id": 2, "method": "tools/list", "params": {}})
+        tools = {t["name"]: t for t in server.recv()["result"]["tools"]}
+        assert tools["directive/files.get"]["outputSchema"]["required"] == ["path", "content"]
+        server.send({"id": 3, **call})
+        assert server.recv()["result"] == {"content": [], "structuredContent": expected}
+    finally:
+        server.close()
+
+    # Older protocol versions keep the JSON-in-text form
+    server = _ServerProcess(tmp_path)
+    try:
+        server.send({"id": 1, "method": "initialize", "params": {"protocolVersion": "2024-11-05"}})
+        assert server.recv()["result"]["protocolVersion"] == "2024-11-05"
+        server.send({"id": 2, **call})
+        result = server.recv()["result"]
+        server.send({"id": 4, "method": "tools/list", "params": {}})
+        assert all("outputSchema" not in t for t in server.recv()["result"]["tools"])
+        assert "structuredContent" not in result
+        assert json.loads(result["content"][0]["text"]) == expected
+        server.send({"id": 3, "method": "initialize", "params": {"protocolVersion": "1999-01-01"}})
+        assert server.recv()["result"]["protocolVersion"] == "2025-06-18"
+    finally:
+        server.close()
+
+
+def test_fastmcp_tools_return_structured_content(tmp_path: Path, monkeypatch):
+    import anyio
+    import pytest
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from directive.server import _build_fastmcp_app
+
+    (tmp_path / "directive" / "reference" / "templates").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_operating_procedure.md").write_text("AOP")
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    (tmp_path / "directive" / "reference" / "templates" / "spec_template.md").write_text("SPEC")
+    monkeypatch.chdir(tmp_path)
+    app = _build_fastmcp_app()
+
+    async def _exercise():
+        async with create_connected_server_and_client_session(app._mcp_server) as client:
+            tools = {t.name: t for t in (await client.list_tools()).tools}
+            assert "agentContext" in tools["directive/templates.spec"].outputSchema["properties"]
+            result = await client.call_tool("directive/templates.spec", {})
+            assert result.isError is False
+            assert result.content == []
+            assert result.structuredContent["template"]["content"] == "SPEC"
+            missing = await client.call_tool("directive/files.get", {"path": "directive/nope.md"})
+            assert missing.isError is True
+
+    anyio.run(_exercise)
+
+
+def test_fastmcp_tools_send_older_clients_only_text(tmp_path: Path, monkeypatch):
+    import anyio
+    import pytest
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp import types
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from directive.server import _build_fastmcp_app
+
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(types, "LATEST_PROTOCOL_VERSION", "2025-03-26")
+    app = _build_fastmcp_app()
+
+    async def _exercise():
+        async with create_connected_server_and_client_session(app._mcp_server) as client:
+            result = await client.call_tool("directive/files.get", {"path": "directive/reference/agent_context.md"})
+            assert result.structuredContent is None
+            assert [json.loads(c.text) for c in result.content] == [
+                {"path": "directive/reference/agent_context.md", "content": "CTX"}
+            ]
+            tools = (await client.list_tools()).tools
+            assert tools and all(t.outputSchema is None for t in tools)
+
+    anyio.run(_exercise)
+
+
+def test_fastmcp_tools_use_the_service_repo_root(tmp_path: Path, monkeypatch):
+    import anyio
+    import pytest
+
+    pytest.importorskip("mcp.server.fastmcp")
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from directive.server import DirectiveService, _build_fastmcp_app
+
+    (tmp_path / "repo" / "directive").mkdir(parents=True)
+    (tmp_path / "repo" / "directive" / "a.md").write_text("A")
+    (tmp_path / "elsewhere").mkdir()
+    service = DirectiveService(tmp_path / "repo")
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    app = _build_fastmcp_app(service)
+
+    async def _exercise():
+        async with create_connected_server_and_client_session(app._mcp_server) as client:
+            result = await client.call_tool("directive/files.get", {"path": "directive/a.md"})
+            assert result.structuredContent["content"] == "A"
+            listed = await client.list_resources()
+            assert [str(r.uri) for r in listed.resources] == ["directive:///a.md"]
+
+    anyio.run(_exercise)
+    assert service.directive_root == tmp_path / "repo" / "directive"
+
+
+def _stream_requests() -> bytes:
+    return frames(
+        {"id": 1, "method": "initialize", "params": {"protocolVersion": "2025-06-18"}},
+        {"id": 2, "method": "tools/call", "params": {"name": "directive/files.get", "arguments": {"path": "directive/reference/agent_context.md"}}},
+        {"id": 3, "method": "tools/call", "params": {"name": "directive/files.get", "arguments": {"path": "directive/missing.md"}}},
+        {"id": 4, "method": "tools/list", "params": {}},
+    )
+
+
+def test_serve_streams_runs_in_process(tmp_path: Path):
+    import io
+
+    import pytest
+
+    from directive.server import DirectiveService, serve_streams
+
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+    writer = io.BytesIO()
+
+    assert serve_streams(io.BytesIO(_stream_requests()), writer, tmp_path / "directive") == 0
+    # A service is bound to one repository; a root that names another is rejected
+    with pytest.raises(ValueError):
+        serve_streams(io.BytesIO(b""), writer, tmp_path / "elsewhere", service=DirectiveService(tmp_path))
+    with pytest.raises(TypeError):
+        serve_streams(io.BytesIO(b""), writer)
+
+    responses = {m.get("id"): m for m in read_messages(writer.getvalue())}
+    assert responses[1]["result"]["protocolVersion"] == "2025-06-18"
+    assert responses[2]["result"]["structuredContent"]["content"] == "CTX"
+    assert responses[3]["error"]["code"] == 1001
+    assert "tools" in responses[4]["result"]
+
+
+def test_serve_streams_async_runs_on_asyncio_streams(tmp_path: Path):
+    import asyncio
+
+    from directive.server import serve_streams_async
+
+    (tmp_path / "directive" / "reference").mkdir(parents=True)
+    (tmp_path / "directive" / "reference" / "agent_context.md").write_text("CTX")
+
+    class _Writer:
+        def __init__(self):
+            self.data = b""
+
+        def write(self, data: bytes) -> None:
+            self.data += data
+
+        async def drain(self) -> None:
+            pass
+
+    async def _exercise() -> bytes:
+        reader = asyncio.StreamReader()
+        reader.feed_data(_stream_requests())
+        reader.feed_eof()
+        writer = _Writer()
+        assert await serve_streams_async(reader, writer, tmp_path / "directive") == 0
+        return writer.data
+
+    responses = {m.get("id"): m for m in read_messages(asyncio.run(_exercise()))}
+    assert sorted(responses) == [1, 2, 3, 4]
+    assert responses[2]["result"]["structuredContent"]["content"] == "CTX"
+    assert responses[3]["error"]["code"] == 1001
@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import pytest
+
+from directive import bundles
+from directive.shared_cache import CACHE_DIRNAME, SEGMENT_NAME, SharedFiles, shared_cache_available
+from directive.cache import stat_signature
+
+pytestmark = pytest.mark.skipif(not shared_cache_available(), reason="requires flock and mmap")
+
+
+def _read(shared: SharedFiles, path: Path) -> str:
+    return shared.read_text(str(path), stat_signature(path.stat()))
+
+
+def test_second_process_reads_what_the_first_published(tmp_path: Path):
+    doc = tmp_path / "directive" / "reference" / "agent_context.md"
+    doc.parent.mkdir(parents=True)
+    doc.write_text("CTX é")
+    # Two instances map the segment independently, as two server processes would
+    writer, reader = SharedFiles(tmp_path), SharedFiles(tmp_path)
+
+    assert _read(writer, doc) == "CTX é"
+    assert (writer.misses, writer.segment.publishes) == (1, 1)
+    assert _read(reader, doc) == "CTX é"
+    assert (reader.hits, reader.misses, reader.segment.publishes) == (1, 0, 0)
+    assert (tmp_path / CACHE_DIRNAME / ".gitignore").read_text() == "*\n"
+
+    # A changed file is re-read and republished; the other process remaps
+    doc.write_text("CTX changed, longer")
+    assert _read(reader, doc) == "CTX changed, longer"
+    assert _read(writer, doc) == "CTX changed, longer"
+    assert writer.hits == 1 and writer.segment.publishes == 1
+
+
+def test_enable_shared_cache_serves_contents_and_listing(tmp_path: Path):
+    ref = tmp_path / "directive" / "reference"
+    ref.mkdir(parents=True)
+    (ref / "agent_context.md").write_text("CTX")
+    bundles.clear_caches()
+    try:
+        assert bundles.enable_shared_cache(tmp_path)
+        assert bundles.read_directive_file(tmp_path, "directive/reference/agent_context.md") == "CTX"
+        assert bundles.list_directive_files(tmp_path) == ["directive/reference/agent_context.md"]
+        # Nothing is held in the process cache; the segment has the file and the listing
+        assert len(bundles._CONTENT_CACHE) == 0
+        assert (ref / "agent_context.md") in bundles._CONTENT_CACHE
+        other = SharedFiles(tmp_path)
+        assert other.get_listing(str(tmp_path / "directive"))[1] == ["directive/reference/agent_context.md"]
+
+        (ref / "new.md").write_text("new")
+        assert bundles.list_directive_files(tmp_path) == ["directive/reference/agent_context.md", "directive/reference/new.md"]
+    finally:
+        bundles.clear_caches()
+
+
+def test_misses_in_a_batch_are_published_once(tmp_path: Path):
+    from directive.shared_cache import batch_publishes
+
+    docs = tmp_path / "directive" / "specs"
+    docs.mkdir(parents=True)
+    paths = []
+    for i in range(20):
+        paths.append(docs / f"{i}.md")
+        paths[-1].write_text(f"spec {i}")
+    shared = SharedFiles(tmp_path)
+    with batch_publishes():
+        for path in paths:
+            assert _read(shared, path) == f"spec {path.stem}"
+        # Staged entries are served before they are published
+        assert _read(shared, paths[0]) == "spec 0"
+        assert shared.segment.publishes == 0
+    assert (shared.misses, shared.hits, shared.segment.publishes) == (20, 1, 1)
+    assert len(SharedFiles(tmp_path).segment) == 20
+
+
+def test_segment_stays_under_its_cap_by_evicting_dead_then_least_recent(tmp_path: Path, monkeypatch):
+    from directive import shared_cache
+
+    monkeypatch.setattr(shared_cache, "_MAX_SEGMENT_BYTES", 2500)
+    docs = tmp_path / "directive"
+    docs.mkdir()
+    for name in ("a", "b", "c", "d"):
+        (docs / f"{name}.md").write_text(name * 700)
+    shared = SharedFiles(tmp_path)
+    for name in ("a", "b", "c"):
+        _read(shared, docs / f"{name}.md")
+    (docs / "b.md").unlink()
+    _read(shared, docs / "a.md")  # a is now more recently used than c
+    _read(shared, docs / "d.md")
+
+    other = SharedFiles(tmp_path)
+    assert (tmp_path / CACHE_DIRNAME / SEGMENT_NAME).stat().st_size <= 2500
+    assert shared.segment.compactions == 1
+    assert [other.segment.get(f"file:directive/{name}.md") is not None for name in "abcd"] == [True, False, False, True]
+    meta, view = other.segment.get("file:directive/a.md")
+    assert isinstance(view, memoryview) and bytes(view) == b"a" * 700
+    view.release()
+
+
+def test_publishes_append_to_the_segment_and_skip_torn_records(tmp_path: Path):
+    docs = tmp_path / "directive"
+    docs.mkdir()
+    (docs / "a.md").write_text("first")
+    (docs / "b.md").write_text("bee")
+    writer, reader = SharedFiles(tmp_path), SharedFiles(tmp_path)
+    segment = tmp_path / CACHE_DIRNAME / SEGMENT_NAME
+
+    _read(writer, docs / "a.md")
+    inode, size = segment.stat().st_ino, segment.stat().st_size
+    assert _read(reader, docs / "a.md") == "first"
+    (docs / "a.md").write_text("second")
+    _read(writer, docs / "a.md")
+    _read(writer, docs / "b.md")
+    # Appended in place: same file, and the latest record for a key wins
+    assert segment.stat().st_ino == inode and segment.stat().st_size > size
+    assert (len(reader.segment), _read(reader, docs / "a.md"), reader.hits) == (2, "second", 2)
+
+    # A record cut short (a writer that crashed mid-append) is ignored, then cut off by the next writer
+    with open(segment, "ab") as fh:
+        fh.write(b"\x05\x00\x00\x00\x02\x00\x00\x00\xff\x00\x00\x00\x00\x00\x00\x00torn")
+    assert len(SharedFiles(tmp_path).segment) == 2
+    (docs / "c.md").write_text("sea")
+    _read(reader, docs / "c.md")
+    assert [_read(SharedFiles(tmp_path), docs / f"{name}.md") for name in "abc"] == ["second", "bee", "sea"]
+    assert writer.segment.compactions == reader.segment.compactions == 0
+
+
+def test_shared_misses_stop_at_checkpoints(tmp_path: Path):
+    from directive.cache import FileCache
+    from directive.cancellation import CancelToken, Cancelled, cancel_scope
+
+    doc = tmp_path / "directive" / "big.md"
+    doc.parent.mkdir()
+    doc.write_text("x" * 1000)
+    cache = FileCache()
+    cache.attach_shared(SharedFiles(tmp_path))
+    token = CancelToken()
+    token.cancel()
+    with cancel_scope(token), pytest.raises(Cancelled):
+        cache.read_text(doc)
+    assert cache.read_text(doc) == "x" * 1000
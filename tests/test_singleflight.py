@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from directive.singleflight import SingleFlight
+
+
+def _run_concurrently(flights: SingleFlight, key, fn, callers: int):
+    results, errors = [], []
+
+    def _call():
+        try:
+            results.append(flights.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_call) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_identical_inflight_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def _slow():
+        runs.append(1)
+        release.wait(5)
+        return "value"
+
+    threads, results, errors = _run_concurrently(flights, "k", _slow, 4)
+    # Wait until every follower has joined the leader's call
+    for _ in range(500):
+        if flights.coalesced == 3:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert runs == [1]
+    assert results == ["value"] * 4 and errors == []
+    assert (flights.executed, flights.coalesced) == (1, 3)
+    assert flights.summary() == "directive: coalesced 3 of 4 tool calls (1 executed)"
+
+
+def test_errors_are_shared_and_nothing_is_cached():
+    flights = SingleFlight()
+    with pytest.raises(FileNotFoundError):
+        flights.do("k", lambda: (_ for _ in ()).throw(FileNotFoundError("gone")))
+    # Completed calls are not remembered
+    assert flights.do("k", lambda: 1) == 1
+    assert flights.do("k", lambda: 2) == 2
+    assert flights.executed == 3 and flights.coalesced == 0
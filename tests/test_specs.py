@@ -0,0 +1,191 @@
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+from directive.bundles import clear_caches
+from directive.specs import get_spec_index, specs_changed, specs_digest
+
+
+SPEC_HEADER = """# Spec (per PR)
+
+**Spec ID**: 20251031  
+**Created**: 2025-10-31  
+
+**Feature name**: Spec Ordering System  
+**One-line summary**: Order specs chronologically.  
+
+---
+
+## Problem
+**Feature name**: not a header field
+"""
+
+
+def _make_specs(tmp_path: Path) -> Path:
+    specs = tmp_path / "directive" / "specs"
+    (specs / "20251031-spec-ordering").mkdir(parents=True)
+    (specs / "20251031-spec-ordering" / "spec.md").write_text(SPEC_HEADER)
+    (specs / "20251031-spec-ordering" / "tdr.md").write_text("TDR")
+    (specs / "20250916-legacy-feature").mkdir()
+    (specs / "20250916-legacy-feature" / "spec.md").write_text("# Spec\n**Feature name**: Legacy\n")
+    return specs
+
+
+def test_specs_digest_one_line_per_spec_in_date_order(tmp_path: Path):
+    _make_specs(tmp_path)
+    digest = specs_digest(tmp_path)
+    assert digest["count"] == 2
+    assert digest["specs"] == [
+        "20250916-legacy-feature | 20250916 | 2025-09-16 | Legacy |  | -",
+        "20251031-spec-ordering | 20251031 | 2025-10-31 | Spec Ordering System | Order specs chronologically. | tdr",
+    ]
+
+
+def test_spec_index_reparses_only_changed_specs(tmp_path: Path):
+    specs = _make_specs(tmp_path)
+    index = get_spec_index(tmp_path)
+    index.refresh()
+    before = index.reparsed
+
+    index.refresh()
+    assert index.reparsed == before
+
+    (specs / "20251031-spec-ordering" / "impact.md").write_text("Impact")
+    (specs / "20251101-new").mkdir()
+    records = {r["dir"]: r for r in index.refresh()}
+    assert index.reparsed == before + 2
+    assert records["20251031-spec-ordering"]["docs"] == ["impact", "tdr"]
+    assert records["20251101-new"]["feature"] == "new"
+
+    (specs / "20250916-legacy-feature" / "spec.md").write_text("# Spec\n**One-line summary**: Now summarized\n")
+    records = {r["dir"]: r for r in index.refresh()}
+    assert records["20250916-legacy-feature"]["summary"] == "Now summarized"
+    assert index.reparsed == before + 3
+
+
+def test_create_spec_scaffolds_filled_documents(tmp_path: Path):
+    from datetime import date
+
+    from directive.specs import create_spec
+
+    (tmp_path / "directive").mkdir()
+    created = create_spec(tmp_path, "Selective update!", today=date(2025, 11, 5))
+    assert created["dir"] == "20251105-selective-update"
+    assert created["files"] == [
+        "directive/specs/20251105-selective-update/spec.md",
+        "directive/specs/20251105-selective-update/impact.md",
+        "directive/specs/20251105-selective-update/tdr.md",
+    ]
+    spec_dir = tmp_path / "directive" / "specs" / "20251105-selective-update"
+    spec = (spec_dir / "spec.md").read_text()
+    assert "**Spec ID**: 20251105" in spec
+    assert "**Created**: 2025-11-05" in spec
+    assert "**Feature name**: Selective update!" in spec
+    tdr = (spec_dir / "tdr.md").read_text()
+    assert "— Selective update!" in tdr
+    assert "/directive/specs/20251105-selective-update/spec.md" in tdr
+    # No temporary directories are left behind
+    assert [p.name for p in spec_dir.parent.iterdir()] == ["20251105-selective-update"]
+
+
+def test_create_spec_same_day_collision_and_repo_templates(tmp_path: Path):
+    from datetime import date
+
+    from directive.specs import create_spec
+
+    templates = tmp_path / "directive" / "reference" / "templates"
+    templates.mkdir(parents=True)
+    (templates / "spec_template.md").write_text("**Spec ID**: YYYYMMDD\ncustom\n")
+    first = create_spec(tmp_path, "feature", docs=["spec"], today=date(2025, 1, 1))
+    second = create_spec(tmp_path, "feature", docs=["spec"], today=date(2025, 1, 1))
+    assert first["dir"] == "20250101-feature"
+    assert second["dir"] == "20250101-feature-2"
+    assert (tmp_path / second["files"][0]).read_text() == "**Spec ID**: 20250101\ncustom\n"
+
+
+def test_create_spec_rejects_bad_input(tmp_path: Path):
+    import pytest
+
+    from directive.specs import create_spec
+
+    (tmp_path / "directive").mkdir()
+    with pytest.raises(ValueError):
+        create_spec(tmp_path, "!!!")
+    with pytest.raises(ValueError):
+        create_spec(tmp_path, "ok", docs=["readme"])
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+def test_specs_changed_since_revision(tmp_path: Path):
+    specs = _make_specs(tmp_path)
+    (specs / "20250801-removed").mkdir()
+    (specs / "20250801-removed" / "spec.md").write_text("gone")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    _git(tmp_path, "tag", "v1")
+
+    (specs / "20251031-spec-ordering" / "impact.md").write_text("Impact")  # untracked
+    shutil.rmtree(specs / "20250801-removed")
+    (specs / "20251101-new").mkdir()
+    (specs / "20251101-new" / "spec.md").write_text("**Feature name**: New\n")
+    _git(tmp_path, "add", "directive/specs/20251101-new")
+    _git(tmp_path, "commit", "-q", "-m", "new")
+
+    try:
+        result = specs_changed(tmp_path, "v1")
+        index = get_spec_index(tmp_path)
+        assert (result["mode"], result["count"]) == ("git", 3)
+        by_dir = {spec["dir"]: spec for spec in result["specs"]}
+        assert by_dir["20250801-removed"] == {
+            "dir": "20250801-removed",
+            "path": "directive/specs/20250801-removed",
+            "status": "deleted",
+            "files": ["directive/specs/20250801-removed/spec.md"],
+        }
+        assert by_dir["20251101-new"]["status"] == "added"
+        assert by_dir["20251101-new"]["feature"] == "New"
+        changed = by_dir["20251031-spec-ordering"]
+        assert (changed["status"], changed["files"]) == ("modified", ["directive/specs/20251031-spec-ordering/impact.md"])
+        assert changed["docs"] == ["impact", "tdr"]
+        assert "content" not in changed
+        # Only the reported specs were parsed; the unchanged one was never read
+        assert index.reparsed == 2
+
+        assert [s["dir"] for s in specs_changed(tmp_path, "HEAD")["specs"]] == ["20250801-removed", "20251031-spec-ordering"]
+        with pytest.raises(ValueError):
+            specs_changed(tmp_path, "no-such-tag")
+    finally:
+        clear_caches()
+
+
+def test_specs_changed_since_date_uses_mtimes(tmp_path: Path):
+    specs = _make_specs(tmp_path)
+    old = time.time() - 10 * 86400
+    for path in [*specs.rglob("*"), specs]:
+        os.utime(path, (old, old))
+    (specs / "20250916-legacy-feature" / "spec.md").write_text("# Spec\n**Feature name**: Legacy v2\n")
+    os.utime(specs / "20250916-legacy-feature", (old, old))
+
+    since = time.strftime("%Y-%m-%d", time.localtime(old + 86400))
+    result = specs_changed(tmp_path, since)
+    assert result["mode"] == "mtime"
+    assert [(s["dir"], s["status"], s["files"], s["feature"]) for s in result["specs"]] == [
+        ("20250916-legacy-feature", "modified", ["directive/specs/20250916-legacy-feature/spec.md"], "Legacy v2")
+    ]
+    with pytest.raises(ValueError):
+        specs_changed(tmp_path, "2025-13-45")